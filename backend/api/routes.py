@@ -1,40 +1,118 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
-from models.database import get_db, GridLoad, Forecast
+import numpy as np
+from models.database import get_db, get_async_db, GridLoad, Forecast
+from services.anomalies import AnomalyService
+from services.backtesting import BacktestService
 from services.data_generator import DataGenerator
 from services.forecasting import ForecastingService
-from utils.validation import validate_segment_name, validate_hours, validate_days
+from services.export import InvalidCursor, csv_lines, decode_cursor, encode_cursor, fetch_page, iter_rows, ndjson_lines
+from services.ingestion import LineTooLong, LoadIngestor
+from services.live_updates import SubscriberLimitReached, dashboard_broadcaster
+from services.precompute import precompute_scheduler, precomputed_results
+from services.rollups import RollupService, lttb_indices
+from services.result_cache import result_cache
+from services.retention import retention_job, retention_policy
+from services.segment_registry import segment_registry
+from services.snapshot import AnalyticsSnapshot
+from utils.responses import FastJSONResponse
+from utils.validation import (
+    MAX_DAYS,
+    validate_segment_name, validate_hours, validate_days, validate_chunk_size,
+    validate_resolution, validate_max_points, validate_page_size, validate_offset, validate_limit,
+    validate_engine, validate_step, validate_horizons, validate_anomaly_method, validate_anomaly_window,
+    validate_anomaly_threshold
+)
 
 router = APIRouter()
 
 
+async def get_snapshot(
+    region: Optional[str] = None,
+    q: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_db)
+) -> AnalyticsSnapshot:
+    """Per-request analytics snapshot shared by every dependant of the request"""
+    return await AnalyticsSnapshot(segments=_filtered_segments(region, q)).load_async(session)
+
+
+def _filtered_segments(region: Optional[str], q: Optional[str]) -> List[str]:
+    """Registry segments matching the optional region and name-substring filters"""
+    return segment_registry.select(
+        region=validate_segment_name(region) if region else None,
+        q=validate_segment_name(q) if q else None
+    )
+
+
+def _paginate(items: List, offset: int, limit: Optional[int]) -> Tuple[List, Dict]:
+    """Slice a list for offset/limit pagination and describe the page"""
+    validated_offset = validate_offset(offset)
+    validated_limit = validate_limit(limit) if limit is not None else None
+    end = None if validated_limit is None else validated_offset + validated_limit
+    return items[validated_offset:end], {
+        "total": len(items),
+        "offset": validated_offset,
+        "limit": validated_limit
+    }
+
+
+def _segment_not_found(segment: str) -> HTTPException:
+    return HTTPException(
+        status_code=404,
+        detail=f"Segment '{segment}' not found. See /api/segments for available segments"
+    )
+
+
 @router.get("/")
 async def root():
     return {"message": "Grid Intelligence & Forecasting Platform API", "status": "operational"}
 
 
 @router.get("/api/dashboard/current-load")
-async def get_current_load(db: Session = Depends(get_db)):
-    """Get current load for all grid segments"""
+async def get_current_load(
+    region: Optional[str] = None,
+    q: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    session: AsyncSession = Depends(get_async_db)
+):
+    """Get current load for all grid segments
+    
+    ``region`` and ``q`` (name substring) filter the segments; ``offset`` and
+    ``limit`` page through them in registry order. ``total_load_mw`` covers
+    the returned page.
+    """
     try:
-        current_loads = DataGenerator.get_current_loads(db)
+        segments, pagination = _paginate(_filtered_segments(region, q), offset, limit)
+        snapshot = await AnalyticsSnapshot(
+            segments=segments, window=AnalyticsSnapshot.CURRENT_WINDOW
+        ).load_async(session)
+        current_loads = snapshot.current_loads()
         
         if not current_loads:
-            return {
+            return FastJSONResponse({
                 "total_load_mw": 0.0,
                 "segments": {},
+                "pagination": pagination,
                 "timestamp": datetime.now().isoformat()
-            }
+            })
         
         total_load = sum(load.get("load_mw", 0) for load in current_loads.values())
         
-        return {
+        return FastJSONResponse({
             "total_load_mw": round(total_load, 2),
             "segments": current_loads,
+            "pagination": pagination,
             "timestamp": datetime.now().isoformat()
-        }
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch current load: {str(e)}")
 
@@ -43,202 +121,258 @@ async def get_current_load(db: Session = Depends(get_db)):
 async def get_forecast(
     segment: Optional[str] = None,
     hours: int = 24,
-    db: Session = Depends(get_db)
+    engine: str = ForecastingService.DEFAULT_ENGINE,
+    region: Optional[str] = None,
+    q: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    session: AsyncSession = Depends(get_async_db)
 ):
-    """Get demand forecast for a segment or all segments"""
+    """Get demand forecast for a segment or all segments
+    
+    Without ``segment``, the filtered segments are paged with ``offset`` and
+    ``limit`` and only the returned page is forecast. ``engine`` selects
+    ``moving_average`` (default) or ``holt_winters``. Default-engine forecasts
+    come from the latest precomputed run while it is fresh; ``freshness``
+    reports the source.
+    """
     try:
-        from services.data_generator import DataGenerator
-        
         # Validate inputs
+        validated_engine = validate_engine(engine)
         validated_hours = validate_hours(hours)
         validated_segment = validate_segment_name(segment) if segment else None
         
         if validated_segment:
             # Validate segment exists
-            if validated_segment not in DataGenerator.GRID_SEGMENTS:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Segment '{validated_segment}' not found. Available segments: {', '.join(DataGenerator.GRID_SEGMENTS)}"
-                )
+            if validated_segment not in segment_registry:
+                raise _segment_not_found(validated_segment)
             
-            forecasts = ForecastingService.forecast_demand(db, validated_segment, validated_hours)
-            return {
+            forecasts, freshness = await _forecasts(session, [validated_segment], validated_hours, validated_engine)
+            return FastJSONResponse({
                 "grid_segment": validated_segment,
                 "forecast_hours": validated_hours,
-                "forecasts": forecasts or []
-            }
+                "engine": validated_engine,
+                "forecasts": forecasts[validated_segment] or [],
+                "freshness": freshness
+            })
         else:
             # Return forecast for all segments
-            all_forecasts = {}
-            for seg in DataGenerator.GRID_SEGMENTS:
-                forecasts = ForecastingService.forecast_demand(db, seg, validated_hours)
-                all_forecasts[seg] = forecasts or []
+            segments, pagination = _paginate(_filtered_segments(region, q), offset, limit)
+            all_forecasts, freshness = await _forecasts(session, segments, validated_hours, validated_engine)
             
-            return {
+            return FastJSONResponse({
                 "forecast_hours": validated_hours,
-                "forecasts_by_segment": all_forecasts
-            }
+                "engine": validated_engine,
+                "forecasts_by_segment": all_forecasts,
+                "pagination": pagination,
+                "freshness": freshness
+            })
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch forecast: {str(e)}")
 
 
+async def _forecasts(session: AsyncSession, segments: List[str], hours: int, engine: str) -> Tuple[Dict, Dict]:
+    """Forecasts with their freshness; only the default engine is precomputed"""
+    if engine == ForecastingService.DEFAULT_ENGINE:
+        return await precomputed_results.forecasts_async(session, segments, hours)
+    forecasts = await ForecastingService.forecast_demand_batch_async(session, segments, hours, engine=engine)
+    return forecasts, precomputed_results.freshness(None, len(segments), len(segments))
+
+
 @router.get("/api/dashboard/outage-risks")
-async def get_outage_risks(db: Session = Depends(get_db)):
-    """Get outage risk scores for all grid segments"""
+async def get_outage_risks(
+    region: Optional[str] = None,
+    q: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    session: AsyncSession = Depends(get_async_db)
+):
+    """Get outage risk scores for all grid segments
+    
+    Risks are ranked across every filtered segment before ``offset`` and
+    ``limit`` are applied, so the first page holds the riskiest segments.
+    """
     try:
-        risks = ForecastingService.get_all_segment_risks(db)
-        return {
-            "risks": risks or [],
+        snapshot = await AnalyticsSnapshot(
+            segments=_filtered_segments(region, q), window=AnalyticsSnapshot.RISK_WINDOW
+        ).load_async(session, risks_only=True)
+        risks, pagination = _paginate(snapshot.segment_risks() or [], offset, limit)
+        return FastJSONResponse({
+            "risks": risks,
+            "pagination": pagination,
+            "freshness": snapshot.freshness(),
             "timestamp": datetime.now().isoformat()
-        }
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch outage risks: {str(e)}")
 
 
 @router.get("/api/dashboard/alerts")
-async def get_alerts(db: Session = Depends(get_db)):
-    """Get predictive alerts based on forecasts and anomalies"""
+async def get_alerts(
+    include: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    snapshot: AnalyticsSnapshot = Depends(get_snapshot)
+):
+    """Get predictive alerts based on forecasts and anomalies
+    
+    ``include`` is a comma-separated list of ``risks`` and/or ``maintenance``;
+    the requested payloads are served from the same snapshot as the alerts.
+    ``region`` and ``q`` restrict the segments considered; ``offset`` and
+    ``limit`` page the alert list, while ``alert_count`` stays the total.
+    """
     try:
-        alerts = []
-        
-        # Get current loads and forecasts
-        current_loads = DataGenerator.get_current_loads(db)
-        risks = ForecastingService.get_all_segment_risks(db)
-        
-        # Check for high load alerts
-        total_load = sum(load["load_mw"] for load in current_loads.values())
-        high_load_threshold = 2500  # MW
+        extras = {part.strip() for part in include.split(",") if part.strip()} if include else set()
+        unknown = extras - {"risks", "maintenance"}
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported include value(s): {', '.join(sorted(unknown))}"
+            )
         
-        if total_load > high_load_threshold:
-            alerts.append({
-                "type": "HIGH_LOAD",
-                "severity": "WARNING",
-                "message": f"Total grid load ({total_load:.1f} MW) exceeds threshold ({high_load_threshold} MW)",
-                "timestamp": datetime.now().isoformat()
-            })
-        
-        # Check for high risk segments
-        for risk in risks:
-            if risk["risk_score"] >= 75:
-                alerts.append({
-                    "type": "HIGH_RISK",
-                    "severity": "CRITICAL",
-                    "message": f"High outage risk detected in {risk['grid_segment']} (Risk Score: {risk['risk_score']})",
-                    "grid_segment": risk["grid_segment"],
-                    "risk_score": risk["risk_score"],
-                    "timestamp": datetime.now().isoformat()
-                })
-            
-            # Check for anomalies
-            if risk["factors"].get("anomaly_detected", False):
-                alerts.append({
-                    "type": "ANOMALY",
-                    "severity": "WARNING",
-                    "message": f"Unusual load pattern detected in {risk['grid_segment']}",
-                    "grid_segment": risk["grid_segment"],
-                    "timestamp": datetime.now().isoformat()
-                })
-        
-        # Get forecast for next hour to check for surge
-        for segment in DataGenerator.GRID_SEGMENTS:
-            forecast = ForecastingService.forecast_demand(db, segment, hours=1)
-            if forecast:
-                predicted = forecast[0]["predicted_load_mw"]
-                current = current_loads.get(segment, {}).get("load_mw", 0)
-                
-                if current > 0 and predicted > current * 1.2:  # 20% surge predicted
-                    alerts.append({
-                        "type": "SURGE_PREDICTED",
-                        "severity": "INFO",
-                        "message": f"Demand surge predicted in {segment} (Current: {current:.1f} MW → Forecast: {predicted:.1f} MW)",
-                        "grid_segment": segment,
-                        "timestamp": datetime.now().isoformat()
-                    })
-        
-        return {
+        alerts, pagination = _paginate(snapshot.alerts(), offset, limit)
+        response = {
             "alerts": alerts,
-            "alert_count": len(alerts),
+            "alert_count": pagination["total"],
+            "pagination": pagination,
             "timestamp": datetime.now().isoformat()
         }
+        if "risks" in extras:
+            response["risks"] = snapshot.segment_risks()
+        if "maintenance" in extras:
+            response["prioritized_segments"] = snapshot.maintenance()
+        response["freshness"] = snapshot.freshness()
+        return FastJSONResponse(response)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch alerts: {str(e)}")
 
 
 @router.get("/api/maintenance/prioritization")
-async def get_maintenance_prioritization(db: Session = Depends(get_db)):
-    """Get grid segments sorted by outage risk for maintenance prioritization"""
+async def get_maintenance_prioritization(
+    region: Optional[str] = None,
+    q: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    session: AsyncSession = Depends(get_async_db)
+):
+    """Get grid segments sorted by outage risk for maintenance prioritization
+    
+    Priority ranks are global across the filtered segments; ``offset`` and
+    ``limit`` page the ranked list.
+    """
     try:
-        risks = ForecastingService.get_all_segment_risks(db)
-        
-        if not risks:
-            return {
-                "prioritized_segments": [],
-                "timestamp": datetime.now().isoformat()
-            }
-        
-        prioritized = []
-        for i, risk in enumerate(risks, 1):
-            prioritized.append({
-                "priority_rank": i,
-                "grid_segment": risk.get("grid_segment", "Unknown"),
-                "risk_score": risk.get("risk_score", 0),
-                "recommended_action": _get_recommended_action(risk.get("risk_score", 0)),
-                "factors": risk.get("factors", {})
-            })
-        
-        return {
+        snapshot = await AnalyticsSnapshot(
+            segments=_filtered_segments(region, q), window=AnalyticsSnapshot.RISK_WINDOW
+        ).load_async(session, risks_only=True)
+        prioritized, pagination = _paginate(snapshot.maintenance(), offset, limit)
+        return FastJSONResponse({
             "prioritized_segments": prioritized,
+            "pagination": pagination,
+            "freshness": snapshot.freshness(),
             "timestamp": datetime.now().isoformat()
-        }
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch maintenance prioritization: {str(e)}")
 
 
-def _get_recommended_action(risk_score: int) -> str:
-    """Get recommended maintenance action based on risk score"""
-    if risk_score >= 80:
-        return "Immediate inspection and preventive maintenance required"
-    elif risk_score >= 60:
-        return "Schedule maintenance within 48 hours"
-    elif risk_score >= 40:
-        return "Monitor closely, schedule maintenance within 1 week"
-    else:
-        return "Routine maintenance sufficient"
+DEFAULT_MAX_POINTS = 2000
+RAW_ROW_LIMIT = 10000
 
 
 @router.get("/api/historical/loads")
-async def get_historical_loads(
+def get_historical_loads(
     segment: Optional[str] = None,
     days: int = 7,
+    resolution: str = "auto",
+    max_points: Optional[int] = None,
+    anomalies: Optional[str] = None,
+    anomaly_window: int = AnomalyService.DEFAULT_WINDOW,
+    anomaly_threshold: Optional[float] = None,
     db: Session = Depends(get_db)
 ):
-    """Get historical load data for visualization"""
+    """Get historical load data for visualization
+    
+    ``resolution`` is ``raw``, ``hour``, ``day``, ``week`` or ``auto``. In auto
+    mode the finest resolution that fits in ``max_points`` is used; whenever the
+    chosen series still exceeds ``max_points`` it is LTTB-downsampled per segment.
+    At most ``RAW_ROW_LIMIT`` raw rows or rollup points are ever loaded: larger
+    ranges are truncated, or with ``max_points`` served from the finest coarser
+    rollup that fits.
+    
+    ``anomalies`` (``zscore`` or ``mad``) adds an overlay of every point whose
+    score against the previous ``anomaly_window`` points exceeds
+    ``anomaly_threshold``. Detection runs before downsampling, so anomalies
+    are reported even when LTTB drops the point from ``data``.
+    """
     try:
         validated_days = validate_days(days)
         validated_segment = validate_segment_name(segment) if segment else None
+        validated_resolution = validate_resolution(resolution)
+        validated_max_points = validate_max_points(max_points) if max_points is not None else None
+        anomaly_method = validate_anomaly_method(anomalies) if anomalies is not None else None
+        if anomaly_method:
+            validated_window = validate_anomaly_window(anomaly_window)
+            validated_threshold = (
+                validate_anomaly_threshold(anomaly_threshold) if anomaly_threshold is not None
+                else AnomalyService.DEFAULT_THRESHOLDS[anomaly_method]
+            )
         
         end_time = datetime.now()
         start_time = end_time - timedelta(days=validated_days)
         
+        if validated_segment and validated_segment not in segment_registry:
+            raise _segment_not_found(validated_segment)
+        
         query = db.query(GridLoad).filter(
             GridLoad.timestamp >= start_time
         )
-        
         if validated_segment:
-            from services.data_generator import DataGenerator
-            if validated_segment not in DataGenerator.GRID_SEGMENTS:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Segment '{validated_segment}' not found"
-                )
             query = query.filter(GridLoad.grid_segment == validated_segment)
         
-        loads = query.order_by(GridLoad.timestamp.asc()).limit(10000).all()  # Limit to prevent huge responses
+        raw_count = None
+        n_segments = 1 if validated_segment else len(segment_registry)
+        # Ranges reaching past the retention cutoffs only exist in coarser rollups
+        finest = retention_policy.finest_resolution(start_time, end_time)
+        if validated_resolution == "auto":
+            point_budget = validated_max_points or DEFAULT_MAX_POINTS
+            raw_count = query.with_entities(func.count(GridLoad.id)).scalar() or 0
+            validated_resolution = RollupService.choose_resolution(
+                end_time - start_time, n_segments, point_budget, raw_count, finest=finest
+            )
+            validated_max_points = point_budget
         
-        return {
-            "data": [
+        if validated_max_points:
+            # Points are downsampled in memory, so ranges holding more than
+            # RAW_ROW_LIMIT of them are served from a coarser rollup instead
+            if validated_resolution == "raw":
+                if raw_count is None:
+                    raw_count = query.with_entities(func.count(GridLoad.id)).scalar() or 0
+                too_many, coarser = raw_count > RAW_ROW_LIMIT, "hour" if finest == "raw" else finest
+            else:
+                points = RollupService.point_count(end_time - start_time, n_segments, validated_resolution)
+                too_many = points > RAW_ROW_LIMIT
+                coarser = validated_resolution
+            if too_many:
+                validated_resolution = RollupService.choose_resolution(
+                    end_time - start_time, n_segments, validated_max_points, raw_count or 0, finest=coarser
+                )
+        
+        truncated = False
+        if validated_resolution == "raw":
+            # Cap raw responses to prevent huge payloads and unbounded memory
+            loads = query.order_by(GridLoad.timestamp.asc()).limit(RAW_ROW_LIMIT + 1).all()
+            if len(loads) > RAW_ROW_LIMIT:
+                loads = loads[:RAW_ROW_LIMIT]
+                truncated = True
+            data = [
                 {
                     "timestamp": load.timestamp.isoformat() if load.timestamp else None,
                     "load_mw": float(load.load_mw) if load.load_mw is not None else 0.0,
@@ -246,34 +380,379 @@ async def get_historical_loads(
                     "grid_segment": load.grid_segment or "Unknown"
                 }
                 for load in loads
-            ],
+            ]
+        else:
+            data = RollupService.query(db, validated_resolution, start_time, validated_segment, limit=RAW_ROW_LIMIT + 1)
+            if len(data) > RAW_ROW_LIMIT:
+                data = data[:RAW_ROW_LIMIT]
+                truncated = True
+        
+        overlay = None
+        if anomaly_method:
+            if validated_resolution == "raw":
+                flagged = AnomalyService.detect_points(data, anomaly_method, validated_window, validated_threshold)
+            else:
+                series_segments = sorted({point["grid_segment"] for point in data})
+                flagged = AnomalyService.rollup_anomalies(
+                    db, validated_resolution, series_segments, start_time,
+                    anomaly_method, validated_window, validated_threshold
+                )
+            overlay = {
+                "method": anomaly_method,
+                "window": validated_window,
+                "threshold": validated_threshold,
+                "count": len(flagged),
+                "points": flagged
+            }
+        
+        downsampled = False
+        if validated_max_points and len(data) > validated_max_points:
+            data = _downsample(data, validated_max_points)
+            downsampled = True
+        
+        response = {
+            "data": data,
             "days": validated_days,
             "segment": validated_segment,
-            "count": len(loads)
+            "resolution": validated_resolution,
+            "downsampled": downsampled,
+            "truncated": truncated,
+            "count": len(data)
         }
+        if overlay is not None:
+            response["anomalies"] = overlay
+        return FastJSONResponse(response)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch historical loads: {str(e)}")
 
 
+def _downsample(data: List[Dict], max_points: int) -> List[Dict]:
+    """LTTB-downsample each segment's series so the total stays within max_points"""
+    by_segment: Dict[str, List[Dict]] = {}
+    for point in data:
+        by_segment.setdefault(point["grid_segment"], []).append(point)
+    
+    per_segment = max(3, max_points // len(by_segment))
+    sampled = []
+    for points in by_segment.values():
+        x = np.array([p["timestamp"] for p in points], dtype="datetime64[us]").astype(np.float64)
+        y = np.array([p["load_mw"] for p in points], dtype=np.float64)
+        sampled.extend(points[i] for i in lttb_indices(x, y, per_segment))
+    
+    sampled.sort(key=lambda p: p["timestamp"])
+    return sampled
+
+
+def _validated_history_filter(segment: Optional[str], days: int):
+    """Validate the segment/days filter shared by the export endpoints"""
+    validated_days = validate_days(days)
+    validated_segment = validate_segment_name(segment) if segment else None
+    if validated_segment and validated_segment not in segment_registry:
+        raise _segment_not_found(validated_segment)
+    return validated_segment, datetime.now() - timedelta(days=validated_days)
+
+
+@router.get("/api/historical/loads/export")
+async def export_historical_loads(
+    segment: Optional[str] = None,
+    days: int = 7,
+    format: str = "ndjson"
+):
+    """Stream every matching reading as NDJSON or CSV with constant memory"""
+    validated_segment, start_time = _validated_history_filter(segment, days)
+    fmt = format.strip().lower()
+    if fmt == "ndjson":
+        body, media_type = ndjson_lines(iter_rows(start_time, validated_segment)), "application/x-ndjson"
+    elif fmt == "csv":
+        body, media_type = csv_lines(iter_rows(start_time, validated_segment)), "text/csv"
+    else:
+        raise HTTPException(status_code=400, detail="Format must be 'ndjson' or 'csv'")
+    
+    filename = f"grid_loads.{fmt}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/api/historical/loads/page")
+def get_historical_loads_page(
+    segment: Optional[str] = None,
+    days: int = 7,
+    page_size: int = 1000,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Page through historical readings with opaque keyset continuation tokens"""
+    try:
+        validated_segment, start_time = _validated_history_filter(segment, days)
+        validated_page_size = validate_page_size(page_size)
+        
+        after = None
+        if cursor:
+            # The window is pinned by the first page so later pages stay consistent
+            start_time, after = decode_cursor(
+                cursor, validated_segment, datetime.now() - timedelta(days=MAX_DAYS)
+            )
+        
+        page = fetch_page(db, start_time, validated_segment, validated_page_size, after)
+        next_cursor = (
+            encode_cursor(page[-1], start_time, validated_segment)
+            if len(page) == validated_page_size else None
+        )
+        return {
+            "data": page,
+            "count": len(page),
+            "next_cursor": next_cursor
+        }
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch historical page: {str(e)}")
+
+
 @router.post("/api/admin/initialize-data")
-async def initialize_data(days: int = 30, db: Session = Depends(get_db)):
+def initialize_data(days: int = 30, seed: Optional[int] = None, db: Session = Depends(get_db)):
     """Initialize database with historical data (for first-time setup)"""
     try:
         validated_days = validate_days(days)
         
-        load_count = DataGenerator.generate_historical_loads(db, validated_days)
+        backfill = DataGenerator.backfill_historical_loads(db, validated_days, seed=seed)
         outage_count = DataGenerator.generate_recent_outages(db, count=5)
+        precompute_scheduler.trigger()
         
         return {
             "message": "Data initialized successfully",
-            "loads_generated": load_count,
+            "loads_generated": backfill["rows"],
             "outages_generated": outage_count,
-            "days": validated_days
+            "days": validated_days,
+            "rows_per_second": backfill["rows_per_second"]
         }
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to initialize data: {str(e)}")
 
+
+@router.get("/api/segments")
+async def get_segments(
+    region: Optional[str] = None,
+    q: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None
+):
+    """List registered grid segments with their metadata, filtered and paged"""
+    names, pagination = _paginate(_filtered_segments(region, q), offset, limit)
+    return FastJSONResponse({
+        "segments": [segment_registry.get(name).to_dict() for name in names],
+        "regions": segment_registry.regions,
+        "pagination": pagination
+    })
+
+
+MAX_SEGMENT_BATCH = 10000
+
+
+@router.post("/api/admin/segments")
+def register_segments(segments: List[Dict] = Body(...), db: Session = Depends(get_db)):
+    """Register new grid segments or update the metadata of existing ones in bulk
+    
+    The body is a JSON list of ``{"name", "region", "capacity_mw",
+    "base_load_min", "base_load_max"}`` objects; the base load range is
+    required for new segments.
+    """
+    validated = _validated_segment_specs(segments)
+    try:
+        result = segment_registry.register(db, validated)
+        precompute_scheduler.trigger()
+        return result
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to register segments: {str(e)}")
+
+
+def _validated_segment_specs(segments: List[Dict]) -> List[Dict]:
+    """Validate a segment registration batch, raising 400 on the first invalid entry"""
+    if not segments:
+        raise HTTPException(status_code=400, detail="At least one segment is required")
+    if len(segments) > MAX_SEGMENT_BATCH:
+        raise HTTPException(status_code=400, detail=f"Cannot register more than {MAX_SEGMENT_BATCH} segments at once")
+    
+    validated = {}
+    for index, spec in enumerate(segments):
+        name = validate_segment_name(spec.get("name")) if isinstance(spec.get("name"), str) else None
+        if not name:
+            raise HTTPException(status_code=400, detail=f"Segment {index}: name is required")
+        region = spec.get("region")
+        entry = {"name": name, "region": validate_segment_name(region) if region is not None else None}
+        for field in ("capacity_mw", "base_load_min", "base_load_max"):
+            value = spec.get(field)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0):
+                raise HTTPException(status_code=400, detail=f"Segment '{name}': {field} must be a non-negative number")
+            entry[field] = float(value) if value is not None else None
+        
+        if name not in segment_registry and (entry["base_load_min"] is None or entry["base_load_max"] is None):
+            raise HTTPException(status_code=400, detail=f"Segment '{name}': base_load_min and base_load_max are required")
+        low = entry["base_load_min"] if entry["base_load_min"] is not None else segment_registry.get(name).base_load_min
+        high = entry["base_load_max"] if entry["base_load_max"] is not None else segment_registry.get(name).base_load_max
+        if low > high:
+            raise HTTPException(status_code=400, detail=f"Segment '{name}': base_load_min cannot exceed base_load_max")
+        validated[name] = entry
+    return list(validated.values())
+
+
+@router.get("/api/admin/cache-stats")
+async def get_cache_stats():
+    """Hit/miss statistics of the forecast and risk result cache"""
+    return result_cache.stats()
+
+
+@router.get("/api/stream/dashboard")
+async def stream_dashboard():
+    """Server-sent events with live dashboard updates
+    
+    The first ``snapshot`` event carries every section (``current_load``,
+    ``forecast``, ``risks``, ``maintenance``, ``alerts`` and ``freshness``);
+    later ``delta`` events carry only the sections that changed. Updates are
+    computed once per tick for all subscribers. A client that falls too far
+    behind gets one ``snapshot`` instead of the backlog of deltas.
+    """
+    if not dashboard_broadcaster.enabled:
+        raise HTTPException(status_code=503, detail="Live updates are disabled")
+    try:
+        subscription = dashboard_broadcaster.subscribe()
+    except SubscriberLimitReached as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return StreamingResponse(
+        subscription.frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/api/admin/stream-status")
+async def get_stream_status():
+    """Subscribers, tick timings and dropped frames of the live dashboard stream"""
+    return dashboard_broadcaster.status()
+
+
+@router.get("/api/admin/precompute-status")
+async def get_precompute_status():
+    """State of the background forecast and risk precomputation"""
+    return precompute_scheduler.status()
+
+
+@router.get("/api/admin/retention-status")
+async def get_retention_status():
+    """Retention policy and the outcome of the last compaction run"""
+    return retention_job.status()
+
+
+@router.post("/api/admin/retention/run")
+def run_retention():
+    """Apply the retention policy now; returns rows deleted, reclaimed bytes and duration"""
+    try:
+        return retention_job.run_once()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to run retention: {str(e)}")
+
+
+@router.get("/api/admin/backtest")
+def run_backtest(
+    days: int = 14,
+    hours: int = 24,
+    step: int = 6,
+    engine: Optional[str] = None,
+    segment: Optional[str] = None,
+    region: Optional[str] = None,
+    horizons: Optional[str] = None,
+    parallel: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Rolling-origin backtest of the forecast engines over stored readings
+    
+    Forecasts are replayed every ``step`` hours over the last ``days`` days and
+    scored against the readings that followed: MAPE, RMSE and confidence
+    interval coverage per engine, per segment and per horizon (``horizons``,
+    comma-separated, default 1,6,12,24). Without ``engine`` every engine is
+    evaluated; ``parallel`` fits Holt-Winters windows on the process pool.
+    """
+    validated_days = validate_days(days)
+    validated_hours = validate_hours(hours)
+    validated_step = validate_step(step)
+    engines = [validate_engine(engine)] if engine is not None else None
+    validated_horizons = validate_horizons(horizons, validated_hours)
+    validated_segment = validate_segment_name(segment) if segment else None
+    if validated_segment is not None:
+        if validated_segment not in segment_registry:
+            raise _segment_not_found(validated_segment)
+        segments = [validated_segment]
+    else:
+        segments = _filtered_segments(region, None)
+
+    try:
+        return BacktestService.run(
+            db, segments, validated_days, validated_hours, validated_step, engines, validated_horizons, parallel
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/api/admin/risk-stats/verify")
+def verify_risk_stats(db: Session = Depends(get_db)):
+    """Compare streaming risk statistics against the batch computation"""
+    try:
+        return ForecastingService.verify_streaming_risks(db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to verify risk statistics: {str(e)}")
+
+
+INGEST_CONTENT_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv"
+}
+
+
+@router.post("/api/ingest/loads")
+async def ingest_loads(
+    request: Request,
+    format: Optional[str] = None,
+    chunk_size: int = 5000,
+    db: Session = Depends(get_db)
+):
+    """Stream NDJSON or CSV GridLoad readings into grid_loads in validated chunks"""
+    validated_chunk_size = validate_chunk_size(chunk_size)
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = (format or INGEST_CONTENT_TYPES.get(content_type, "")).lower()
+    if fmt not in LoadIngestor.SUPPORTED_FORMATS:
+        raise HTTPException(
+            status_code=415,
+            detail="Body must be NDJSON (application/x-ndjson) or CSV (text/csv), or pass ?format=ndjson|csv"
+        )
+    
+    ingestor = LoadIngestor(fmt, segment_registry.names, validated_chunk_size)
+    try:
+        # The next piece of the body is only read once the previous chunk is committed
+        async for data in request.stream():
+            for lines in ingestor.feed(data):
+                await run_in_threadpool(ingestor.ingest, db, lines)
+        for lines in ingestor.finish():
+            await run_in_threadpool(ingestor.ingest, db, lines)
+    except LineTooLong as e:
+        raise HTTPException(status_code=413, detail=f"{str(e)} (accepted before error: {ingestor.accepted})")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"{str(e)} (accepted before error: {ingestor.accepted})")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to ingest loads: {str(e)} (accepted before error: {ingestor.accepted})"
+        )
+    
+    return ingestor.summary()
@@ -0,0 +1,137 @@
+"""Cold start of the API: import time, time until /health answers and time until /ready.
+
+Seeds a temporary SQLite database once, then starts uvicorn ``--runs``
+times in fresh processes and polls both endpoints, reporting the median of
+each. The import of ``main`` is also timed with ``-X importtime``, listing
+the project modules that cost the most. Run from the backend directory:
+
+    python -m benchmarks.cold_start --runs 5 --days 7
+    python -m benchmarks.cold_start --json
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_PACKAGES = ("main", "api", "services", "models", "middleware", "utils")
+
+
+def seed_database(path: str, days: int, seed: int):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}")
+    script = (
+        "from models.database import SessionLocal, init_db\n"
+        "from services.data_generator import DataGenerator\n"
+        "from services.segment_registry import segment_registry\n"
+        "init_db()\n"
+        "db = SessionLocal()\n"
+        "segment_registry.load(db)\n"
+        f"DataGenerator.backfill_historical_loads(db, {days}, seed={seed})\n"
+        "db.close()\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, env=env, check=True, capture_output=True)
+
+
+def import_profile(env: Dict[str, str], top: int) -> Dict:
+    """Cumulative import time of ``main`` and its most expensive project modules, in milliseconds"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    modules = {}
+    for line in completed.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)", line)
+        if match and match.group(3).split(".")[0] in PROJECT_PACKAGES:
+            modules[match.group(3)] = int(match.group(1)) / 1000
+    heaviest = sorted((name for name in modules if name != "main"), key=modules.get, reverse=True)[:top]
+    return {"main_ms": modules.get("main"), "modules_ms": {name: modules[name] for name in heaviest}}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def status(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+
+def start_once(env: Dict[str, str], timeout: float) -> Dict:
+    """Seconds from process start until /health and /ready first return 200"""
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    timings = {}
+    try:
+        while len(timings) < 2 and time.perf_counter() - started < timeout:
+            for endpoint in ("health", "ready"):
+                if endpoint not in timings and status(f"http://127.0.0.1:{port}/{endpoint}") == 200:
+                    timings[endpoint] = time.perf_counter() - started
+            time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait()
+    if len(timings) < 2:
+        raise RuntimeError(f"Server did not become ready within {timeout}s")
+    return {"health_seconds": timings["health"], "ready_seconds": timings["ready"]}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--days", type=int, default=7, help="days of readings seeded into the database")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--top", type=int, default=10, help="project modules listed in the import profile")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="grid-cold-start-") as directory:
+        path = os.path.join(directory, "cold.db")
+        seed_database(path, args.days, args.seed)
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", PRECOMPUTE_ENABLED="false", RETENTION_ENABLED="false")
+        env.pop("ASYNC_DATABASE_URL", None)
+
+        profile = import_profile(env, args.top)
+        runs: List[Dict] = [start_once(env, args.timeout) for _ in range(args.runs)]
+
+    summary = {
+        "runs": args.runs,
+        "days": args.days,
+        "import": profile,
+        "health_seconds_p50": round(statistics.median(run["health_seconds"] for run in runs), 3),
+        "ready_seconds_p50": round(statistics.median(run["ready_seconds"] for run in runs), 3)
+    }
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"Cold start over {args.runs} runs ({args.days} days of readings)")
+        print(f"  import main      {profile['main_ms']:8.1f} ms")
+        for name, ms in profile["modules_ms"].items():
+            print(f"    {name:<30} {ms:8.1f} ms")
+        print(f"  /health p50      {summary['health_seconds_p50'] * 1000:8.1f} ms")
+        print(f"  /ready p50       {summary['ready_seconds_p50'] * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
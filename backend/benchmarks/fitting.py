@@ -0,0 +1,96 @@
+"""Holt-Winters fitting time across segments, serial vs the process-pool executor.
+
+Fits a synthetic hourly history matrix (segments x hours) once serially and
+once per worker count, checks every parallel result is identical to the
+serial one and reports the speedup. Run from the backend directory:
+
+    python -m benchmarks.fitting --segments 20000 --workers 1,2,4,8
+"""
+import argparse
+import json
+import os
+import time
+from typing import Dict, List
+import numpy as np
+from services.fitting import FittingExecutor
+from services.holt_winters import HoltWintersService
+
+
+def synthetic_history(segments: int, hours: int, seed: int) -> np.ndarray:
+    """Daily-seasonal loads with per-segment base, amplitude, trend and ~2% missing hours"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(hours)
+    base = rng.uniform(100, 800, (segments, 1))
+    amplitude = base * rng.uniform(0.1, 0.4, (segments, 1))
+    trend = rng.normal(0, 0.05, (segments, 1))
+    loads = base + amplitude * np.sin(2 * np.pi * (t - 6) / 24) + trend * t + rng.normal(0, 5, (segments, hours))
+    loads[rng.random((segments, hours)) < 0.02] = np.nan
+    return loads
+
+
+def same_states(a, b) -> bool:
+    return all(np.array_equal(x, y, equal_nan=x.dtype.kind == "f") for x, y in zip(a[0], b[0])) and np.array_equal(a[1], b[1])
+
+
+def timed(call, repeat: int) -> float:
+    """Best wall time of ``repeat`` calls"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", type=int, default=20000)
+    parser.add_argument("--hours", type=int, default=168)
+    parser.add_argument("--workers", default=",".join(str(n) for n in (1, 2, 4, 8) if n <= (os.cpu_count() or 1)) or "1")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--mode", choices=HoltWintersService.MODES, default="additive")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    matrix = synthetic_history(args.segments, args.hours, args.seed)
+    first_hour = np.datetime64("2026-01-01T00", "h")
+    fit_args = (first_hour, args.mode)
+
+    serial = HoltWintersService.fit(matrix, *fit_args)
+    serial_seconds = timed(lambda: HoltWintersService.fit(matrix, *fit_args), args.repeat)
+
+    results: List[Dict] = []
+    for workers in (int(n) for n in args.workers.split(",")):
+        executor = FittingExecutor(workers=workers, chunk_size=args.chunk_size)
+        try:
+            # Untimed call starts the worker processes
+            parallel = executor.fit(HoltWintersService.fit, matrix, *fit_args)
+            seconds = timed(lambda: executor.fit(HoltWintersService.fit, matrix, *fit_args), args.repeat)
+        finally:
+            executor.shutdown()
+        results.append({
+            "workers": workers,
+            "seconds": round(seconds, 4),
+            "speedup": round(serial_seconds / seconds, 2),
+            "identical": same_states(serial, parallel)
+        })
+
+    if args.json:
+        print(json.dumps({
+            "segments": args.segments, "hours": args.hours, "chunk_size": args.chunk_size, "mode": args.mode,
+            "cpu_count": os.cpu_count(), "serial_seconds": round(serial_seconds, 4), "results": results
+        }, indent=2))
+        return
+
+    print(f"Holt-Winters fit, {args.segments} segments x {args.hours} hours ({args.mode}), "
+          f"chunk size {args.chunk_size}, {os.cpu_count()} CPUs")
+    print(f"  {'serial':<12} {serial_seconds:>9.3f} s")
+    for result in results:
+        print(f"  {result['workers']:>2} workers   {result['seconds']:>9.3f} s  {result['speedup']:>5.2f}x"
+              f"  {'identical' if result['identical'] else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
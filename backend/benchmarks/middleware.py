@@ -0,0 +1,112 @@
+"""Requests/second of the security middleware stack, raw ASGI vs BaseHTTPMiddleware.
+
+Requests are driven straight through the ASGI callable (no sockets), so the
+numbers isolate middleware overhead. Run from the backend directory:
+
+    python -m benchmarks.middleware --requests 20000
+"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, Tuple
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from benchmarks.asgi import request
+from middleware import security
+from middleware.security import RateLimitMiddleware, SecurityHeadersMiddleware
+
+legacy_rate_limit_store: Dict[str, Tuple[int, float]] = defaultdict(lambda: (0, time.time()))
+
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation replaced by the raw ASGI one"""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        for name, value in security.SECURITY_HEADERS:
+            response.headers[name] = value
+        return response
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation replaced by the raw ASGI one"""
+
+    def __init__(self, app, requests_per_minute: int = 60):
+        super().__init__(app)
+        self.requests_per_minute = requests_per_minute
+        self.window_seconds = 60
+
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path == "/health":
+            return await call_next(request)
+
+        client_ip = request.client.host if request.client else "unknown"
+        current_time = time.time()
+        if current_time - legacy_rate_limit_store[client_ip][1] > self.window_seconds:
+            legacy_rate_limit_store[client_ip] = (0, current_time)
+        count, window_start = legacy_rate_limit_store[client_ip]
+        if current_time - window_start < self.window_seconds:
+            if count >= self.requests_per_minute:
+                return JSONResponse(status_code=429, content={"error": "Rate limit exceeded"})
+            legacy_rate_limit_store[client_ip] = (count + 1, window_start)
+        else:
+            legacy_rate_limit_store[client_ip] = (1, current_time)
+        return await call_next(request)
+
+
+def build_app(headers_cls, limiter_cls) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/json")
+    async def json_endpoint():
+        return {"status": "ok", "values": list(range(20))}
+
+    @app.get("/stream")
+    async def stream_endpoint():
+        async def chunks():
+            for _ in range(32):
+                yield b"x" * 1024
+
+        return StreamingResponse(chunks(), media_type="application/octet-stream")
+
+    if headers_cls is not None:
+        app.add_middleware(headers_cls)
+        # Limit high enough that the benchmark never trips it
+        app.add_middleware(limiter_cls, requests_per_minute=10 ** 9)
+    return app
+
+
+async def run(app, path: str, requests: int) -> float:
+    for _ in range(min(requests, 200)):
+        await request(app, path)
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        status, _ = await request(app, path)
+        assert status == 200, status
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    stacks = {
+        "no middleware": build_app(None, None),
+        "BaseHTTPMiddleware": build_app(LegacySecurityHeadersMiddleware, LegacyRateLimitMiddleware),
+        "raw ASGI": build_app(SecurityHeadersMiddleware, RateLimitMiddleware),
+    }
+    for path in ("/json", "/stream"):
+        results = {name: asyncio.run(run(app, path, args.requests)) for name, app in stacks.items()}
+        print(f"GET {path} ({args.requests} requests)")
+        for name, rate in results.items():
+            print(f"  {name:<20} {rate:>10.0f} req/s")
+        speedup = results["raw ASGI"] / results["BaseHTTPMiddleware"]
+        print(f"  raw ASGI vs BaseHTTPMiddleware: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Check that the hot grid_loads queries are planned on the (grid_segment, timestamp) index.
+
+Runs EXPLAIN (EXPLAIN QUERY PLAN on SQLite) for the history, risk, snapshot,
+current-load, Holt-Winters and export queries against the configured
+database, after applying the schema migration, and exits non-zero when a
+query reads grid_loads without the index. On PostgreSQL sequential scans are
+disabled for the check, so a small table still shows whether the index is
+usable. Run from the backend directory:
+
+    python -m benchmarks.query_plans
+    DATABASE_URL=postgresql://... python -m benchmarks.query_plans --json
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from sqlalchemy import select, text
+from models.database import GridLoad, SessionLocal, engine, init_db
+from services.forecasting import ForecastingService
+from services.snapshot import AnalyticsSnapshot
+
+INDEX_NAME = "ix_grid_loads_segment_timestamp"
+SEGMENTS = ["North Zone", "South Zone", "East Zone"]
+
+
+def hot_queries() -> List[Tuple[str, object]]:
+    """(name, statement) pairs built the same way the services build them"""
+    now = datetime.now()
+    return [
+        ("forecast history", ForecastingService._history_query(SEGMENTS, now - timedelta(days=7))),
+        ("risk window", ForecastingService._risk_query(SEGMENTS, now - timedelta(hours=24))),
+        ("dashboard snapshot", AnalyticsSnapshot(segments=SEGMENTS, now=now)._query()),
+        ("current loads", select(
+            GridLoad.grid_segment, GridLoad.load_mw, GridLoad.temperature, GridLoad.timestamp
+        ).where(
+            GridLoad.grid_segment.in_(SEGMENTS), GridLoad.timestamp >= now - timedelta(hours=1)
+        ).order_by(GridLoad.timestamp.asc())),
+        ("holt-winters fit window", select(GridLoad.grid_segment, GridLoad.timestamp, GridLoad.load_mw).where(
+            GridLoad.grid_segment.in_(SEGMENTS), GridLoad.timestamp >= now - timedelta(days=7)
+        )),
+        ("segment export page", select(
+            GridLoad.id, GridLoad.timestamp, GridLoad.grid_segment, GridLoad.load_mw, GridLoad.temperature
+        ).where(
+            GridLoad.timestamp >= now - timedelta(days=7), GridLoad.grid_segment == SEGMENTS[0]
+        ).order_by(GridLoad.timestamp.asc(), GridLoad.id.asc()).limit(5000)),
+    ]
+
+
+def explain(db, statement) -> List[str]:
+    compiled = statement.compile(bind=engine, compile_kwargs={"literal_binds": True})
+    if engine.dialect.name == "sqlite":
+        return [row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()]
+    return [row[0] for row in db.execute(text(f"EXPLAIN {compiled}")).all()]
+
+
+def uses_index(plan: List[str]) -> bool:
+    return any(INDEX_NAME in line for line in plan)
+
+
+def check() -> List[Dict]:
+    init_db()
+    db = SessionLocal()
+    try:
+        if engine.dialect.name == "postgresql":
+            db.execute(text("SET enable_seqscan = off"))
+        return [
+            {"query": name, "uses_index": uses_index(plan), "plan": plan}
+            for name, plan in ((name, explain(db, statement)) for name, statement in hot_queries())
+        ]
+    finally:
+        db.rollback()
+        db.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--json", action="store_true", help="print the plans as JSON")
+    args = parser.parse_args(argv)
+
+    results = check()
+    if args.json:
+        print(json.dumps({"dialect": engine.dialect.name, "index": INDEX_NAME, "results": results}, indent=2))
+    else:
+        print(f"Query plans on {engine.dialect.name} (expecting {INDEX_NAME})")
+        for result in results:
+            print(f"  {'ok  ' if result['uses_index'] else 'MISS'} {result['query']}")
+            for line in result["plan"]:
+                print(f"         {line}")
+    return 0 if all(result["uses_index"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+"""Benchmark suite for the forecasting services and dashboard endpoints.
+
+Each database size (segments x days) runs in its own worker process against
+a fresh SQLite file seeded by DataGenerator with a fixed seed, so results
+are reproducible and peak memory is not polluted by other sizes. Run from
+the backend directory:
+
+    python -m benchmarks.suite --sizes 7x7,7x30 --iterations 50 --output results.json
+    python -m benchmarks.suite --sizes 7x7,7x30 --baseline results.json
+
+Latencies are reported as p50/p95/p99 in milliseconds together with
+throughput (calls per second) and the peak traced Python allocation of one
+call. The result cache is disabled unless ``--with-cache`` is given, and the
+background precompute scheduler is always disabled, so the numbers measure
+computation rather than dictionary lookups.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_SIZES = "7x7,7x30"
+DEFAULT_SEED = 42
+REGRESSION_THRESHOLD = 0.25
+
+ENDPOINTS = (
+    "/api/dashboard/current-load",
+    "/api/dashboard/forecast?hours=24",
+    "/api/dashboard/forecast?segment={segment}&hours=24",
+    "/api/dashboard/outage-risks",
+    "/api/dashboard/alerts",
+    "/api/maintenance/prioritization",
+    "/api/historical/loads?days=7",
+)
+
+
+def parse_sizes(value: str) -> List[Tuple[int, int]]:
+    """Parse ``7x7,20x30`` into (segments, days) pairs"""
+    sizes = []
+    for item in value.split(","):
+        segments, _, days = item.strip().lower().partition("x")
+        if not (segments.isdigit() and days.isdigit()) or int(segments) < 1 or int(days) < 1:
+            raise argparse.ArgumentTypeError(f"Invalid size '{item.strip()}', expected SEGMENTSxDAYS")
+        sizes.append((int(segments), int(days)))
+    return sizes
+
+
+def summarize(name: str, durations: List[float], peak_bytes: int, **extra) -> Dict:
+    samples = np.array(durations) * 1000
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        "case": name,
+        "iterations": len(durations),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(float(samples.mean()), 3),
+        "throughput_per_s": round(len(durations) / sum(durations), 1) if sum(durations) > 0 else 0.0,
+        "peak_memory_kb": round(peak_bytes / 1024, 1),
+        **extra
+    }
+
+
+def measure(name: str, call: Callable, iterations: int, warmup: int = 2) -> Dict:
+    """Time ``iterations`` calls, then trace one more for peak memory"""
+    for _ in range(warmup):
+        call()
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        call()
+        durations.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return summarize(name, durations, peak)
+
+
+def configure_segments(db, count: int) -> List[str]:
+    """Register exactly ``count`` segments: the built-in ones first, then synthetic copies of them"""
+    from services.segment_registry import DEFAULT_SEGMENTS, segment_registry
+
+    specs = [
+        {**DEFAULT_SEGMENTS[i % len(DEFAULT_SEGMENTS)].to_dict(),
+         "name": DEFAULT_SEGMENTS[i].name if i < len(DEFAULT_SEGMENTS) else f"Synthetic Zone {i - len(DEFAULT_SEGMENTS) + 1}"}
+        for i in range(count)
+    ]
+    # Registering into the fresh database keeps the default seed from adding more
+    segment_registry.register(db, specs)
+    return segment_registry.names
+
+
+def run_worker(segments_count: int, days: int, iterations: int, seed: int) -> List[Dict]:
+    """Seed a fresh database and run every case; executed in a dedicated process"""
+    from models.database import SessionLocal, init_db
+    from services.data_generator import DataGenerator
+    from services.forecasting import ForecastingService
+    from services.result_cache import result_cache
+    from services.risk_stats import risk_stats
+    from services.timeseries_store import timeseries_store
+
+    size = {"size": f"{segments_count}x{days}", "segments": segments_count, "days": days}
+    results = []
+
+    init_db()
+    db = SessionLocal()
+    try:
+        segments = configure_segments(db, segments_count)
+        random.seed(seed)
+        np.random.seed(seed)
+        tracemalloc.start()
+        started = time.perf_counter()
+        rows = DataGenerator.generate_historical_loads(db, days=days)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results.append(summarize("service.generate_historical_loads", [elapsed], peak, rows=rows))
+
+        timeseries_store.warm(db)
+        risk_stats.warm(db)
+        segment = segments[0]
+        services = {
+            "service.forecast_demand": lambda: ForecastingService.forecast_demand(db, segment, 24),
+            "service.forecast_demand_batch": lambda: ForecastingService.forecast_demand_batch(db, segments, 24),
+            "service.forecast_demand_batch.holt_winters": lambda: ForecastingService.forecast_demand_batch(
+                db, segments, 24, engine="holt_winters"
+            ),
+            "service.calculate_outage_risk_score": lambda: ForecastingService.calculate_outage_risk_score(db, segment),
+            "service.get_all_segment_risks": lambda: ForecastingService.get_all_segment_risks(db),
+        }
+        for name, call in services.items():
+            results.append(measure(name, call, iterations))
+            db.rollback()
+    finally:
+        db.close()
+
+    results.extend(asyncio.run(_measure_endpoints(segments[0], iterations)))
+    return [{**size, **result, "result_cache": result_cache.enabled} for result in results]
+
+
+async def _measure_endpoints(segment: str, iterations: int) -> List[Dict]:
+    from urllib.parse import quote
+    from benchmarks.asgi import lifespan, request
+    from main import app
+
+    results = []
+    async with lifespan(app):
+        for template in ENDPOINTS:
+            path = template.format(segment=quote(segment))
+            durations = []
+            for i in range(iterations + 2):
+                started = time.perf_counter()
+                status, _ = await request(app, path)
+                if status != 200:
+                    raise RuntimeError(f"GET {path} returned {status}")
+                if i >= 2:
+                    durations.append(time.perf_counter() - started)
+
+            tracemalloc.start()
+            await request(app, path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results.append(summarize(f"endpoint.GET {template}", durations, peak, path=path))
+    return results
+
+
+def spawn_worker(segments: int, days: int, args: argparse.Namespace) -> List[Dict]:
+    """Run one size in a child process with its own database file"""
+    with tempfile.TemporaryDirectory(prefix="grid-bench-") as directory:
+        env = dict(os.environ)
+        env.update({
+            "DATABASE_URL": f"sqlite:///{os.path.join(directory, 'bench.db')}",
+            "RATE_LIMIT_PER_MINUTE": str(10 ** 9),
+            "RATE_LIMIT_BACKEND": "memory",
+            "RESULT_CACHE_ENABLED": "true" if args.with_cache else "false",
+            "PRECOMPUTE_ENABLED": "false",
+            "RETENTION_ENABLED": "false",
+            "WARMUP_ENABLED": "false",
+        })
+        env.pop("ASYNC_DATABASE_URL", None)
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.suite", "--worker", f"{segments}x{days}",
+             "--iterations", str(args.iterations), "--seed", str(args.seed)],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            env=env,
+            capture_output=True,
+            text=True
+        )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Benchmark worker for {segments}x{days} failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(results: List[Dict], baseline: Dict, threshold: float) -> List[Dict]:
+    """p50/p95 ratios against a baseline run; a ratio above 1 + threshold is a regression"""
+    previous = {(r["size"], r["case"]): r for r in baseline.get("results", [])}
+    comparisons = []
+    for result in results:
+        before = previous.get((result["size"], result["case"]))
+        if before is None:
+            continue
+        ratios = {
+            metric: round(result[metric] / before[metric], 3) if before[metric] else None
+            for metric in ("p50_ms", "p95_ms")
+        }
+        comparisons.append({
+            "size": result["size"],
+            "case": result["case"],
+            "baseline_p50_ms": before["p50_ms"],
+            "p50_ms": result["p50_ms"],
+            "p50_ratio": ratios["p50_ms"],
+            "p95_ratio": ratios["p95_ms"],
+            "regression": ratios["p50_ms"] is not None and ratios["p50_ms"] > 1 + threshold
+        })
+    return comparisons
+
+
+def print_report(results: List[Dict], comparisons: Optional[List[Dict]]):
+    ratios = {(c["size"], c["case"]): c for c in comparisons or []}
+    header = f"{'size':<8} {'case':<66} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>9} {'peak KB':>9}"
+    if comparisons is not None:
+        header += f" {'vs base':>8}"
+    print(header, file=sys.stderr)
+    for r in results:
+        line = (
+            f"{r['size']:<8} {r['case']:<66} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+            f"{r['p99_ms']:>9.2f} {r['throughput_per_s']:>9.1f} {r['peak_memory_kb']:>9.1f}"
+        )
+        comparison = ratios.get((r["size"], r["case"]))
+        if comparison and comparison["p50_ratio"] is not None:
+            line += f" {comparison['p50_ratio']:>7.2f}x" + (" REGRESSION" if comparison["regression"] else "")
+        print(line, file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark forecasting services and dashboard endpoints")
+    parser.add_argument("--sizes", type=parse_sizes, default=parse_sizes(DEFAULT_SIZES),
+                        help=f"comma-separated SEGMENTSxDAYS database sizes (default {DEFAULT_SIZES})")
+    parser.add_argument("--iterations", type=int, default=30, help="timed calls per case")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="DataGenerator seed")
+    parser.add_argument("--output", help="write the JSON results to this file (default: stdout)")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="p50 slowdown ratio above which a case counts as a regression")
+    parser.add_argument("--with-cache", action="store_true", help="leave the forecast/risk result cache enabled")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        (segments, days), = parse_sizes(args.worker)
+        print(json.dumps(run_worker(segments, days, args.iterations, args.seed)))
+        return 0
+
+    results = []
+    for segments, days in args.sizes:
+        print(f"Benchmarking {segments} segments x {days} days...", file=sys.stderr)
+        results.extend(spawn_worker(segments, days, args))
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "result_cache": args.with_cache
+        },
+        "results": results
+    }
+
+    comparisons = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            comparisons = compare(results, json.load(f), args.threshold)
+        report["comparison"] = {"threshold": args.threshold, "cases": comparisons}
+
+    print_report(results, comparisons)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    return 1 if comparisons and any(c["regression"] for c in comparisons) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
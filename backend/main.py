@@ -1,9 +1,21 @@
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from api.routes import router
-from models.database import init_db
+from models.database import init_db, SessionLocal
+from services.fitting import fitting_executor
+from services.live_updates import dashboard_broadcaster
+from services.precompute import precompute_scheduler
+from services.retention import retention_job
+from services.rollups import RollupService
+from services.segment_registry import segment_registry
+from services.warmup import warmup
 from middleware.security import SecurityHeadersMiddleware, RateLimitMiddleware
+from middleware.rate_limit import create_bucket_store, parse_route_limits
+from middleware.metrics import MetricsMiddleware
+from middleware.http_cache import CompressionMiddleware, ConditionalGetMiddleware
+from services.data_version import data_version
+from utils.metrics import registry as metrics_registry
 import os
 from dotenv import load_dotenv
 import logging
@@ -26,8 +38,26 @@ app = FastAPI(
 # Security headers middleware (must be first)
 app.add_middleware(SecurityHeadersMiddleware)
 
-# Rate limiting middleware
-app.add_middleware(RateLimitMiddleware, requests_per_minute=60)
+# ETag / 304 for dashboard, historical and segment reads, keyed by the data version
+app.add_middleware(ConditionalGetMiddleware, version=data_version)
+
+# Brotli (when installed) or gzip for complete responses above the size threshold
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+)
+
+# Rate limiting middleware (use the sqlite backend to share limits between workers)
+app.add_middleware(
+    RateLimitMiddleware,
+    requests_per_minute=int(os.getenv("RATE_LIMIT_PER_MINUTE", "60")),
+    route_limits=parse_route_limits(os.getenv("RATE_LIMIT_ROUTES", "/api/admin/initialize-data=5")),
+    store=create_bucket_store(
+        os.getenv("RATE_LIMIT_BACKEND", "memory"),
+        os.getenv("RATE_LIMIT_SQLITE_PATH"),
+        int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+    )
+)
 
 # CORS configuration - more restrictive
 cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:3000").split(",")
@@ -42,6 +72,9 @@ app.add_middleware(
     expose_headers=["X-Request-ID"],
 )
 
+# Request metrics (outermost, so rate-limited requests are counted too)
+app.add_middleware(MetricsMiddleware)
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -75,9 +108,65 @@ app.include_router(router)
 async def startup_event():
     init_db()
     print("Database initialized")
+    
+    db = SessionLocal()
+    try:
+        # Segment index used for validation and every all-segment computation
+        registered = segment_registry.load(db)
+        logger.info(f"Segment registry loaded with {registered} segments")
+        
+        # Databases created before rollups existed get them built once
+        rebuilt = RollupService.rebuild_if_missing(db)
+        if rebuilt:
+            logger.info(f"Built load rollups from {rebuilt} readings")
+        
+        # Recent per-segment history for the time-series store and streaming risk statistics
+        warmup.preload_history(db)
+        history = warmup.steps["history"]
+        logger.info(
+            f"Warm-up preloaded {history.get('timeseries_readings', 0)} readings "
+            f"and {history.get('risk_readings', 0)} risk readings"
+        )
+    finally:
+        db.close()
+    
+    # Touch the hot indexes and prime forecasts/risks in the background; /ready waits for it
+    warmup.start()
+    
+    # Periodically precompute forecasts and risk scores for every segment
+    precompute_scheduler.start()
+    
+    # Push dashboard updates to connected /api/stream/dashboard clients
+    dashboard_broadcaster.start()
+    
+    # Compact expired raw readings into the rollups and reclaim the space
+    retention_job.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await warmup.stop()
+    await retention_job.stop()
+    await dashboard_broadcaster.stop()
+    await precompute_scheduler.stop()
+    fitting_executor.shutdown()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text-format metrics for this worker process"""
+    return PlainTextResponse(metrics_registry.render(), media_type=metrics_registry.CONTENT_TYPE)
 
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "Grid Intelligence API"}
 
+
+@app.get("/ready")
+async def readiness_check():
+    """503 until the startup warm-up has finished, so load balancers hold traffic until then"""
+    if not warmup.ready:
+        return JSONResponse(status_code=503, content=warmup.status())
+    return warmup.status()
+
@@ -0,0 +1,167 @@
+import gzip
+from typing import Iterable, List, Optional, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from services.data_version import DataVersion
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only without the brotli package
+    brotli = None
+
+CONDITIONAL_PATHS = ("/api/dashboard/", "/api/maintenance/", "/api/historical/loads", "/api/segments")
+COMPRESSIBLE_TYPES = (b"application/json", b"application/x-ndjson", b"text/")
+
+
+class ConditionalGetMiddleware:
+    """ETag / If-None-Match handling for read endpoints whose output only changes with the data
+
+    The ETag is derived from the data version and the request path and query
+    string, computed from the ASGI scope before the application runs. A
+    matching ``If-None-Match`` is answered with 304 without invoking the
+    route, so an unchanged poll skips the queries and serialization
+    entirely. Taking the version before the route runs means data written
+    meanwhile always produces a new tag on the next request.
+    """
+
+    def __init__(self, app: ASGIApp, version: DataVersion, paths: Iterable[str] = CONDITIONAL_PATHS):
+        self.app = app
+        self.version = version
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("GET", "HEAD")
+            or not scope["path"].startswith(self.paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        etag = self.version.etag(scope["path"], scope.get("query_string", b"").decode("latin-1"))
+        encoded = etag.encode("latin-1")
+        if self._matches(scope, etag):
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [(b"etag", encoded), (b"cache-control", b"no-cache")]
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_etag(message: Message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                message["headers"] = [
+                    *message.get("headers", ()), (b"etag", encoded), (b"cache-control", b"no-cache")
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
+
+    @staticmethod
+    def _matches(scope: Scope, etag: str) -> bool:
+        for name, value in scope.get("headers", ()):
+            if name == b"if-none-match":
+                tags = [tag.strip() for tag in value.decode("latin-1").split(",")]
+                # Weak comparison: an ETag the client got back without the W/ prefix still matches
+                return "*" in tags or any(tag == etag or f"W/{tag}" == etag for tag in tags)
+        return False
+
+
+class CompressionMiddleware:
+    """Brotli/gzip compression of complete responses
+
+    Only single-message bodies of at least ``minimum_size`` bytes with a
+    compressible content type are compressed; streamed responses such as
+    the NDJSON/CSV exports pass through untouched so they keep their
+    constant memory and first-byte latency. Brotli is preferred when the
+    optional ``brotli`` package is installed and the client accepts it.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._negotiate(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                return
+
+            body = message.get("body", b"")
+            headers = list(start.get("headers", ()))
+            if message.get("more_body", False) or len(body) < self.minimum_size or not self._compressible(headers):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            compressed = self._compress(body, encoding)
+            headers = [(name, value) for name, value in headers if name.lower() not in (b"content-length", b"vary")]
+            headers.extend([
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", b"Accept-Encoding")
+            ])
+            start["headers"] = headers
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _accepted(scope: Scope) -> List[Tuple[str, float]]:
+        for name, value in scope.get("headers", ()):
+            if name == b"accept-encoding":
+                accepted = []
+                for part in value.decode("latin-1").split(","):
+                    coding, _, params = part.strip().partition(";")
+                    quality = 1.0
+                    if params.strip().startswith("q="):
+                        try:
+                            quality = float(params.strip()[2:])
+                        except ValueError:
+                            quality = 0.0
+                    accepted.append((coding.strip().lower(), quality))
+                return accepted
+        return []
+
+    def _negotiate(self, scope: Scope) -> Optional[str]:
+        accepted = {coding: quality for coding, quality in self._accepted(scope) if quality > 0}
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    @staticmethod
+    def _compressible(headers: List[Tuple[bytes, bytes]]) -> bool:
+        content_type = b""
+        for name, value in headers:
+            lowered = name.lower()
+            if lowered == b"content-encoding":
+                return False
+            if lowered == b"content-type":
+                content_type = value.lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
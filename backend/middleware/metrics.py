@@ -0,0 +1,57 @@
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils.metrics import (
+    RequestSqlStats,
+    current_request_sql,
+    http_request_duration_seconds,
+    http_request_sql_duration_seconds,
+    http_request_sql_queries,
+    http_requests_in_progress,
+    http_requests_total,
+    registry,
+)
+
+
+class MetricsMiddleware:
+    """Record latency, status, in-flight count and SQL usage of every HTTP request
+
+    Raw ASGI middleware meant to be the outermost layer, so rate-limited and
+    failed requests are counted too. Requests are labelled with the matched
+    route template (e.g. ``/api/dashboard/forecast``) rather than the raw path
+    to keep label cardinality bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        sql = RequestSqlStats()
+        token = current_request_sql.set(sql)
+        http_requests_in_progress.inc(method)
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request_sql.reset(token)
+            http_requests_in_progress.dec(method)
+
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            http_requests_total.inc(method, route_label, str(status))
+            http_request_duration_seconds.observe(elapsed, method, route_label)
+            http_request_sql_queries.observe(sql.queries, method, route_label)
+            http_request_sql_duration_seconds.observe(sql.seconds, method, route_label)
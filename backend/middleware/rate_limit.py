@@ -0,0 +1,155 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+class TokenBucketStore(ABC):
+    """Token buckets keyed by client (and route), refilled continuously.
+
+    A bucket holds up to ``capacity`` tokens and regains ``rate`` tokens per
+    second; each request takes one. Buckets that have refilled completely
+    carry no information and are dropped first, and the number of tracked
+    buckets never exceeds ``max_clients``. Stores whose ``take`` can wait on
+    I/O or another process set ``blocking`` so callers on an event loop run
+    it in a worker thread.
+    """
+
+    blocking = False
+
+    @abstractmethod
+    def take(self, key: str, capacity: float, rate: float, now: Optional[float] = None) -> Tuple[bool, float]:
+        """Try to take one token; returns (allowed, seconds until the next token)"""
+
+    @staticmethod
+    def _refill(state: Optional[Tuple[float, float]], capacity: float, rate: float, now: float) -> float:
+        if state is None:
+            return capacity
+        tokens, updated = state
+        return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+    @staticmethod
+    def _decide(tokens: float, rate: float) -> Tuple[bool, float, float]:
+        """(allowed, tokens left, retry-after seconds)"""
+        if tokens >= 1.0:
+            return True, tokens - 1.0, 0.0
+        return False, tokens, (1.0 - tokens) / rate if rate > 0 else 60.0
+
+
+class MemoryBucketStore(TokenBucketStore):
+    """Per-process bucket store with LRU eviction of idle clients"""
+
+    def __init__(self, max_clients: int = 10000):
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, rate: float, now: Optional[float] = None) -> Tuple[bool, float]:
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens = self._refill(self._buckets.get(key), capacity, rate, now)
+            allowed, tokens, retry_after = self._decide(tokens, rate)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_clients:
+                # Least recently seen first
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SqliteBucketStore(TokenBucketStore):
+    """Bucket store in a SQLite file shared by every worker process on the host.
+
+    Each decision is one short ``BEGIN IMMEDIATE`` transaction, so concurrent
+    workers serialize on the file lock and enforce a single limit. Idle
+    buckets are pruned every ``PRUNE_INTERVAL`` decisions.
+    """
+
+    PRUNE_INTERVAL = 1000
+    # BEGIN IMMEDIATE waits up to the connection timeout for other workers
+    blocking = True
+
+    def __init__(self, path: str, max_clients: int = 10000):
+        self.path = path
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._decisions = 0
+        self._connection = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_rate_limit_buckets_full_at ON rate_limit_buckets (full_at)"
+        )
+
+    def take(self, key: str, capacity: float, rate: float, now: Optional[float] = None) -> Tuple[bool, float]:
+        now = time.time() if now is None else now
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                row = cursor.execute(
+                    "SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens = self._refill(row, capacity, rate, now)
+                allowed, tokens, retry_after = self._decide(tokens, rate)
+                full_at = now + (capacity - tokens) / rate if rate > 0 else now
+                cursor.execute(
+                    "INSERT INTO rate_limit_buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, "
+                    "updated = excluded.updated, full_at = excluded.full_at",
+                    (key, tokens, now, full_at)
+                )
+                self._decisions += 1
+                if self._decisions % self.PRUNE_INTERVAL == 0:
+                    self._prune(cursor, now)
+                cursor.execute("COMMIT")
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+        return allowed, retry_after
+
+    def _prune(self, cursor: sqlite3.Cursor, now: float):
+        # Full buckets are indistinguishable from absent ones
+        cursor.execute("DELETE FROM rate_limit_buckets WHERE full_at <= ?", (now,))
+        cursor.execute(
+            "DELETE FROM rate_limit_buckets WHERE key IN ("
+            "SELECT key FROM rate_limit_buckets ORDER BY updated DESC LIMIT -1 OFFSET ?)",
+            (self.max_clients,)
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM rate_limit_buckets").fetchone()[0]
+
+
+def parse_route_limits(value: str) -> Dict[str, int]:
+    """Parse ``/path=limit,/other=limit`` into a path-prefix -> requests-per-minute map"""
+    limits = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        path, _, limit = item.partition("=")
+        if not path.strip() or not limit.strip().isdigit():
+            raise ValueError(f"Invalid rate limit route entry '{item.strip()}', expected /path=requests_per_minute")
+        limits[path.strip()] = int(limit)
+    return limits
+
+
+def create_bucket_store(backend: str = "memory", path: Optional[str] = None, max_clients: int = 10000) -> TokenBucketStore:
+    """Bucket store for ``backend`` ("memory" for one process, "sqlite" to share across workers)"""
+    if backend == "memory":
+        return MemoryBucketStore(max_clients)
+    if backend == "sqlite":
+        return SqliteBucketStore(path or os.path.join(tempfile.gettempdir(), "grid_rate_limits.db"), max_clients)
+    raise ValueError(f"Unsupported rate limit backend '{backend}'")
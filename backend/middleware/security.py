@@ -1,64 +1,122 @@
-from fastapi import Request, Response
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-import time
-from collections import defaultdict
-from typing import Dict, Tuple
-
-# Rate limiting storage (in-memory, for production use Redis)
-rate_limit_store: Dict[str, Tuple[int, float]] = defaultdict(lambda: (0, time.time()))
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Add security headers to all responses"""
-    
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        
-        # Security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Content-Security-Policy"] = "default-src 'self'"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        
-        return response
-
-
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Simple rate limiting middleware"""
-    
-    def __init__(self, app, requests_per_minute: int = 60):
-        super().__init__(app)
+import json
+import math
+from typing import Dict, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from middleware.rate_limit import MemoryBucketStore, TokenBucketStore
+from utils.metrics import rate_limit_rejections_total
+
+SECURITY_HEADERS = (
+    ("X-Content-Type-Options", "nosniff"),
+    ("X-Frame-Options", "DENY"),
+    ("X-XSS-Protection", "1; mode=block"),
+    ("Strict-Transport-Security", "max-age=31536000; includeSubDomains"),
+    ("Content-Security-Policy", "default-src 'self'"),
+    ("Referrer-Policy", "strict-origin-when-cross-origin"),
+)
+
+
+class SecurityHeadersMiddleware:
+    """Add security headers to all responses
+
+    Raw ASGI middleware: the header bytes are encoded once and appended to
+    the ``http.response.start`` message, so the response body (including
+    streamed bodies) passes through untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in SECURITY_HEADERS]
+        self.header_names = {name for name, _ in self.headers}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                if any(name.lower() in self.header_names for name, _ in headers):
+                    # The security headers replace values set by the route
+                    headers = [(name, value) for name, value in headers if name.lower() not in self.header_names]
+                headers.extend(self.headers)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class RateLimitMiddleware:
+    """Token-bucket rate limiting middleware
+
+    Each client gets a bucket of ``requests_per_minute`` tokens refilled
+    continuously; paths starting with a prefix in ``route_limits`` get their
+    own bucket with that limit instead. Buckets live in ``store``, a bounded
+    in-process store by default or a SQLite file shared by all workers.
+    The decision is made from the ASGI scope before the application is
+    invoked; rejected requests get a pre-encoded 429 response.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        requests_per_minute: int = 60,
+        route_limits: Optional[Dict[str, int]] = None,
+        store: Optional[TokenBucketStore] = None
+    ):
+        self.app = app
         self.requests_per_minute = requests_per_minute
-        self.window_seconds = 60
-    
-    async def dispatch(self, request: Request, call_next):
-        # Skip rate limiting for health checks
-        if request.url.path == "/health":
-            return await call_next(request)
-        
-        client_ip = request.client.host if request.client else "unknown"
-        current_time = time.time()
-        
-        # Clean old entries
-        if current_time - rate_limit_store[client_ip][1] > self.window_seconds:
-            rate_limit_store[client_ip] = (0, current_time)
-        
-        count, window_start = rate_limit_store[client_ip]
-        
-        if current_time - window_start < self.window_seconds:
-            if count >= self.requests_per_minute:
-                return JSONResponse(
-                    status_code=429,
-                    content={
-                        "error": "Rate limit exceeded",
-                        "message": f"Too many requests. Limit: {self.requests_per_minute} per minute."
-                    }
-                )
-            rate_limit_store[client_ip] = (count + 1, window_start)
+        # Longest prefix first so the most specific limit wins
+        self.route_limits = sorted((route_limits or {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self.store = store or MemoryBucketStore()
+        self._rejection_bodies: Dict[int, bytes] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # Skip rate limiting for health and readiness checks
+        if scope["type"] != "http" or scope["path"] in ("/health", "/ready"):
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        route, limit = self.limit_for(scope["path"])
+        key = f"{route}|{client_ip}"
+        if self.store.blocking:
+            # Keeps the event loop free while another worker holds the store's lock
+            allowed, retry_after = await run_in_threadpool(self.store.take, key, limit, limit / 60.0)
         else:
-            rate_limit_store[client_ip] = (1, current_time)
-        
-        return await call_next(request)
+            allowed, retry_after = self.store.take(key, limit, limit / 60.0)
+        if not allowed:
+            rate_limit_rejections_total.inc(route)
+            body = self._rejection_body(limit)
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(max(1, math.ceil(retry_after))).encode())
+                ]
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        await self.app(scope, receive, send)
+
+    def limit_for(self, path: str) -> Tuple[str, int]:
+        """(bucket route, requests per minute) for a request path"""
+        for prefix, limit in self.route_limits:
+            if path.startswith(prefix):
+                return prefix, limit
+        return "*", self.requests_per_minute
 
+    def _rejection_body(self, limit: int) -> bytes:
+        body = self._rejection_bodies.get(limit)
+        if body is None:
+            body = json.dumps({
+                "error": "Rate limit exceeded",
+                "message": f"Too many requests. Limit: {limit} per minute."
+            }).encode()
+            self._rejection_bodies[limit] = body
+        return body
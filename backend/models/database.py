@@ -1,26 +1,133 @@
-from sqlalchemy import create_engine, Column, Integer, Float, String, DateTime
+from sqlalchemy import create_engine, event, inspect, text, Boolean, Column, Index, Integer, Float, JSON, String, DateTime, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import logging
 import os
+import time
+from typing import Dict, List
 from dotenv import load_dotenv
+from utils.metrics import current_request_sql, registry, sql_queries_total, sql_query_duration_seconds
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./grid_intelligence.db")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {})
+# Applied to every new SQLite connection. WAL lets readers proceed while a
+# writer commits, and synchronous=NORMAL is durable in WAL mode except for
+# the last transactions before a power loss.
+SQLITE_PRAGMAS = {
+    # Must precede journal_mode: only takes effect before the first table is created
+    "auto_vacuum": os.getenv("SQLITE_AUTO_VACUUM", "INCREMENTAL"),
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),  # negative = KiB, i.e. 64 MiB
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "temp_store": "MEMORY",
+}
+
+
+def engine_options(url: str) -> Dict:
+    """create_engine keyword arguments for a database URL
+
+    SQLite gets its thread-sharing flag; server databases get a connection
+    pool sized from the environment.
+    """
+    if url.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False}} if "+aiosqlite" not in url else {}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    }
+
+
+def configure_sqlite(sync_engine):
+    """Apply SQLITE_PRAGMAS to every connection the engine opens"""
+    if sync_engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in SQLITE_PRAGMAS.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+configure_sqlite(engine)
+
+
+def instrument_engine(sync_engine):
+    """Count and time every statement, globally and for the HTTP request that issued it"""
+    if not registry.enabled:
+        return
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        kind = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        sql_queries_total.inc(kind)
+        sql_query_duration_seconds.observe(elapsed, kind)
+        request_sql = current_request_sql.get()
+        if request_sql is not None:
+            request_sql.queries += 1
+            request_sql.seconds += elapsed
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+        if started:
+            started.pop()
+
+
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async drivers for the non-blocking data access path (asyncpg must be installed for Postgres)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg"
+}
+
+
+def _async_database_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+")[0]
+    return f"{ASYNC_DRIVERS.get(dialect, scheme)}{sep}{rest}"
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_database_url(DATABASE_URL))
+
+_async_engine = None
+_async_sessionmaker = None
+
 
 class GridLoad(Base):
     __tablename__ = "grid_loads"
+    __table_args__ = (
+        # Hot queries select segments over a time range ordered by time; load_mw makes most of them index-only
+        Index("ix_grid_loads_segment_timestamp", "grid_segment", "timestamp", "load_mw"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime, index=True)
     load_mw = Column(Float)
     temperature = Column(Float)
-    grid_segment = Column(String, index=True)
+    grid_segment = Column(String)
     created_at = Column(DateTime)
 
 
@@ -45,11 +152,103 @@ class Forecast(Base):
     confidence_interval_lower = Column(Float)
     confidence_interval_upper = Column(Float)
     grid_segment = Column(String, index=True)
+    created_at = Column(DateTime, index=True)
+
+
+class RiskSnapshot(Base):
+    __tablename__ = "risk_snapshots"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    computed_at = Column(DateTime, index=True)
+    grid_segment = Column(String, index=True)
+    risk_score = Column(Integer)
+    load_variability = Column(Float)
+    anomaly_detected = Column(Boolean)
+    load_level = Column(Float)
+    current_load_mw = Column(Float)
+    avg_load_mw = Column(Float)
+
+
+class HoltWintersState(Base):
+    __tablename__ = "holt_winters_states"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    grid_segment = Column(String, unique=True, nullable=False, index=True)
+    seasonal_mode = Column(String, nullable=False)
+    level = Column(Float, nullable=False)
+    trend = Column(Float, nullable=False)
+    seasonal = Column(JSON, nullable=False)
+    residual_sse = Column(Float, nullable=False)
+    residual_count = Column(Integer, nullable=False)
+    last_hour = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime)
+
+
+class GridSegment(Base):
+    __tablename__ = "grid_segments"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, nullable=False, index=True)
+    region = Column(String, index=True)
+    capacity_mw = Column(Float)
+    base_load_min = Column(Float, nullable=False)
+    base_load_max = Column(Float, nullable=False)
     created_at = Column(DateTime)
 
 
+class GridLoadRollup(Base):
+    __tablename__ = "grid_load_rollups"
+    __table_args__ = (
+        UniqueConstraint("resolution", "grid_segment", "bucket_start", name="uq_rollup_bucket"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    resolution = Column(String, nullable=False)
+    grid_segment = Column(String, nullable=False)
+    bucket_start = Column(DateTime, nullable=False)
+    load_min = Column(Float)
+    load_max = Column(Float)
+    load_sum = Column(Float)
+    load_count = Column(Integer)
+    temperature_sum = Column(Float)
+    temperature_count = Column(Integer)
+
+
+# Indexes superseded by a composite index; dropped from existing databases
+OBSOLETE_INDEXES = {
+    "grid_loads": ("ix_grid_loads_grid_segment",),
+}
+
+
+def migrate_db(bind=engine) -> List[str]:
+    """Bring the indexes of existing tables in line with the models; returns the changes made
+
+    ``create_all`` only creates missing tables, so indexes added to a model
+    later are created here, and indexes they supersede are dropped.
+    """
+    changes = []
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind)
+                changes.append(f"created index {index.name}")
+        for name in OBSOLETE_INDEXES.get(table.name, ()):
+            if name in existing:
+                with bind.begin() as connection:
+                    connection.execute(text(f"DROP INDEX {name}"))
+                changes.append(f"dropped index {name}")
+    for change in changes:
+        logger.info(f"Schema migration: {change}")
+    return changes
+
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+    migrate_db(engine)
 
 
 def get_db():
@@ -59,3 +258,20 @@ def get_db():
     finally:
         db.close()
 
+
+
+def get_async_sessionmaker():
+    """Lazily create the async engine so the driver is only imported when used"""
+    global _async_engine, _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        _async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+        configure_sqlite(_async_engine.sync_engine)
+        instrument_engine(_async_engine.sync_engine)
+        _async_sessionmaker = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_sessionmaker
+
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as session:
+        yield session
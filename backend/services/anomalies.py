@@ -0,0 +1,154 @@
+from datetime import datetime
+from typing import Dict, List
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models.database import GridLoadRollup
+from services.result_cache import result_cache
+from services.rollups import RollupService
+from services.segment_registry import segment_filter
+
+
+class AnomalyService:
+    """Rolling z-score / MAD outlier detection over whole load series.
+
+    Each point is scored against the ``window`` points before it, so one pass
+    flags every anomaly in a range instead of re-running
+    ``ForecastingService.detect_anomaly`` once per point. The first
+    ``window`` points of a series have no score. Z-scores come from
+    cumulative sums (O(n)); MAD scores take rolling medians over strided
+    windows (O(n * window)) and are robust to the outliers they look for.
+    """
+
+    METHODS = ("zscore", "mad")
+    DEFAULT_THRESHOLDS = {"zscore": 2.5, "mad": 3.5}
+    DEFAULT_WINDOW = 24
+    # 0.6745 = z of the upper quartile: makes MAD scores comparable to z-scores for normal data
+    MAD_SCALE = 0.6745
+    MAD_CHUNK_ROWS = 65536
+
+    @staticmethod
+    def rolling_scores(values: np.ndarray, window: int, method: str = "zscore") -> np.ndarray:
+        """Signed score of every point against its trailing window (NaN for the first ``window`` points)"""
+        values = np.asarray(values, dtype=np.float64)
+        n = len(values)
+        scores = np.full(n, np.nan)
+        if n <= window:
+            return scores
+
+        if method == "mad":
+            windows = sliding_window_view(values[:-1], window)
+            for start in range(0, len(windows), AnomalyService.MAD_CHUNK_ROWS):
+                chunk = windows[start:start + AnomalyService.MAD_CHUNK_ROWS]
+                median = np.median(chunk, axis=1)
+                mad = np.median(np.abs(chunk - median[:, None]), axis=1)
+                current = values[window + start:window + start + len(chunk)]
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    scores[window + start:window + start + len(chunk)] = np.where(
+                        mad > 0, AnomalyService.MAD_SCALE * (current - median) / mad, 0.0
+                    )
+            return scores
+
+        # Centring first keeps the running sum of squares well conditioned
+        centred = values - values.mean()
+        sums = np.concatenate(([0.0], np.cumsum(centred)))
+        squares = np.concatenate(([0.0], np.cumsum(centred ** 2)))
+        mean = (sums[window:-1] - sums[:-window - 1]) / window
+        variance = np.maximum((squares[window:-1] - squares[:-window - 1]) / window - mean ** 2, 0.0)
+        std = np.sqrt(variance)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores[window:] = np.where(std > 1e-9, (centred[window:] - mean) / std, 0.0)
+        return scores
+
+    @staticmethod
+    def detect_points(points: List[Dict], method: str, window: int, threshold: float) -> List[Dict]:
+        """Anomalous points of a time-ordered list of ``{timestamp, grid_segment, load_mw}`` dicts, per segment"""
+        by_segment: Dict[str, List[Dict]] = {}
+        for point in points:
+            by_segment.setdefault(point["grid_segment"], []).append(point)
+
+        anomalies = []
+        for segment, series in by_segment.items():
+            scores = AnomalyService.rolling_scores(
+                np.fromiter((p["load_mw"] for p in series), dtype=np.float64, count=len(series)), window, method
+            )
+            anomalies.extend(
+                AnomalyService._anomaly(series[i]["timestamp"], segment, series[i]["load_mw"], scores[i])
+                for i in AnomalyService._flagged(scores, threshold)
+            )
+        anomalies.sort(key=lambda a: a["timestamp"])
+        return anomalies
+
+    @staticmethod
+    def rollup_anomalies(
+        db: Session,
+        resolution: str,
+        segments: List[str],
+        start_time: datetime,
+        method: str,
+        window: int,
+        threshold: float
+    ) -> List[Dict]:
+        """Anomalies of the rollup series since ``start_time``, scored over each segment's full rollup history.
+
+        Scores are cached per (rollup resolution, segment) in the result cache,
+        so they are invalidated together with the rollups whenever readings
+        for a segment are written.
+        """
+        kind = ("anomalies", resolution, method, window, threshold)
+        hits, missing, watermarks = result_cache.lookup(kind, segments, 0)
+        if missing:
+            computed = AnomalyService._score_rollups(db, resolution, missing, method, window, threshold)
+            result_cache.store(kind, 0, computed, watermarks)
+            hits.update(computed)
+
+        start = RollupService.bucket_starts(
+            np.array([start_time], dtype="datetime64[us]"), resolution
+        )[0].astype(datetime).isoformat()
+        anomalies = [a for segment in segments for a in hits[segment] if a["timestamp"] >= start]
+        anomalies.sort(key=lambda a: a["timestamp"])
+        return anomalies
+
+    @staticmethod
+    def _score_rollups(
+        db: Session,
+        resolution: str,
+        segments: List[str],
+        method: str,
+        window: int,
+        threshold: float
+    ) -> Dict[str, List[Dict]]:
+        rows = db.execute(
+            select(GridLoadRollup.grid_segment, GridLoadRollup.bucket_start, GridLoadRollup.load_sum, GridLoadRollup.load_count)
+            .where(GridLoadRollup.resolution == resolution, segment_filter(GridLoadRollup.grid_segment, segments))
+            .order_by(GridLoadRollup.grid_segment, GridLoadRollup.bucket_start)
+        ).all()
+
+        series: Dict[str, List] = {segment: [] for segment in segments}
+        for segment, bucket_start, load_sum, load_count in rows:
+            if segment in series:
+                series[segment].append((bucket_start, round(load_sum / load_count, 2) if load_count else 0.0))
+
+        results = {}
+        for segment, points in series.items():
+            scores = AnomalyService.rolling_scores(np.array([p[1] for p in points], dtype=np.float64), window, method)
+            results[segment] = [
+                AnomalyService._anomaly(points[i][0].isoformat(), segment, points[i][1], scores[i])
+                for i in AnomalyService._flagged(scores, threshold)
+            ]
+        return results
+
+    @staticmethod
+    def _flagged(scores: np.ndarray, threshold: float) -> np.ndarray:
+        with np.errstate(invalid="ignore"):
+            return np.flatnonzero(np.abs(scores) > threshold)
+
+    @staticmethod
+    def _anomaly(timestamp, segment: str, load_mw: float, score: float) -> Dict:
+        return {
+            "timestamp": timestamp,
+            "grid_segment": segment,
+            "load_mw": load_mw,
+            "score": round(float(score), 2)
+        }
@@ -0,0 +1,289 @@
+"""Rolling-origin backtests of the forecast engines against stored grid_loads.
+
+Also usable from the command line (run from the backend directory):
+
+    python -m services.backtesting --days 14 --hours 24 --step 6
+    python -m services.backtesting --engines holt_winters --horizons 1,24 --parallel --json
+"""
+import json
+import math
+import sys
+import warnings
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models.database import GridLoad
+from services.fitting import fitting_executor
+from services.forecasting import ForecastingService
+from services.holt_winters import HoltWintersService
+from services.segment_registry import segment_filter, segment_registry
+
+
+class BacktestService:
+    """Replay hourly history with rolling forecast origins and score every engine.
+
+    At each origin an engine sees the previous ``HISTORY_HOURS`` clock hours,
+    the same 7-day window the live forecast uses, and forecasts ``hours``
+    ahead; the forecasts are scored against the readings that followed.
+    Origins ``step`` hours apart share no state. Origins with the same hour
+    of day see identical seasonal positions, so each such group is forecast
+    for all segments in one batch of (segment, origin) rows. Moving average
+    forecasts are scored without jitter.
+    """
+
+    HISTORY_HOURS = 168
+    DEFAULT_HORIZONS = (1, 6, 12, 24)
+
+    @staticmethod
+    def load_history(db: Session, segments: List[str], days: int) -> Tuple[np.ndarray, Optional[np.datetime64]]:
+        """Hourly (segments x hours) load matrix of the last ``days`` days with one query"""
+        start_time = datetime.now() - timedelta(days=days)
+        rows = db.execute(
+            select(GridLoad.grid_segment, GridLoad.timestamp, GridLoad.load_mw).where(
+                segment_filter(GridLoad.grid_segment, segments),
+                GridLoad.timestamp >= start_time
+            )
+        ).all()
+        return HoltWintersService.hourly_matrix(rows, segments)
+
+    @staticmethod
+    def _moving_average(windows: np.ndarray, timestamps: List[datetime]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        counts = (~np.isnan(windows)).sum(axis=1)
+        predicted, lower, upper, _ = ForecastingService.forecast_arrays(windows, counts, timestamps, jitter=False)
+        return predicted, lower, upper
+
+    @staticmethod
+    def _holt_winters(
+        windows: np.ndarray,
+        first_hour: np.datetime64,
+        timestamps: List[datetime],
+        parallel: bool
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        mode = HoltWintersService.mode
+        if parallel:
+            states, fitted = fitting_executor.fit(HoltWintersService.fit, windows, first_hour, mode)
+        else:
+            states, fitted = HoltWintersService.fit(windows, first_hour, mode)
+        predicted, lower, upper = HoltWintersService.predict(states, timestamps, mode)
+        if not fitted.all():
+            # Same fallback as the live engine for rows with too little history
+            fallback = BacktestService._moving_average(windows[~fitted], timestamps)
+            for result, values in zip((predicted, lower, upper), fallback):
+                result[~fitted] = values
+        return predicted, lower, upper
+
+    @staticmethod
+    def origins(width: int, hours: int, step: int) -> np.ndarray:
+        """Column indices of the first forecast hour of every origin that has full history and actuals"""
+        return np.arange(BacktestService.HISTORY_HOURS, width - hours + 1, step)
+
+    @staticmethod
+    def evaluate(
+        matrix: np.ndarray,
+        first_hour: np.datetime64,
+        hours: int,
+        step: int,
+        engine: str,
+        parallel: bool = False
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Predicted, lower, upper and actual loads, each (segments x origins x horizon)"""
+        history = BacktestService.HISTORY_HOURS
+        origins = BacktestService.origins(matrix.shape[1], hours, step)
+        n = matrix.shape[0]
+        shape = (n, len(origins), hours)
+        predicted, lower, upper = np.full(shape, np.nan), np.full(shape, np.nan), np.full(shape, np.nan)
+        windows = sliding_window_view(matrix, history, axis=1)
+        actual = sliding_window_view(matrix, hours, axis=1)[:, origins]
+
+        for hour_of_day in np.unique(origins % 24):
+            group = np.flatnonzero(origins % 24 == hour_of_day)
+            batch = windows[:, origins[group] - history].reshape(-1, history)
+            # Every origin in the group is a whole number of days from the first one
+            window_start = first_hour + int(origins[group[0]]) - history
+            origin_time = (first_hour + int(origins[group[0]]) - 1).astype("datetime64[us]").astype(datetime)
+            timestamps = [origin_time + timedelta(hours=i + 1) for i in range(hours)]
+
+            if engine == "holt_winters":
+                results = BacktestService._holt_winters(batch, window_start, timestamps, parallel)
+            else:
+                results = BacktestService._moving_average(batch, timestamps)
+            for target, values in zip((predicted, lower, upper), results):
+                target[:, group] = values.reshape(n, len(group), hours)
+        return predicted, lower, upper, np.array(actual)
+
+    @staticmethod
+    def score(
+        predicted: np.ndarray,
+        lower: np.ndarray,
+        upper: np.ndarray,
+        actual: np.ndarray,
+        axis
+    ) -> Dict[str, np.ndarray]:
+        """MAPE (%), RMSE (MW), interval coverage and sample count, reduced over ``axis``"""
+        valid = ~np.isnan(actual)
+        errors = np.where(valid, predicted - actual, np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+            # Cells without any actual reading reduce to NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            pct = np.where(valid & (actual != 0), np.abs(errors) / np.abs(actual), np.nan)
+            covered = np.where(valid, (actual >= lower) & (actual <= upper), np.nan)
+            return {
+                "mape": 100 * np.nanmean(pct, axis=axis),
+                "rmse": np.sqrt(np.nanmean(errors ** 2, axis=axis)),
+                "coverage": np.nanmean(covered, axis=axis),
+                "samples": valid.sum(axis=axis)
+            }
+
+    @staticmethod
+    def _metrics(scores: Dict[str, np.ndarray], index=()) -> Dict:
+        def value(name: str, digits: int):
+            number = float(scores[name][index])
+            return None if math.isnan(number) else round(number, digits)
+        return {
+            "mape": value("mape", 2),
+            "rmse": value("rmse", 2),
+            "coverage": value("coverage", 3),
+            "samples": int(scores["samples"][index])
+        }
+
+    @staticmethod
+    def report(
+        segments: List[str],
+        first_hour: np.datetime64,
+        origins: np.ndarray,
+        results: Tuple[np.ndarray, ...],
+        horizons: List[int]
+    ) -> Dict:
+        """Overall, per-horizon and per-segment accuracy of one engine"""
+        overall = BacktestService.score(*results, axis=None)
+        by_horizon = BacktestService.score(*results, axis=(0, 1))
+        by_segment = BacktestService.score(*results, axis=(1, 2))
+        by_segment_horizon = BacktestService.score(*results, axis=1)
+
+        def origin_time(column: int) -> str:
+            return (first_hour + int(column)).astype("datetime64[us]").astype(datetime).isoformat()
+
+        return {
+            "origins": len(origins),
+            "first_origin": origin_time(origins[0]),
+            "last_origin": origin_time(origins[-1]),
+            "overall": BacktestService._metrics(overall),
+            "by_horizon": [
+                {"horizon": h, **BacktestService._metrics(by_horizon, h - 1)} for h in horizons
+            ],
+            "segments": {
+                segment: {
+                    **BacktestService._metrics(by_segment, i),
+                    "by_horizon": [
+                        {"horizon": h, **BacktestService._metrics(by_segment_horizon, (i, h - 1))} for h in horizons
+                    ]
+                }
+                for i, segment in enumerate(segments)
+            }
+        }
+
+    @staticmethod
+    def run(
+        db: Session,
+        segments: Optional[List[str]] = None,
+        days: int = 14,
+        hours: int = 24,
+        step: int = 6,
+        engines: Optional[List[str]] = None,
+        horizons: Optional[List[int]] = None,
+        parallel: bool = False
+    ) -> Dict:
+        """Backtest every engine over the last ``days`` days; raises ValueError without enough history"""
+        segments = list(segment_registry.names if segments is None else segments)
+        engines = list(engines or ForecastingService.ENGINES)
+        horizons = sorted(set(horizons or [h for h in BacktestService.DEFAULT_HORIZONS if h <= hours]))
+        if not segments:
+            raise ValueError("No segments to backtest")
+        if any(h < 1 or h > hours for h in horizons):
+            raise ValueError(f"Horizons must be between 1 and {hours}")
+
+        matrix, first_hour = BacktestService.load_history(db, segments, days)
+        origins = BacktestService.origins(matrix.shape[1], hours, step)
+        if first_hour is None or len(origins) == 0:
+            needed = math.ceil((BacktestService.HISTORY_HOURS + hours) / 24)
+            raise ValueError(f"Not enough history: at least {needed} days of readings are needed for {hours}-hour forecasts")
+
+        return {
+            "days": days,
+            "hours": hours,
+            "step_hours": step,
+            "history_hours": BacktestService.HISTORY_HOURS,
+            "segment_count": len(segments),
+            "engines": {
+                engine: BacktestService.report(
+                    segments,
+                    first_hour,
+                    origins,
+                    BacktestService.evaluate(matrix, first_hour, hours, step, engine, parallel),
+                    horizons
+                )
+                for engine in engines
+            }
+        }
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+    from models.database import SessionLocal, init_db
+
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the forecast engines")
+    parser.add_argument("--days", type=int, default=14, help="days of stored history to replay")
+    parser.add_argument("--hours", type=int, default=24, help="forecast horizon in hours")
+    parser.add_argument("--step", type=int, default=6, help="hours between forecast origins")
+    parser.add_argument("--engines", default=",".join(ForecastingService.ENGINES))
+    parser.add_argument("--horizons", type=_int_list, help="comma-separated horizons to report (default 1,6,12,24)")
+    parser.add_argument("--segments", help="comma-separated segment names (default: every registered segment)")
+    parser.add_argument("--parallel", action="store_true", help="fit Holt-Winters windows on the process pool (FIT_WORKERS > 1)")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    init_db()
+    db = SessionLocal()
+    try:
+        segment_registry.load(db)
+        segments = [s.strip() for s in args.segments.split(",")] if args.segments else None
+        engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+        unknown = set(engines) - set(ForecastingService.ENGINES)
+        if unknown:
+            parser.error(f"unknown engine(s): {', '.join(sorted(unknown))}")
+        result = BacktestService.run(db, segments, args.days, args.hours, args.step, engines, args.horizons, args.parallel)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+        fitting_executor.shutdown()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+
+    print(f"{result['segment_count']} segments, {args.days} days, {args.hours}-hour horizon, origins every {args.step} h")
+    print(f"{'engine':<16} {'horizon':>8} {'MAPE %':>8} {'RMSE MW':>9} {'coverage':>9} {'samples':>8}")
+    for engine, report in result["engines"].items():
+        for row in [{"horizon": "all", **report["overall"]}, *report["by_horizon"]]:
+            print(
+                f"{engine:<16} {row['horizon']:>8} {_format(row['mape'], 8, 2)} {_format(row['rmse'], 9, 2)} "
+                f"{_format(row['coverage'], 9, 3)} {row['samples']:>8}"
+            )
+    return 0
+
+
+def _format(value: Optional[float], width: int, digits: int) -> str:
+    return f"{'-':>{width}}" if value is None else f"{value:>{width}.{digits}f}"
+
+
+if __name__ == "__main__":
+    sys.exit(main())
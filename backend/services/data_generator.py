@@ -1,28 +1,29 @@
 import random
+import time
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 from models.database import GridLoad, OutageEvent
+from services.segment_registry import DEFAULT_SEGMENTS, segment_filter, segment_registry
+from services.telemetry import write_loads
+from services.timeseries_store import timeseries_store
 import numpy as np
 
 
 class DataGenerator:
     """Generates mock telemetry data for grid simulation"""
     
-    GRID_SEGMENTS = [
-        "North Zone", "South Zone", "East Zone", "West Zone",
-        "Central Zone", "Industrial District", "Residential Sector"
-    ]
+    # Built-in segments, seeded into the grid_segments table on first start;
+    # everything else reads the live set from segment_registry
+    GRID_SEGMENTS = [segment.name for segment in DEFAULT_SEGMENTS]
     
     BASE_LOAD_RANGES = {
-        "North Zone": (150, 300),
-        "South Zone": (200, 400),
-        "East Zone": (180, 350),
-        "West Zone": (170, 320),
-        "Central Zone": (250, 500),
-        "Industrial District": (400, 800),
-        "Residential Sector": (100, 250)
+        segment.name: (segment.base_load_min, segment.base_load_max) for segment in DEFAULT_SEGMENTS
     }
     
+    # Rows written per executemany batch by the vectorized backfill
+    BACKFILL_CHUNK_ROWS = 10000
+    
     @staticmethod
     def generate_historical_loads(db: Session, days: int = 30):
         """Generate historical load data for the past N days"""
@@ -33,34 +34,97 @@ class DataGenerator:
         loads = []
         
         while current <= end_time:
-            for segment in DataGenerator.GRID_SEGMENTS:
+            for segment in segment_registry.names:
                 # Simulate daily patterns (lower at night, higher during day)
                 hour = current.hour
                 base_multiplier = 0.6 + 0.4 * (1 + np.sin((hour - 6) * np.pi / 12))
                 base_multiplier = max(0.5, min(1.5, base_multiplier))
                 
                 # Add some randomness
-                base_min, base_max = DataGenerator.BASE_LOAD_RANGES[segment]
+                base_min, base_max = segment_registry.base_load_range(segment)
                 base_load = (base_min + base_max) / 2
                 load_mw = base_load * base_multiplier * random.uniform(0.85, 1.15)
                 
                 # Temperature correlation (higher temp = higher load for AC)
                 temperature = 20 + 10 * np.sin((hour - 6) * np.pi / 12) + random.uniform(-5, 5)
                 
-                load_record = GridLoad(
-                    timestamp=current,
-                    load_mw=round(load_mw, 2),
-                    temperature=round(temperature, 1),
-                    grid_segment=segment,
-                    created_at=datetime.now()
-                )
-                loads.append(load_record)
+                loads.append({
+                    "timestamp": current,
+                    "load_mw": round(load_mw, 2),
+                    "temperature": round(temperature, 1),
+                    "grid_segment": segment,
+                    "created_at": datetime.now()
+                })
             
             current += timedelta(hours=1)
         
-        db.bulk_save_objects(loads)
-        db.commit()
-        return len(loads)
+        return write_loads(db, loads)
+    
+    @staticmethod
+    def backfill_historical_loads(
+        db: Session,
+        days: int = 30,
+        seed: Optional[int] = None,
+        chunk_rows: int = BACKFILL_CHUNK_ROWS,
+        segments: Optional[List[str]] = None
+    ) -> Dict:
+        """Vectorized equivalent of generate_historical_loads for large backfills.
+        
+        Readings are computed as (hours x segments) NumPy blocks and written in
+        chunks of ``chunk_rows`` through Core executemany inserts, so peak memory
+        depends on the chunk size rather than on ``days``. Passing ``seed`` makes
+        the generated values reproducible.
+        """
+        segments = list(segments or segment_registry.names)
+        if not segments:
+            return {"rows": 0, "seconds": 0.0, "rows_per_second": 0.0}
+        
+        rng = np.random.default_rng(seed)
+        end_time = datetime.now()
+        start_time = end_time - timedelta(days=days)
+        total_hours = int((end_time - start_time) // timedelta(hours=1)) + 1
+        hours_per_block = max(1, chunk_rows // len(segments))
+        
+        base_loads = np.array([
+            sum(segment_registry.base_load_range(segment)) / 2 for segment in segments
+        ])
+        
+        started = time.perf_counter()
+        rows_written = 0
+        
+        for block_start in range(0, total_hours, hours_per_block):
+            offsets = np.arange(block_start, min(block_start + hours_per_block, total_hours))
+            timestamps = [start_time + timedelta(hours=int(offset)) for offset in offsets]
+            hours = (start_time.hour + offsets) % 24
+            
+            # Same daily shape as generate_historical_loads, one column per segment
+            daily = np.sin((hours - 6) * np.pi / 12)[:, None]
+            multiplier = np.clip(0.6 + 0.4 * (1 + daily), 0.5, 1.5)
+            shape = (len(offsets), len(segments))
+            
+            load_mw = np.round(base_loads * multiplier * rng.uniform(0.85, 1.15, shape), 2)
+            temperature = np.round(20 + 10 * daily + rng.uniform(-5, 5, shape), 1)
+            
+            created_at = datetime.now()
+            rows = [
+                {
+                    "timestamp": ts,
+                    "load_mw": load,
+                    "temperature": temp,
+                    "grid_segment": segment,
+                    "created_at": created_at
+                }
+                for ts, load_row, temp_row in zip(timestamps, load_mw.tolist(), temperature.tolist())
+                for segment, load, temp in zip(segments, load_row, temp_row)
+            ]
+            rows_written += write_loads(db, rows)
+        
+        elapsed = time.perf_counter() - started
+        return {
+            "rows": rows_written,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(rows_written / elapsed, 1) if elapsed > 0 else 0.0
+        }
     
     @staticmethod
     def generate_recent_outages(db: Session, count: int = 5):
@@ -71,7 +135,7 @@ class DataGenerator:
                 days=random.randint(1, 30),
                 hours=random.randint(0, 23)
             )
-            segment = random.choice(DataGenerator.GRID_SEGMENTS)
+            segment = random.choice(segment_registry.names)
             
             outage = OutageEvent(
                 timestamp=timestamp,
@@ -90,32 +154,60 @@ class DataGenerator:
         return len(outages)
     
     @staticmethod
-    def get_current_loads(db: Session):
-        """Get current load for each segment (last hour's data)"""
-        from datetime import datetime, timedelta
+    def get_current_loads(db: Session, segments: Optional[List[str]] = None):
+        """Get current load for each segment (last hour's data)
+        
+        Served from the time-series store when possible, otherwise from one
+        query over the last hour for all requested segments.
+        """
+        segments = list(segment_registry.names if segments is None else segments)
         one_hour_ago = datetime.now() - timedelta(hours=1)
         
         current_loads = {}
-        for segment in DataGenerator.GRID_SEGMENTS:
-            latest = db.query(GridLoad).filter(
-                GridLoad.grid_segment == segment,
-                GridLoad.timestamp >= one_hour_ago
-            ).order_by(GridLoad.timestamp.desc()).first()
-            
-            if latest:
+        windows = timeseries_store.windows(segments, one_hour_ago)
+        if windows is not None:
+            for segment, window in windows.items():
+                if len(window.timestamp):
+                    temperature = float(window.temperature[-1])
+                    current_loads[segment] = {
+                        "load_mw": float(window.load_mw[-1]),
+                        "temperature": None if np.isnan(temperature) else temperature,
+                        "timestamp": window.timestamp[-1].astype(datetime)
+                    }
+                else:
+                    current_loads[segment] = DataGenerator.simulated_current_load(segment)
+            return current_loads
+        
+        # Rows arrive in timestamp order, so the last one seen per segment is the latest
+        latest = {}
+        for row in db.query(
+            GridLoad.grid_segment, GridLoad.load_mw, GridLoad.temperature, GridLoad.timestamp
+        ).filter(
+            segment_filter(GridLoad.grid_segment, segments),
+            GridLoad.timestamp >= one_hour_ago
+        ).order_by(GridLoad.timestamp.asc()):
+            latest[row.grid_segment] = row
+        
+        for segment in segments:
+            row = latest.get(segment)
+            if row is not None:
                 current_loads[segment] = {
-                    "load_mw": latest.load_mw,
-                    "temperature": latest.temperature,
-                    "timestamp": latest.timestamp
+                    "load_mw": row.load_mw,
+                    "temperature": row.temperature,
+                    "timestamp": row.timestamp
                 }
             else:
-                # Generate on-the-fly if no data
-                base_min, base_max = DataGenerator.BASE_LOAD_RANGES[segment]
-                current_loads[segment] = {
-                    "load_mw": random.uniform(base_min, base_max),
-                    "temperature": random.uniform(15, 30),
-                    "timestamp": datetime.now()
-                }
+                current_loads[segment] = DataGenerator.simulated_current_load(segment)
         
         return current_loads
+    
+    @staticmethod
+    def simulated_current_load(segment: str) -> Dict:
+        """Generate a current reading on-the-fly for a segment with no recent data"""
+        base_min, base_max = segment_registry.base_load_range(segment)
+        return {
+            "load_mw": random.uniform(base_min, base_max),
+            "temperature": random.uniform(15, 30),
+            "timestamp": datetime.now()
+        }
 
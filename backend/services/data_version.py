@@ -0,0 +1,50 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, List
+
+
+class DataVersion:
+    """Process-wide version of the data behind the read endpoints, used for ETags.
+
+    Bumped whenever readings are written, the segment registry is reloaded
+    or a precomputed run is published or cleared. Writes made by other
+    worker processes are not seen here, so the version also rolls over
+    every ``ttl_seconds``, which bounds how long a client can be told its
+    copy is current, like the result cache TTL does for cached results.
+    Listeners added with ``on_change`` are called after every bump, from
+    whichever thread made the change.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0):
+        self.ttl_seconds = ttl_seconds
+        self._counter = 0
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[], None]] = []
+
+    def on_change(self, listener: Callable[[], None]):
+        self._listeners.append(listener)
+
+    def bump(self):
+        with self._lock:
+            self._counter += 1
+        for listener in self._listeners:
+            listener()
+
+    def current(self) -> str:
+        epoch = int(time.time() // self.ttl_seconds) if self.ttl_seconds > 0 else 0
+        return f"{self._counter}.{epoch}"
+
+    def etag(self, *parts: str) -> str:
+        """Weak ETag of the current version combined with request-specific parts"""
+        digest = hashlib.blake2b(digest_size=12)
+        for part in (self.current(), *parts):
+            digest.update(part.encode("utf-8", "surrogateescape"))
+            digest.update(b"\x00")
+        return f'W/"{digest.hexdigest()}"'
+
+
+data_version = DataVersion(
+    ttl_seconds=float(os.getenv("HTTP_CACHE_TTL_SECONDS", "60"))
+)
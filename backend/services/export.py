@@ -0,0 +1,112 @@
+import base64
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from models.database import GridLoad, SessionLocal
+
+EXPORT_COLUMNS = ("id", "timestamp", "grid_segment", "load_mw", "temperature")
+
+
+class InvalidCursor(ValueError):
+    """Raised when a continuation token cannot be decoded or does not match the query"""
+
+
+def fetch_page(
+    db: Session,
+    start_time: datetime,
+    segment: Optional[str],
+    page_size: int,
+    after: Optional[Tuple[datetime, int]] = None
+) -> List[Dict]:
+    """One page of grid_loads ordered by (timestamp, id), strictly after the ``after`` key"""
+    query = db.query(
+        GridLoad.id, GridLoad.timestamp, GridLoad.grid_segment, GridLoad.load_mw, GridLoad.temperature
+    ).filter(GridLoad.timestamp >= start_time)
+    if segment:
+        query = query.filter(GridLoad.grid_segment == segment)
+    if after is not None:
+        last_timestamp, last_id = after
+        query = query.filter(or_(
+            GridLoad.timestamp > last_timestamp,
+            and_(GridLoad.timestamp == last_timestamp, GridLoad.id > last_id)
+        ))
+    rows = query.order_by(GridLoad.timestamp.asc(), GridLoad.id.asc()).limit(page_size).all()
+    return [
+        {
+            "id": row.id,
+            "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+            "grid_segment": row.grid_segment,
+            "load_mw": row.load_mw,
+            "temperature": row.temperature
+        }
+        for row in rows
+    ]
+
+
+def iter_rows(start_time: datetime, segment: Optional[str], page_size: int = 5000) -> Iterator[Dict]:
+    """Yield every matching row, holding at most one page in memory.
+
+    Opens its own session so it can outlive the request-scoped one while the
+    response is streamed.
+    """
+    db = SessionLocal()
+    try:
+        after = None
+        while True:
+            page = fetch_page(db, start_time, segment, page_size, after)
+            yield from page
+            if len(page) < page_size:
+                return
+            after = (datetime.fromisoformat(page[-1]["timestamp"]), page[-1]["id"])
+            # Release ORM/connection state between pages
+            db.rollback()
+    finally:
+        db.close()
+
+
+def ndjson_lines(rows: Iterator[Dict]) -> Iterator[bytes]:
+    for row in rows:
+        yield (json.dumps(row) + "\n").encode()
+
+
+def csv_lines(rows: Iterator[Dict]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow(["" if row[column] is None else row[column] for column in EXPORT_COLUMNS])
+        # Flush roughly every 64KB rather than per row
+        if buffer.tell() >= 65536:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def encode_cursor(last_row: Dict, start_time: datetime, segment: Optional[str]) -> str:
+    """Opaque continuation token carrying the keyset position and the query it belongs to"""
+    payload = {"t": last_row["timestamp"], "i": last_row["id"], "s": start_time.isoformat(), "g": segment}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, segment: Optional[str], earliest: datetime) -> Tuple[datetime, Tuple[datetime, int]]:
+    """Return (window start, keyset position) from a continuation token
+    
+    Tokens are not signed, so the window start is clamped to ``earliest``:
+    a crafted token cannot widen the export beyond the endpoint's days limit.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        start_time = datetime.fromisoformat(payload["s"])
+        after = (datetime.fromisoformat(payload["t"]), int(payload["i"]))
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+    if payload.get("g") != segment:
+        raise InvalidCursor("Cursor was issued for a different segment")
+    return max(start_time, earliest), after
@@ -0,0 +1,100 @@
+import os
+import threading
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+import numpy as np
+
+# multiprocessing and concurrent.futures are imported on first use: most
+# processes never fit a matrix large enough to need the pool
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+
+def _fit_chunk(fit: Callable, name: str, shape: Tuple[int, int], start: int, stop: int, args: tuple):
+    """Worker entry point: fit rows [start, stop) of the matrix held in shared memory"""
+    from multiprocessing.shared_memory import SharedMemory
+
+    # Pool workers share the parent's resource tracker, so attaching does not take over cleanup
+    shm = SharedMemory(name=name)
+    matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    try:
+        return fit(matrix[start:stop], *args)
+    finally:
+        # The view must be released before the mapping can be closed
+        del matrix
+        shm.close()
+
+
+def _concat(parts: List):
+    """Concatenate per-chunk results (arrays, or tuples/NamedTuples of them) along the segment axis"""
+    first = parts[0]
+    if isinstance(first, np.ndarray):
+        return np.concatenate(parts)
+    fields = [_concat([part[i] for part in parts]) for i in range(len(first))]
+    return type(first)(*fields) if hasattr(first, "_fields") else tuple(fields)
+
+
+class FittingExecutor:
+    """Fans row-independent model fits out over a process pool.
+
+    The history matrix is copied once into a shared memory block; workers
+    map it and fit a contiguous chunk of rows, so only chunk bounds travel
+    to the workers and only the (much smaller) fitted state travels back.
+    ``fit`` must be a picklable module-level function or static method that
+    treats each row independently, which makes the chunked result identical
+    to fitting the whole matrix at once. Matrices of at most ``chunk_size``
+    rows, or a pool of one worker, are fitted in the calling thread.
+    """
+
+    def __init__(self, workers: int = 1, chunk_size: int = 5000):
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self._pool: Optional["ProcessPoolExecutor"] = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> "ProcessPoolExecutor":
+        with self._lock:
+            if self._pool is None:
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+
+                # spawn: forking a process that runs threads and holds DB connections is unsafe
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def fit(self, fit: Callable, matrix: np.ndarray, *args):
+        """``fit(matrix, *args)``, computed in row chunks across the pool when the matrix is large enough"""
+        rows = matrix.shape[0]
+        if self.workers == 1 or rows <= self.chunk_size:
+            return fit(matrix, *args)
+
+        from multiprocessing.shared_memory import SharedMemory
+
+        matrix = np.ascontiguousarray(matrix, dtype=np.float64)
+        shm = SharedMemory(create=True, size=max(matrix.nbytes, 1))
+        try:
+            np.ndarray(matrix.shape, dtype=np.float64, buffer=shm.buf)[:] = matrix
+            pool = self._executor()
+            futures = [
+                pool.submit(_fit_chunk, fit, shm.name, matrix.shape, start, min(start + self.chunk_size, rows), args)
+                for start in range(0, rows, self.chunk_size)
+            ]
+            return _concat([future.result() for future in futures])
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+
+# Fits run inline by default: the vectorised fit costs ~13us per segment, so
+# starting the pool and copying the matrix to shared memory only pays off
+# from ~20000 segments per fit (benchmarks.fitting: 3000 segments take 0.04s
+# serial vs 0.07s on 2 workers; 20000 break even; 100000 go 2.7s -> 1.5s)
+fitting_executor = FittingExecutor(
+    workers=int(os.getenv("FIT_WORKERS", "1")),
+    chunk_size=int(os.getenv("FIT_CHUNK_SIZE", "5000"))
+)
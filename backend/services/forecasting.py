@@ -1,14 +1,29 @@
+import asyncio
+import logging
+import zlib
 import numpy as np
-import random
 from datetime import datetime, timedelta
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from models.database import GridLoad, Forecast
-from typing import List, Dict
+from models.database import GridLoad, Forecast, SessionLocal
+from services.holt_winters import HoltWintersService
+from services.result_cache import result_cache
+from services.risk_stats import compare_risks, risk_stats
+from services.segment_registry import MAX_IN_CLAUSE, segment_filter, segment_registry
+from services.timeseries_store import timeseries_store
+from typing import List, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 
 class ForecastingService:
     """AI-powered forecasting service simulating Prophet/LSTM logic"""
     
+    # ``moving_average``: moving average, trend and fixed hour-of-day multipliers;
+    # ``holt_winters``: fitted Holt-Winters state (see services.holt_winters)
+    ENGINES = ("moving_average", "holt_winters")
+    DEFAULT_ENGINE = "moving_average"
+    
     @staticmethod
     def calculate_moving_average(values: List[float], window: int = 24) -> float:
         """Calculate moving average for trend detection"""
@@ -59,78 +74,361 @@ class ForecastingService:
             return 1.0
     
     @staticmethod
-    def forecast_demand(db: Session, grid_segment: str, hours: int = 24) -> List[Dict]:
-        """Generate 24-hour demand forecast"""
-        # Get historical data (last 7 days)
-        end_time = datetime.now()
-        start_time = end_time - timedelta(days=7)
+    def load_history_matrix(
+        db: Session,
+        segments: List[str],
+        start_time: datetime
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Load load_mw history for several segments with a single query.
         
-        historical = db.query(GridLoad).filter(
-            GridLoad.grid_segment == grid_segment,
+        Returns a (segments x readings) matrix in which each row is right-aligned
+        (latest reading in the last column) and left-padded with NaN, plus the
+        number of readings per segment.
+        """
+        rows = db.execute(ForecastingService._history_query(segments, start_time)).all()
+        return ForecastingService._matrix_from_rows(rows, segments)
+    
+    @staticmethod
+    async def load_history_matrix_async(
+        session,
+        segments: List[str],
+        start_time: datetime
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Non-blocking load_history_matrix over an AsyncSession"""
+        rows = (await session.execute(ForecastingService._history_query(segments, start_time))).all()
+        return ForecastingService._matrix_from_rows(rows, segments)
+    
+    @staticmethod
+    def _history_query(segments: List[str], start_time: datetime):
+        return select(GridLoad.grid_segment, GridLoad.load_mw).where(
+            segment_filter(GridLoad.grid_segment, segments),
             GridLoad.timestamp >= start_time
-        ).order_by(GridLoad.timestamp.asc()).all()
-        
-        if not historical:
-            # Return default forecast if no data
-            forecasts = []
-            for i in range(hours):
-                forecast_time = datetime.now() + timedelta(hours=i+1)
-                forecasts.append({
-                    "timestamp": forecast_time,
-                    "predicted_load_mw": 200.0,
-                    "confidence_lower": 180.0,
-                    "confidence_upper": 220.0
-                })
-            return forecasts
-        
-        # Extract load values
-        loads = [h.load_mw for h in historical]
-        current_load = loads[-1] if loads else 200.0
-        
-        # Calculate trend and moving average
-        trend = ForecastingService.detect_trend(loads)
-        moving_avg = ForecastingService.calculate_moving_average(loads)
-        std_dev = np.std(loads) if len(loads) > 1 else current_load * 0.1
-        
-        forecasts = []
-        for i in range(hours):
-            forecast_time = datetime.now() + timedelta(hours=i+1)
-            hour = forecast_time.hour
-            
-            # Base forecast: moving average + trend projection
-            seasonal = ForecastingService.calculate_seasonal_pattern(hour)
-            trend_projection = trend * (i + 1) * 0.01  # Small trend effect
+        ).order_by(GridLoad.grid_segment, GridLoad.timestamp.asc())
+    
+    @staticmethod
+    def _matrix_from_rows(rows, segments: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        counts = np.zeros(len(segments), dtype=np.int64)
+        if not rows:
+            return np.full((len(segments), 0), np.nan), counts
+        
+        index = {segment: i for i, segment in enumerate(segments)}
+        if len(segments) > MAX_IN_CLAUSE:
+            # The query was not restricted to these segments
+            rows = [r for r in rows if r[0] in index]
+            if not rows:
+                return np.full((len(segments), 0), np.nan), counts
+        segment_idx = np.fromiter((index[r[0]] for r in rows), dtype=np.int64, count=len(rows))
+        values = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+        
+        # Stable sort keeps timestamp order inside each segment
+        order = np.argsort(segment_idx, kind="stable")
+        segment_idx = segment_idx[order]
+        values = values[order]
+        
+        counts = np.bincount(segment_idx, minlength=len(segments))
+        width = int(counts.max())
+        group_start = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        rank = np.arange(len(values)) - group_start[segment_idx]
+        
+        matrix = np.full((len(segments), width), np.nan)
+        matrix[segment_idx, width - counts[segment_idx] + rank] = values
+        return matrix, counts
+    
+    @staticmethod
+    def matrix_from_histories(histories: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Stack per-segment load arrays into the right-aligned matrix used by forecast_from_matrix"""
+        counts = np.array([len(h) for h in histories], dtype=np.int64)
+        width = int(counts.max()) if len(counts) else 0
+        matrix = np.full((len(histories), width), np.nan)
+        for i, history in enumerate(histories):
+            if len(history):
+                matrix[i, width - len(history):] = history
+        return matrix, counts
+    
+    @staticmethod
+    def forecast_from_matrix(
+        loads: np.ndarray,
+        counts: np.ndarray,
+        hours: int = 24,
+        now: Optional[datetime] = None,
+        jitter: bool = True,
+        window: int = 24,
+        seed_keys: Optional[List[str]] = None
+    ) -> List[List[Dict]]:
+        """Vectorized forecast for every segment row of a right-aligned history matrix.
+        
+        Applies the same moving average, trend, seasonality and confidence band
+        rules as the original per-segment loop, for all segments and horizons at once.
+        With ``seed_keys`` (one per row, normally the segment name) the jitter is
+        seeded from the key and the row's history, so identical inputs always
+        produce identical forecasts.
+        """
+        now = now or datetime.now()
+        timestamps = [now + timedelta(hours=i + 1) for i in range(hours)]
+        predicted, lower, upper, has_data = ForecastingService.forecast_arrays(
+            loads, counts, timestamps, jitter, window, seed_keys
+        )
+        
+        results = []
+        for i in range(len(counts)):
+            if not has_data[i]:
+                # Default forecast if no data
+                results.append([
+                    {
+                        "timestamp": ts,
+                        "predicted_load_mw": 200.0,
+                        "confidence_lower": 180.0,
+                        "confidence_upper": 220.0
+                    }
+                    for ts in timestamps
+                ])
+                continue
             
-            predicted = moving_avg * seasonal * (1 + trend_projection)
+            results.append([
+                {
+                    "timestamp": ts,
+                    "predicted_load_mw": round(p, 2),
+                    "confidence_lower": round(lo, 2),
+                    "confidence_upper": round(up, 2)
+                }
+                for ts, p, lo, up in zip(timestamps, predicted[i].tolist(), lower[i].tolist(), upper[i].tolist())
+            ])
+        
+        return results
+    
+    @staticmethod
+    def forecast_arrays(
+        loads: np.ndarray,
+        counts: np.ndarray,
+        timestamps: List[datetime],
+        jitter: bool = True,
+        window: int = 24,
+        seed_keys: Optional[List[str]] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Array core of forecast_from_matrix: predicted, lower and upper (segments x timestamps) and the has-data mask
+        
+        Rows without history get the flat 200 MW default forecast.
+        """
+        n_segments = len(counts)
+        hours = len(timestamps)
+        has_data = counts > 0
+        moving_avg = np.zeros(n_segments)
+        trend = np.zeros(n_segments)
+        std_dev = np.zeros(n_segments)
+        
+        if has_data.any():
+            history = loads[has_data]
+            history_counts = counts[has_data]
             
-            # Add some randomness for realism
-            predicted *= random.uniform(0.95, 1.05)
+            recent_avg = np.nanmean(history[:, -window:], axis=1)
+            moving_avg[has_data] = recent_avg
             
-            # Confidence intervals (wider for further out)
-            confidence_width = std_dev * (1 + i * 0.1)
+            if history.shape[1] >= window * 2:
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    previous_avg = np.nanmean(history[:, -window * 2:-window], axis=1)
+                    segment_trend = np.clip((recent_avg - previous_avg) / previous_avg, -1, 1)
+                usable = (history_counts >= window * 2) & (previous_avg != 0)
+                trend[has_data] = np.where(usable, segment_trend, 0)
             
-            forecasts.append({
-                "timestamp": forecast_time,
-                "predicted_load_mw": round(predicted, 2),
-                "confidence_lower": round(max(0, predicted - confidence_width), 2),
-                "confidence_upper": round(predicted + confidence_width, 2)
-            })
+            std_dev[has_data] = np.where(
+                history_counts > 1,
+                np.nanstd(history, axis=1),
+                history[:, -1] * 0.1
+            )
+        
+        # Hour-of-day seasonal multiplier and trend projection per horizon step
+        seasonal_table = np.array([ForecastingService.calculate_seasonal_pattern(h) for h in range(24)])
+        seasonal = seasonal_table[[ts.hour for ts in timestamps]]
+        steps = np.arange(1, hours + 1)
         
-        return forecasts
+        predicted = moving_avg[:, None] * seasonal[None, :] * (1 + trend[:, None] * steps * 0.01)
+        if jitter:
+            if seed_keys is None:
+                noise = np.random.uniform(0.95, 1.05, predicted.shape)
+            else:
+                noise = np.ones(predicted.shape)
+                for i in np.flatnonzero(has_data):
+                    history_bytes = loads[i, loads.shape[1] - counts[i]:].tobytes()
+                    seed = zlib.crc32(seed_keys[i].encode() + history_bytes)
+                    noise[i] = np.random.default_rng(seed).uniform(0.95, 1.05, hours)
+            predicted = predicted * noise
+        
+        confidence_width = std_dev[:, None] * (1 + (steps - 1) * 0.1)
+        lower = np.maximum(0, predicted - confidence_width)
+        upper = predicted + confidence_width
+        
+        predicted[~has_data] = 200.0
+        lower[~has_data] = 180.0
+        upper[~has_data] = 220.0
+        return predicted, lower, upper, has_data
+    
+    @staticmethod
+    def forecast_demand(
+        db: Session,
+        grid_segment: str,
+        hours: int = 24,
+        jitter: bool = True,
+        engine: str = DEFAULT_ENGINE
+    ) -> List[Dict]:
+        """Generate 24-hour demand forecast"""
+        return ForecastingService.forecast_demand_batch(db, [grid_segment], hours, jitter, engine)[grid_segment]
+    
+    @staticmethod
+    def forecast_demand_batch(
+        db: Session,
+        segments: List[str],
+        hours: int = 24,
+        jitter: bool = True,
+        engine: str = DEFAULT_ENGINE
+    ) -> Dict[str, List[Dict]]:
+        """Generate demand forecasts for several segments from one history query
+        
+        Results are cached per segment until new readings for it are written.
+        """
+        if engine == "holt_winters":
+            return ForecastingService._holt_winters_batch(db, segments, hours, jitter)
+        cached, missing, watermarks = result_cache.lookup(("forecast", jitter), segments, hours)
+        if missing:
+            # Get historical data (last 7 days)
+            start_time = datetime.now() - timedelta(days=7)
+            matrix = ForecastingService._history_from_store(missing, start_time)
+            if matrix is None:
+                matrix = ForecastingService.load_history_matrix(db, missing, start_time)
+            computed = ForecastingService._forecast_segments(missing, matrix, hours, jitter)
+            result_cache.store(("forecast", jitter), hours, computed, watermarks)
+            cached.update(computed)
+        return {segment: cached[segment] for segment in segments}
+    
+    @staticmethod
+    async def forecast_demand_batch_async(
+        session,
+        segments: List[str],
+        hours: int = 24,
+        jitter: bool = True,
+        engine: str = DEFAULT_ENGINE
+    ) -> Dict[str, List[Dict]]:
+        """forecast_demand_batch over an AsyncSession, without blocking the event loop on the query
+        
+        The Holt-Winters engine fits and predicts synchronously, so it runs in
+        a worker thread with its own session instead of on the event loop.
+        """
+        if engine == "holt_winters":
+            return await asyncio.to_thread(ForecastingService._holt_winters_batch_in_thread, segments, hours, jitter)
+        cached, missing, watermarks = result_cache.lookup(("forecast", jitter), segments, hours)
+        if missing:
+            start_time = datetime.now() - timedelta(days=7)
+            matrix = ForecastingService._history_from_store(missing, start_time)
+            if matrix is None:
+                matrix = await ForecastingService.load_history_matrix_async(session, missing, start_time)
+            computed = ForecastingService._forecast_segments(missing, matrix, hours, jitter)
+            result_cache.store(("forecast", jitter), hours, computed, watermarks)
+            cached.update(computed)
+        return {segment: cached[segment] for segment in segments}
+    
+    @staticmethod
+    def _holt_winters_batch(db: Session, segments: List[str], hours: int, jitter: bool) -> Dict[str, List[Dict]]:
+        """Holt-Winters forecasts; segments with too little history for a fit use the moving average engine"""
+        kind = ("holt_winters", HoltWintersService.mode)
+        cached, missing, watermarks = result_cache.lookup(kind, segments, hours)
+        if missing:
+            computed = HoltWintersService.forecast(db, missing, hours)
+            fallback = [segment for segment in missing if segment not in computed]
+            if fallback:
+                computed.update(ForecastingService.forecast_demand_batch(db, fallback, hours, jitter))
+            result_cache.store(kind, hours, computed, watermarks)
+            cached.update(computed)
+        return {segment: cached[segment] for segment in segments}
+    
+    @staticmethod
+    def _holt_winters_batch_in_thread(segments: List[str], hours: int, jitter: bool) -> Dict[str, List[Dict]]:
+        db = SessionLocal()
+        try:
+            return ForecastingService._holt_winters_batch(db, segments, hours, jitter)
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _forecast_segments(
+        segments: List[str],
+        matrix: Tuple[np.ndarray, np.ndarray],
+        hours: int,
+        jitter: bool,
+        now: Optional[datetime] = None
+    ) -> Dict[str, List[Dict]]:
+        loads, counts = matrix
+        forecasts = ForecastingService.forecast_from_matrix(
+            loads, counts, hours, now=now, jitter=jitter, seed_keys=segments
+        )
+        return dict(zip(segments, forecasts))
+    
+    @staticmethod
+    def _history_from_store(segments: List[str], start_time: datetime) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        windows = timeseries_store.windows(segments, start_time)
+        if windows is None:
+            return None
+        return ForecastingService.matrix_from_histories([windows[segment].load_mw for segment in segments])
     
     @staticmethod
     def calculate_outage_risk_score(db: Session, grid_segment: str) -> Dict:
         """Calculate outage risk score (0-100) for a grid segment"""
-        # Get recent load data (last 24 hours)
-        end_time = datetime.now()
-        start_time = end_time - timedelta(hours=24)
+        return ForecastingService.segment_risks(db, [grid_segment])[grid_segment]
+    
+    @staticmethod
+    def segment_risks(db: Session, segments: List[str]) -> Dict[str, Dict]:
+        """Outage risk for many segments, issuing at most one query for the ones not served from memory
         
-        recent_loads = db.query(GridLoad).filter(
-            GridLoad.grid_segment == grid_segment,
+        Results come from the result cache, then the streaming risk statistics,
+        then the time-series store; whatever is left is scored from one query
+        over the last 24 hours for all remaining segments.
+        """
+        batch = _RiskBatch(segments)
+        if batch.remaining:
+            batch.score_rows(db.execute(ForecastingService._risk_query(batch.remaining, batch.start_time)).all())
+        if batch.verify_segments:
+            batch.verify_rows(db.execute(ForecastingService._risk_query(batch.verify_segments, batch.start_time)).all())
+        return batch.finish()
+    
+    @staticmethod
+    async def segment_risks_async(session, segments: List[str]) -> Dict[str, Dict]:
+        """segment_risks over an AsyncSession"""
+        batch = _RiskBatch(segments)
+        if batch.remaining:
+            result = await session.execute(ForecastingService._risk_query(batch.remaining, batch.start_time))
+            batch.score_rows(result.all())
+        if batch.verify_segments:
+            result = await session.execute(ForecastingService._risk_query(batch.verify_segments, batch.start_time))
+            batch.verify_rows(result.all())
+        return batch.finish()
+    
+    @staticmethod
+    def _verify_streaming_risk(grid_segment: str, streaming: Dict, recent_loads) -> List[str]:
+        """Compare a streaming risk result with the batch formulas and log any difference"""
+        differences = compare_risks(streaming, ForecastingService.risk_from_loads(recent_loads))
+        if differences:
+            logger.warning(f"Streaming risk stats for {grid_segment} differ from batch: {'; '.join(differences)}")
+        return differences
+    
+    @staticmethod
+    def _risk_query(segments: List[str], start_time: datetime):
+        return select(GridLoad.grid_segment, GridLoad.load_mw).where(
+            segment_filter(GridLoad.grid_segment, segments),
             GridLoad.timestamp >= start_time
-        ).order_by(GridLoad.timestamp.asc()).all()
-        
-        if not recent_loads:
+        ).order_by(GridLoad.timestamp.asc())
+    
+    @staticmethod
+    def _group_loads(rows, segments: List[str]) -> Dict[str, List[float]]:
+        """Per-segment load lists (oldest first) from (grid_segment, load_mw) rows"""
+        grouped: Dict[str, List[float]] = {segment: [] for segment in segments}
+        for segment, load_mw in rows:
+            loads = grouped.get(segment)
+            if loads is not None:
+                loads.append(load_mw)
+        return grouped
+    
+    @staticmethod
+    def risk_from_loads(loads) -> Dict:
+        """Score outage risk from the last 24 hours of load readings (oldest first)"""
+        if len(loads) == 0:
             return {
                 "risk_score": 50,
                 "factors": {
@@ -140,17 +438,28 @@ class ForecastingService:
                 }
             }
         
-        loads = [l.load_mw for l in recent_loads]
-        current_load = loads[-1]
-        avg_load = np.mean(loads)
-        max_load = np.max(loads)
-        std_load = np.std(loads)
-        
+        current_load = float(loads[-1])
+        avg_load = float(np.mean(loads))
+        std_load = float(np.std(loads))
+        anomaly_detected = bool(ForecastingService.detect_anomaly(loads))
+        return ForecastingService.risk_from_stats(current_load, avg_load, std_load, anomaly_detected)
+    
+    @staticmethod
+    def risk_from_summary(summary: Dict) -> Dict:
+        """Score outage risk from streaming window statistics (see services.risk_stats)"""
+        if summary["count"] == 0:
+            return ForecastingService.risk_from_loads([])
+        return ForecastingService.risk_from_stats(
+            summary["current"], summary["mean"], summary["std"], summary["anomaly"]
+        )
+    
+    @staticmethod
+    def risk_from_stats(current_load: float, avg_load: float, std_load: float, anomaly_detected: bool) -> Dict:
+        """Combine window statistics into the 0-100 outage risk score"""
         # Factor 1: Load variability (high variability = higher risk)
         variability_score = min(1.0, std_load / avg_load if avg_load > 0 else 0) * 0.3
         
         # Factor 2: Anomaly detection
-        anomaly_detected = ForecastingService.detect_anomaly(loads)
         anomaly_score = 0.4 if anomaly_detected else 0
         
         # Factor 3: Current load level (relative to historical max)
@@ -174,19 +483,89 @@ class ForecastingService:
         }
     
     @staticmethod
-    def get_all_segment_risks(db: Session) -> List[Dict]:
+    def get_all_segment_risks(db: Session, segments: Optional[List[str]] = None) -> List[Dict]:
         """Get risk scores for all grid segments"""
-        from services.data_generator import DataGenerator
-        
-        risks = []
-        for segment in DataGenerator.GRID_SEGMENTS:
-            risk_data = ForecastingService.calculate_outage_risk_score(db, segment)
-            risks.append({
-                "grid_segment": segment,
-                **risk_data
-            })
-        
+        risks = ForecastingService.segment_risks(db, list(segment_registry.names if segments is None else segments))
+        return ForecastingService._sorted_risks(risks)
+    
+    @staticmethod
+    def _sorted_risks(risks: Dict[str, Dict]) -> List[Dict]:
         # Sort by risk score descending
-        risks.sort(key=lambda x: x["risk_score"], reverse=True)
-        return risks
+        return sorted(
+            ({"grid_segment": segment, **risk} for segment, risk in risks.items()),
+            key=lambda x: x["risk_score"],
+            reverse=True
+        )
+    
+    @staticmethod
+    def verify_streaming_risks(db: Session) -> Dict:
+        """Compare streaming risk statistics with the batch computation for every segment"""
+        segments = segment_registry.names
+        end_time = datetime.now()
+        start_time = end_time - timedelta(hours=24)
+        summaries = {segment: risk_stats.summary(segment, end_time) for segment in segments}
+        if any(summary is None for summary in summaries.values()):
+            return {"ready": False, "segments": {}}
+        
+        loads = ForecastingService._group_loads(
+            db.execute(ForecastingService._risk_query(segments, start_time)).all(), segments
+        )
+        results = {}
+        for segment, summary in summaries.items():
+            streaming = ForecastingService.risk_from_summary(summary)
+            differences = ForecastingService._verify_streaming_risk(segment, streaming, loads[segment])
+            results[segment] = {
+                "readings": summary["count"],
+                "batch_readings": len(loads[segment]),
+                "max_load_mw": round(summary["max"], 2) if summary["count"] else None,
+                "risk_score": streaming["risk_score"],
+                "matches": not differences,
+                "differences": differences
+            }
+        return {
+            "ready": True,
+            "all_match": all(result["matches"] for result in results.values()),
+            "segments": results
+        }
 
+
+class _RiskBatch:
+    """Bookkeeping shared by segment_risks and segment_risks_async"""
+    
+    def __init__(self, segments: List[str]):
+        self.segments = segments
+        self.end_time = datetime.now()
+        self.start_time = self.end_time - timedelta(hours=24)
+        self.cached, missing, self.watermarks = result_cache.lookup("risk", segments, 24)
+        self.computed: Dict[str, Dict] = {}
+        self.remaining: List[str] = []
+        self.verify_segments: List[str] = []
+        
+        for segment in missing:
+            summary = risk_stats.summary(segment, self.end_time)
+            if summary is not None:
+                self.computed[segment] = ForecastingService.risk_from_summary(summary)
+                if risk_stats.verify:
+                    self.verify_segments.append(segment)
+            else:
+                self.remaining.append(segment)
+        
+        if self.remaining:
+            windows = timeseries_store.windows(self.remaining, self.start_time)
+            if windows is not None:
+                for segment, window in windows.items():
+                    self.computed[segment] = ForecastingService.risk_from_loads(window.load_mw)
+                self.remaining = []
+    
+    def score_rows(self, rows):
+        for segment, loads in ForecastingService._group_loads(rows, self.remaining).items():
+            self.computed[segment] = ForecastingService.risk_from_loads(loads)
+    
+    def verify_rows(self, rows):
+        for segment, loads in ForecastingService._group_loads(rows, self.verify_segments).items():
+            ForecastingService._verify_streaming_risk(segment, self.computed[segment], loads)
+    
+    def finish(self) -> Dict[str, Dict]:
+        result_cache.store("risk", 24, self.computed, self.watermarks)
+        self.cached.update(self.computed)
+        return {segment: self.cached[segment] for segment in self.segments}
@@ -0,0 +1,319 @@
+import os
+import warnings
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models.database import GridLoad, HoltWintersState
+from services.fitting import fitting_executor
+from services.segment_registry import MAX_IN_CLAUSE, segment_filter
+
+HOUR = np.timedelta64(1, "h")
+
+
+class HoltWintersStates(NamedTuple):
+    """Fitted Holt-Winters state of several segments as parallel arrays, one row per segment"""
+    level: np.ndarray
+    trend: np.ndarray
+    seasonal: np.ndarray  # (segments x 24), indexed by hour of day
+    sse: np.ndarray
+    residuals: np.ndarray
+    last_hour: np.ndarray  # datetime64[h] of the last observation folded into the state
+
+
+class HoltWintersService:
+    """Holt-Winters exponential smoothing with a daily season, vectorized across segments.
+
+    Readings are bucketed into clock hours, so every column of the history
+    matrix maps to one hour of day and the smoothing recursions update all
+    segments with one set of array operations per hour. Hours without a
+    reading advance the level by the trend without an update.
+
+    The fitted state (level, trend, 24 seasonal indices and the one-step
+    residual sum of squares) is stored per segment in holt_winters_states.
+    ``apply`` folds newly written readings into the stored state, so a
+    segment is only fitted from raw history the first time it is forecast.
+    Readings for an hour at or before a segment's ``last_hour`` are ignored.
+    """
+
+    SEASON = 24
+    ALPHA = 0.3
+    BETA = 0.02
+    GAMMA = 0.15
+    MIN_OBSERVATIONS = 48
+    FIT_WINDOW = timedelta(days=7)
+    # Half-width of the 80% prediction interval in residual standard deviations
+    CONFIDENCE_Z = 1.28
+    MODES = ("additive", "multiplicative")
+
+    mode = os.getenv("HOLT_WINTERS_SEASONAL", "additive").lower()
+    if mode not in MODES:
+        mode = "additive"
+
+    @staticmethod
+    def hourly_matrix(rows: Sequence, segments: List[str]) -> Tuple[np.ndarray, Optional[np.datetime64]]:
+        """Mean load per (segment, clock hour) from (grid_segment, timestamp, load_mw) rows
+
+        Returns a (segments x hours) matrix with NaN for hours without readings
+        and the datetime64[h] of the first column.
+        """
+        index = {segment: i for i, segment in enumerate(segments)}
+        rows = [row for row in rows if row[0] in index]
+        if not rows:
+            return np.full((len(segments), 0), np.nan), None
+
+        segment_idx = np.fromiter((index[row[0]] for row in rows), dtype=np.int64, count=len(rows))
+        hours = np.array([row[1] for row in rows], dtype="datetime64[us]").astype("datetime64[h]")
+        values = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+
+        first_hour = hours.min()
+        columns = ((hours - first_hour) // HOUR).astype(np.int64)
+        shape = (len(segments), int(columns.max()) + 1)
+        sums = np.zeros(shape)
+        counts = np.zeros(shape)
+        np.add.at(sums, (segment_idx, columns), values)
+        np.add.at(counts, (segment_idx, columns), 1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, sums / counts, np.nan), first_hour
+
+    @staticmethod
+    def _hours_of_day(first_hour: np.datetime64, width: int) -> np.ndarray:
+        return (first_hour + np.arange(width)).astype(np.int64) % HoltWintersService.SEASON
+
+    @staticmethod
+    def _smooth(states: HoltWintersStates, matrix: np.ndarray, hours_of_day: np.ndarray, active: np.ndarray, mode: str):
+        """Run the smoothing recursions over every active (segment, hour) cell, updating states in place"""
+        alpha, beta, gamma = HoltWintersService.ALPHA, HoltWintersService.BETA, HoltWintersService.GAMMA
+        level, trend, seasonal = states.level, states.trend, states.seasonal
+        multiplicative = mode == "multiplicative"
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for t in np.flatnonzero(active.any(axis=0)):
+                step = active[:, t]
+                y = matrix[:, t]
+                observed = step & ~np.isnan(y)
+                hour = hours_of_day[t]
+                season = seasonal[:, hour]
+                projected = level + trend
+
+                if multiplicative:
+                    predicted = projected * season
+                    new_level = alpha * (y / season) + (1 - alpha) * projected
+                    new_season = gamma * (y / new_level) + (1 - gamma) * season
+                else:
+                    predicted = projected + season
+                    new_level = alpha * (y - season) + (1 - alpha) * projected
+                    new_season = gamma * (y - new_level) + (1 - gamma) * season
+                new_trend = beta * (new_level - level) + (1 - beta) * trend
+
+                residual = y - predicted
+                states.sse[observed] += residual[observed] ** 2
+                states.residuals[observed] += 1
+                seasonal[observed, hour] = new_season[observed]
+                trend[observed] = new_trend[observed]
+                # Missing hours only carry the trend forward
+                level[:] = np.where(observed, new_level, np.where(step, projected, level))
+
+    @staticmethod
+    def fit(matrix: np.ndarray, first_hour: np.datetime64, mode: str) -> Tuple[HoltWintersStates, np.ndarray]:
+        """Fit every row of an hourly matrix; returns the states and a mask of rows with enough history
+
+        The first season of each row initializes the level and seasonal
+        indices, the second one the trend; the remaining hours are smoothed.
+        """
+        season = HoltWintersService.SEASON
+        n, width = matrix.shape
+        rows = np.arange(n)
+        valid = ~np.isnan(matrix)
+        first = np.argmax(valid, axis=1)
+        last = width - 1 - np.argmax(valid[:, ::-1], axis=1)
+        fitted = (valid.sum(axis=1) >= HoltWintersService.MIN_OBSERVATIONS) & (last - first + 1 >= 2 * season)
+
+        hours_of_day = HoltWintersService._hours_of_day(first_hour, width)
+        init_columns = np.minimum(first[:, None] + np.arange(season), width - 1)
+        next_columns = np.minimum(init_columns + season, width - 1)
+        init_values = matrix[rows[:, None], init_columns]
+        with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+            # Rows without readings in a season produce all-NaN means
+            warnings.simplefilter("ignore", RuntimeWarning)
+            level = np.nanmean(init_values, axis=1)
+            trend = (np.nanmean(matrix[rows[:, None], next_columns], axis=1) - level) / season
+            if mode == "multiplicative":
+                fitted &= level > 0
+                offsets = init_values / level[:, None]
+            else:
+                offsets = init_values - level[:, None]
+
+        neutral = 1.0 if mode == "multiplicative" else 0.0
+        seasonal = np.full((n, season), neutral)
+        seasonal[rows[:, None], hours_of_day[init_columns]] = np.where(np.isnan(offsets), neutral, offsets)
+        if mode == "multiplicative":
+            seasonal /= np.where(fitted, seasonal.mean(axis=1), 1.0)[:, None]
+        else:
+            seasonal -= seasonal.mean(axis=1, keepdims=True)
+
+        states = HoltWintersStates(
+            np.where(fitted, level, 0.0),
+            np.where(fitted & ~np.isnan(trend), trend, 0.0),
+            seasonal,
+            np.zeros(n),
+            np.zeros(n, dtype=np.int64),
+            first_hour + last
+        )
+        columns = np.arange(width)
+        active = fitted[:, None] & (columns >= (first + season)[:, None]) & (columns <= last[:, None])
+        HoltWintersService._smooth(states, matrix, hours_of_day, active, mode)
+        return states, fitted
+
+    @staticmethod
+    def update(states: HoltWintersStates, matrix: np.ndarray, first_hour: np.datetime64, mode: str) -> np.ndarray:
+        """Fold readings newer than each row's ``last_hour`` into the states; returns the rows that changed"""
+        width = matrix.shape[1]
+        column_hours = first_hour + np.arange(width)
+        active = (column_hours[None, :] > states.last_hour[:, None]) & ~np.isnan(matrix)
+        changed = active.any(axis=1)
+        if not changed.any():
+            return changed
+        last_column = width - 1 - np.argmax(active[:, ::-1], axis=1)
+        active = (column_hours[None, :] > states.last_hour[:, None]) & (np.arange(width)[None, :] <= last_column[:, None])
+        active &= changed[:, None]
+
+        HoltWintersService._smooth(states, matrix, HoltWintersService._hours_of_day(first_hour, width), active, mode)
+        states.last_hour[changed] = column_hours[last_column[changed]]
+        return changed
+
+    @staticmethod
+    def predict(states: HoltWintersStates, timestamps: List[datetime], mode: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Point forecasts and prediction interval bounds, each (segments x timestamps)"""
+        alpha, beta = HoltWintersService.ALPHA, HoltWintersService.BETA
+        target = np.array(timestamps, dtype="datetime64[us]").astype("datetime64[h]")
+        steps = np.maximum((target[None, :] - states.last_hour[:, None]) // HOUR, 1).astype(np.float64)
+        season = states.seasonal[:, target.astype(np.int64) % HoltWintersService.SEASON]
+
+        base = states.level[:, None] + steps * states.trend[:, None]
+        predicted = np.maximum(0, base * season if mode == "multiplicative" else base + season)
+
+        # Closed form of sum_{j=1..h-1} (alpha * (1 + j * beta))^2 for the h-step forecast variance
+        m = steps - 1
+        spread = 1 + alpha ** 2 * (m + beta * m * (m + 1) + beta ** 2 * m * (m + 1) * (2 * m + 1) / 6)
+        sigma = np.sqrt(states.sse / np.maximum(states.residuals, 1))
+        width = HoltWintersService.CONFIDENCE_Z * sigma[:, None] * np.sqrt(spread)
+        return predicted, np.maximum(0, predicted - width), predicted + width
+
+    @staticmethod
+    def forecast(db: Session, segments: List[str], hours: int, now: Optional[datetime] = None) -> Dict[str, List[Dict]]:
+        """Forecasts for the segments that have (or can be fitted to) a state; others are left out"""
+        now = now or datetime.now()
+        names, states = HoltWintersService.ensure_states(db, segments)
+        if not names:
+            return {}
+        timestamps = [now + timedelta(hours=i + 1) for i in range(hours)]
+        predicted, lower, upper = HoltWintersService.predict(states, timestamps, HoltWintersService.mode)
+        return {
+            segment: [
+                {
+                    "timestamp": ts,
+                    "predicted_load_mw": round(p, 2),
+                    "confidence_lower": round(lo, 2),
+                    "confidence_upper": round(up, 2)
+                }
+                for ts, p, lo, up in zip(timestamps, predicted[i].tolist(), lower[i].tolist(), upper[i].tolist())
+            ]
+            for i, segment in enumerate(names)
+        }
+
+    @staticmethod
+    def load_states(db: Session, segments: List[str]) -> Dict[str, HoltWintersState]:
+        rows = db.execute(
+            select(HoltWintersState).where(segment_filter(HoltWintersState.grid_segment, segments))
+        ).scalars().all()
+        if len(segments) > MAX_IN_CLAUSE:
+            wanted = set(segments)
+            rows = [row for row in rows if row.grid_segment in wanted]
+        return {row.grid_segment: row for row in rows}
+
+    @staticmethod
+    def states_from_rows(rows: List[HoltWintersState]) -> HoltWintersStates:
+        return HoltWintersStates(
+            np.array([row.level for row in rows], dtype=np.float64),
+            np.array([row.trend for row in rows], dtype=np.float64),
+            np.array([row.seasonal for row in rows], dtype=np.float64).reshape(len(rows), HoltWintersService.SEASON),
+            np.array([row.residual_sse for row in rows], dtype=np.float64),
+            np.array([row.residual_count for row in rows], dtype=np.int64),
+            np.array([row.last_hour for row in rows], dtype="datetime64[us]").astype("datetime64[h]")
+        )
+
+    @staticmethod
+    def _store(row: HoltWintersState, states: HoltWintersStates, i: int, updated_at: datetime):
+        row.seasonal_mode = HoltWintersService.mode
+        row.level = float(states.level[i])
+        row.trend = float(states.trend[i])
+        row.seasonal = [round(float(value), 6) for value in states.seasonal[i]]
+        row.residual_sse = float(states.sse[i])
+        row.residual_count = int(states.residuals[i])
+        row.last_hour = states.last_hour[i].astype("datetime64[us]").astype(datetime)
+        row.updated_at = updated_at
+
+    @staticmethod
+    def ensure_states(db: Session, segments: List[str]) -> Tuple[List[str], HoltWintersStates]:
+        """Stored states of the segments, fitting and persisting the missing ones from recent history
+
+        Segments with too little history get no state and are not returned.
+        """
+        mode = HoltWintersService.mode
+        stored = HoltWintersService.load_states(db, segments)
+        current = {segment: row for segment, row in stored.items() if row.seasonal_mode == mode}
+        missing = [segment for segment in segments if segment not in current]
+
+        if missing:
+            start_time = datetime.now() - HoltWintersService.FIT_WINDOW
+            rows = db.execute(
+                select(GridLoad.grid_segment, GridLoad.timestamp, GridLoad.load_mw).where(
+                    segment_filter(GridLoad.grid_segment, missing),
+                    GridLoad.timestamp >= start_time
+                )
+            ).all()
+            matrix, first_hour = HoltWintersService.hourly_matrix(rows, missing)
+            if first_hour is not None:
+                states, fitted = fitting_executor.fit(HoltWintersService.fit, matrix, first_hour, mode)
+                updated_at = datetime.now()
+                for i in np.flatnonzero(fitted):
+                    row = stored.get(missing[i])
+                    if row is None:
+                        row = HoltWintersState(grid_segment=missing[i])
+                        db.add(row)
+                    HoltWintersService._store(row, states, i, updated_at)
+                    current[missing[i]] = row
+                try:
+                    db.commit()
+                except IntegrityError:
+                    # Another worker stored the same segments first; theirs is equivalent
+                    db.rollback()
+                    return HoltWintersService.ensure_states(db, segments)
+
+        names = [segment for segment in segments if segment in current]
+        return names, HoltWintersService.states_from_rows([current[segment] for segment in names])
+
+    @staticmethod
+    def apply(db: Session, rows: List[Dict]):
+        """Fold newly inserted raw rows into the stored states of their segments (caller commits)"""
+        if not rows:
+            return
+        stored = HoltWintersService.load_states(db, sorted({row["grid_segment"] for row in rows}))
+        stored = {segment: row for segment, row in stored.items() if row.seasonal_mode == HoltWintersService.mode}
+        if not stored:
+            return
+
+        names = list(stored)
+        matrix, first_hour = HoltWintersService.hourly_matrix(
+            [(row["grid_segment"], row["timestamp"], row["load_mw"]) for row in rows], names
+        )
+        if first_hour is None:
+            return
+        states = HoltWintersService.states_from_rows([stored[segment] for segment in names])
+        changed = HoltWintersService.update(states, matrix, first_hour, HoltWintersService.mode)
+        updated_at = datetime.now()
+        for i in np.flatnonzero(changed):
+            HoltWintersService._store(stored[names[i]], states, i, updated_at)
@@ -0,0 +1,221 @@
+import csv
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import orjson
+from sqlalchemy.orm import Session
+from services.telemetry import write_loads
+
+
+class LineTooLong(ValueError):
+    """Raised when a line of the body exceeds ``LoadIngestor.MAX_LINE_BYTES``"""
+
+
+class LoadIngestor:
+    """Incremental NDJSON/CSV parser for bulk GridLoad telemetry.
+
+    Raw bytes are split into lines as they arrive and handed out in batches of
+    ``chunk_size`` lines; each batch is validated with NumPy masks and written
+    as one executemany chunk. The caller reads the next piece of the request
+    body only after the previous batch has been committed, which is what
+    bounds memory and applies backpressure to the sender. A line longer than
+    ``MAX_LINE_BYTES`` aborts the request rather than being buffered.
+    """
+
+    SUPPORTED_FORMATS = ("ndjson", "csv")
+    REQUIRED_FIELDS = ("timestamp", "grid_segment", "load_mw")
+    MAX_LOAD_MW = 100000.0
+    TEMPERATURE_RANGE = (-60.0, 70.0)
+    MAX_ERRORS_REPORTED = 20
+    MAX_LINE_BYTES = 64 * 1024
+
+    def __init__(self, fmt: str, segments: Iterable[str], chunk_size: int = 5000):
+        if fmt not in self.SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported format '{fmt}'")
+        self.fmt = fmt
+        self.segments = set(segments)
+        self.chunk_size = chunk_size
+        self.accepted = 0
+        self.rejected = 0
+        self.chunks_committed = 0
+        self.errors: List[Dict] = []
+        self._pending = b""
+        self._lines: List[Tuple[int, bytes]] = []
+        self._line_no = 0
+        self._header: Optional[List[str]] = None
+        self._started = time.perf_counter()
+
+    def feed(self, data: bytes) -> List[List[Tuple[int, bytes]]]:
+        """Buffer a piece of the body and return any full batches of numbered lines"""
+        if len(self._pending) + len(data) > self.MAX_LINE_BYTES and b"\n" not in data:
+            raise LineTooLong(f"Line {self._line_no + 1} is longer than {self.MAX_LINE_BYTES} bytes")
+        data = self._pending + data
+        *complete, self._pending = data.split(b"\n")
+        if len(self._pending) > self.MAX_LINE_BYTES:
+            raise LineTooLong(f"Line {self._line_no + len(complete) + 1} is longer than {self.MAX_LINE_BYTES} bytes")
+        for line in complete:
+            self._add_line(line)
+
+        batches = []
+        while len(self._lines) >= self.chunk_size:
+            batches.append(self._lines[:self.chunk_size])
+            self._lines = self._lines[self.chunk_size:]
+        return batches
+
+    def finish(self) -> List[List[Tuple[int, bytes]]]:
+        """Flush the trailing partial line and the last short batch"""
+        if self._pending:
+            self._add_line(self._pending)
+            self._pending = b""
+        batches = [self._lines] if self._lines else []
+        self._lines = []
+        return batches
+
+    def _add_line(self, line: bytes):
+        self._line_no += 1
+        if len(line) > self.MAX_LINE_BYTES:
+            raise LineTooLong(f"Line {self._line_no} is longer than {self.MAX_LINE_BYTES} bytes")
+        line = line.strip()
+        if not line:
+            return
+        if self.fmt == "csv" and self._header is None:
+            self._header = [name.strip() for name in next(csv.reader([line.decode("utf-8", "replace")]))]
+            missing = [field for field in self.REQUIRED_FIELDS if field not in self._header]
+            if missing:
+                raise ValueError(f"CSV header is missing column(s): {', '.join(missing)}")
+            return
+        self._lines.append((self._line_no, line))
+
+    def ingest(self, db: Session, lines: List[Tuple[int, bytes]]) -> int:
+        """Validate one batch of lines and commit the valid readings as a single chunk"""
+        rows = self.validate(lines)
+        written = write_loads(db, rows)
+        if written:
+            self.accepted += written
+            self.chunks_committed += 1
+        return written
+
+    def _parse(self, lines: List[Tuple[int, bytes]]) -> Tuple[List[int], List[Dict]]:
+        """Decode lines into records, rejecting the ones that cannot be parsed"""
+        numbers = [number for number, _ in lines]
+        if self.fmt == "csv":
+            decoded = [line.decode("utf-8", "replace") for _, line in lines]
+            records = []
+            for number, values in zip(numbers, csv.reader(decoded)):
+                if len(values) != len(self._header):
+                    self._reject(number, "wrong number of CSV columns")
+                    records.append(None)
+                else:
+                    records.append(dict(zip(self._header, values)))
+        else:
+            # Each line must be exactly one JSON value; orjson parses line by
+            # line faster than the json module parses a joined batch
+            records = []
+            for number, line in lines:
+                try:
+                    records.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    self._reject(number, "invalid JSON")
+                    records.append(None)
+
+        kept_numbers, kept_records = [], []
+        for number, record in zip(numbers, records):
+            if record is None:
+                continue
+            if not isinstance(record, dict):
+                self._reject(number, "record must be an object")
+                continue
+            kept_numbers.append(number)
+            kept_records.append(record)
+        return kept_numbers, kept_records
+
+    def validate(self, lines: List[Tuple[int, bytes]]) -> List[Dict]:
+        """Vectorized validation of a batch; returns grid_loads rows for the valid records"""
+        numbers, records = self._parse(lines)
+        if not records:
+            return []
+
+        timestamps = [_parse_timestamp(r.get("timestamp")) for r in records]
+        segments = [r.get("grid_segment") for r in records]
+        known_segment = np.fromiter(
+            (isinstance(s, str) and s in self.segments for s in segments), dtype=bool, count=len(segments)
+        )
+        load_mw = _to_float_array([r.get("load_mw") for r in records])
+        raw_temperature = [r.get("temperature") for r in records]
+        temperature = _to_float_array(raw_temperature)
+        temperature_missing = np.array([t is None or t == "" for t in raw_temperature])
+
+        low, high = self.TEMPERATURE_RANGE
+        with np.errstate(invalid="ignore"):
+            checks = (
+                (np.array([ts is not None for ts in timestamps]), "invalid timestamp"),
+                (known_segment, "unknown grid_segment"),
+                (np.isfinite(load_mw) & (load_mw >= 0) & (load_mw <= self.MAX_LOAD_MW), "invalid load_mw"),
+                (temperature_missing | (np.isfinite(temperature) & (temperature >= low) & (temperature <= high)),
+                 "invalid temperature")
+            )
+        valid = np.logical_and.reduce([mask for mask, _ in checks])
+
+        for i in np.flatnonzero(~valid):
+            reason = next(message for mask, message in checks if not mask[i])
+            self._reject(numbers[i], reason)
+
+        created_at = datetime.now()
+        return [
+            {
+                "timestamp": timestamps[i],
+                "load_mw": load,
+                "temperature": None if temperature_missing[i] else temp,
+                "grid_segment": segments[i],
+                "created_at": created_at
+            }
+            for i, load, temp in zip(
+                np.flatnonzero(valid).tolist(),
+                load_mw[valid].tolist(),
+                temperature[valid].tolist()
+            )
+        ]
+
+    def _reject(self, line_no: int, reason: str):
+        self.rejected += 1
+        if len(self.errors) < self.MAX_ERRORS_REPORTED:
+            self.errors.append({"line": line_no, "error": reason})
+
+    def summary(self) -> Dict:
+        elapsed = time.perf_counter() - self._started
+        return {
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "chunks_committed": self.chunks_committed,
+            "errors": self.errors,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(self.accepted / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+
+def _to_float_array(values: List) -> np.ndarray:
+    """Convert a column to float64, mapping unparseable entries to NaN"""
+    try:
+        return np.array([np.nan if v is None or v == "" else v for v in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        result = np.empty(len(values))
+        for i, value in enumerate(values):
+            try:
+                result[i] = float(value)
+            except (TypeError, ValueError):
+                result[i] = np.nan
+        return result
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    """Parse an ISO-8601 timestamp into the naive local time stored in grid_loads"""
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
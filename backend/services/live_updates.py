@@ -0,0 +1,276 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import AsyncIterator, Dict, Optional, Set
+from models.database import get_async_sessionmaker
+from services.data_version import data_version
+from services.segment_registry import segment_registry
+from services.snapshot import AnalyticsSnapshot
+from utils.responses import dumps
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT = b": keep-alive\n\n"
+
+
+class SubscriberLimitReached(Exception):
+    """Raised when a new stream would exceed the subscriber limit"""
+
+
+class Subscription:
+    """One connected dashboard: a bounded queue of pre-serialized SSE frames"""
+
+    def __init__(self, broadcaster: "DashboardBroadcaster", queue_size: int):
+        self.broadcaster = broadcaster
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=queue_size)
+        self.needs_snapshot = True
+        self.resyncs = 0
+
+    def offer(self, frame: Optional[bytes], snapshot: Optional[bytes] = None) -> int:
+        """Queue a frame without waiting; returns the number of frames dropped to make room
+
+        A subscriber whose queue is full is behind by ``queue_size`` updates.
+        Its pending deltas are discarded and replaced by ``snapshot``, the
+        complete current state, so it catches up with one frame and memory
+        per subscriber stays bounded however slow the client is.
+        """
+        try:
+            self.queue.put_nowait(frame)
+            return 0
+        except asyncio.QueueFull:
+            dropped = 0
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                dropped += 1
+            self.queue.put_nowait(snapshot if snapshot is not None else frame)
+            self.resyncs += 1
+            return dropped
+
+    async def frames(self) -> AsyncIterator[bytes]:
+        """SSE frames for the response body, with keep-alive comments while idle"""
+        try:
+            while True:
+                try:
+                    frame = await asyncio.wait_for(self.queue.get(), timeout=self.broadcaster.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+                    continue
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            self.broadcaster.unsubscribe(self)
+
+
+class DashboardBroadcaster:
+    """Computes dashboard updates once per tick and fans them out to every open stream.
+
+    A tick builds one analytics snapshot over all segments (current loads,
+    24-hour forecasts, risks, maintenance ranking and alerts), serializes
+    each section once, and sends every subscriber the same bytes: the
+    sections that changed since the previous tick as a ``delta`` event, or
+    everything as a ``snapshot`` event to new or lagging subscribers. Ticks
+    run every ``interval_seconds`` and additionally, at most every
+    ``min_interval_seconds``, whenever the data version changes (ingest,
+    segment changes, precomputed runs). Nothing is computed while no client
+    is connected, so cost follows the data rate rather than the number of
+    open dashboards.
+    """
+
+    SECTIONS = ("current_load", "forecast", "risks", "maintenance", "alerts", "freshness")
+    FORECAST_HOURS = 24
+
+    def __init__(
+        self,
+        interval_seconds: float = 30.0,
+        min_interval_seconds: float = 1.0,
+        queue_size: int = 16,
+        max_subscribers: int = 1000,
+        heartbeat_seconds: float = 15.0,
+        enabled: bool = True
+    ):
+        self.interval_seconds = interval_seconds
+        self.min_interval_seconds = min_interval_seconds
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.heartbeat_seconds = heartbeat_seconds
+        self.enabled = enabled
+        self.sequence = 0
+        self.ticks = 0
+        self.failures = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.last_tick: Optional[Dict] = None
+        self._subscribers: Set[Subscription] = set()
+        self._sections: Dict[str, bytes] = {}
+        self._snapshot_frame: Optional[bytes] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self):
+        if not self.enabled or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        for subscription in list(self._subscribers):
+            subscription.offer(None)
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._loop = None
+
+    def notify(self):
+        """Request a tick because data changed (safe to call from any thread)"""
+        loop, wake = self._loop, self._wake
+        if loop is None or wake is None or not self._subscribers:
+            return
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:
+            # The loop closed during shutdown
+            pass
+
+    def subscribe(self) -> Subscription:
+        if len(self._subscribers) >= self.max_subscribers:
+            raise SubscriberLimitReached(f"Live update stream limit of {self.max_subscribers} reached")
+        subscription = Subscription(self, self.queue_size)
+        self._subscribers.add(subscription)
+        # Computed ticks are only kept while someone listens, so a newcomer
+        # either gets the current state right away or triggers a fresh tick
+        if self._snapshot_frame is not None:
+            subscription.offer(self._snapshot_frame)
+            subscription.needs_snapshot = False
+        elif self._wake is not None:
+            self._wake.set()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+        if not self._subscribers:
+            self._sections.clear()
+            self._snapshot_frame = None
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if not self._subscribers:
+                continue
+            try:
+                await self.publish_once()
+            except Exception:
+                self.failures += 1
+                logger.exception("Live dashboard update failed")
+            # Coalesces bursts of ingest batches into one update
+            await asyncio.sleep(self.min_interval_seconds)
+
+    async def compute_sections(self) -> Dict[str, bytes]:
+        """Every dashboard section, each serialized to JSON bytes"""
+        async with get_async_sessionmaker()() as session:
+            snapshot = await AnalyticsSnapshot(segments=list(segment_registry.names)).load_async(session)
+        current_loads = snapshot.current_loads()
+        forecasts = snapshot.forecasts(hours=self.FORECAST_HOURS)
+        alerts = snapshot.alerts()
+        sections = {
+            "current_load": {
+                "total_load_mw": round(sum(load.get("load_mw", 0) for load in current_loads.values()), 2),
+                "segments": current_loads
+            },
+            "forecast": {
+                "forecast_hours": self.FORECAST_HOURS,
+                "forecasts_by_segment": forecasts
+            },
+            "risks": snapshot.segment_risks(),
+            "maintenance": snapshot.maintenance(),
+            "alerts": {"alerts": alerts, "alert_count": len(alerts)},
+            # Last, because it reflects which sources the sections above used
+            "freshness": snapshot.freshness()
+        }
+        return {name: dumps(sections[name]) for name in self.SECTIONS}
+
+    async def publish_once(self) -> Dict:
+        """Compute one update and queue it for every subscriber"""
+        started = time.perf_counter()
+        sections = await self.compute_sections()
+        changed = [name for name in self.SECTIONS if self._sections.get(name) != sections[name]]
+        self._sections = sections
+        self.sequence += 1
+        self.ticks += 1
+
+        snapshot = self._frame("snapshot", self.SECTIONS, sections)
+        self._snapshot_frame = snapshot
+        # Freshness alone changing is not worth a delta
+        delta = self._frame("delta", changed, sections) if set(changed) - {"freshness"} else None
+
+        sent = 0
+        for subscription in list(self._subscribers):
+            if subscription.needs_snapshot:
+                frame = snapshot
+                subscription.needs_snapshot = False
+            elif delta is not None:
+                frame = delta
+            else:
+                continue
+            self.frames_dropped += subscription.offer(frame, snapshot)
+            sent += 1
+        self.frames_sent += sent
+
+        self.last_tick = {
+            "sequence": self.sequence,
+            "computed_at": datetime.now().isoformat(),
+            "duration_seconds": round(time.perf_counter() - started, 4),
+            "changed_sections": changed,
+            "subscribers_sent": sent,
+            "snapshot_bytes": len(snapshot),
+            "delta_bytes": len(delta) if delta is not None else 0
+        }
+        return self.last_tick
+
+    def _frame(self, event: str, names, sections: Dict[str, bytes]) -> bytes:
+        body = b",".join(dumps(name) + b":" + sections[name] for name in names)
+        data = b'{"sequence":%d,"generated_at":%s,"sections":{%s}}' % (
+            self.sequence, dumps(datetime.now().isoformat()), body
+        )
+        return b"id: %d\nevent: %s\ndata: %s\n\n" % (self.sequence, event.encode(), data)
+
+    def status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            "subscribers": len(self._subscribers),
+            "max_subscribers": self.max_subscribers,
+            "interval_seconds": self.interval_seconds,
+            "min_interval_seconds": self.min_interval_seconds,
+            "queue_size": self.queue_size,
+            "ticks": self.ticks,
+            "failures": self.failures,
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "resyncs": sum(subscription.resyncs for subscription in self._subscribers),
+            "last_tick": self.last_tick
+        }
+
+
+dashboard_broadcaster = DashboardBroadcaster(
+    interval_seconds=float(os.getenv("LIVE_UPDATES_INTERVAL_SECONDS", "30")),
+    min_interval_seconds=float(os.getenv("LIVE_UPDATES_MIN_INTERVAL_SECONDS", "1")),
+    queue_size=int(os.getenv("LIVE_UPDATES_QUEUE_SIZE", "16")),
+    max_subscribers=int(os.getenv("LIVE_UPDATES_MAX_SUBSCRIBERS", "1000")),
+    enabled=os.getenv("LIVE_UPDATES_ENABLED", "true").lower() == "true"
+)
+
+data_version.on_change(dashboard_broadcaster.notify)
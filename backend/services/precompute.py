@@ -0,0 +1,334 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import delete, func, insert
+from sqlalchemy.orm import Session
+from models.database import Forecast, RiskSnapshot, SessionLocal
+from services.data_version import data_version
+from services.forecasting import ForecastingService
+from services.segment_registry import segment_registry
+
+logger = logging.getLogger(__name__)
+
+RISK_FACTORS = ("load_variability", "anomaly_detected", "load_level", "current_load_mw", "avg_load_mw")
+
+
+class PrecomputedRun(NamedTuple):
+    """Forecasts and risk scores of every segment computed at one point in time"""
+    computed_at: datetime
+    forecasts: Dict[str, List[Dict]]
+    risks: Dict[str, Dict]
+
+
+class PrecomputedResults:
+    """Latest precomputed run, held in memory and persisted to forecasts/risk_snapshots.
+
+    Lookups follow the result cache convention of returning hits and misses,
+    so callers compute only the segments the run does not cover. A run older
+    than ``max_age`` is ignored entirely, and a segment that received
+    readings in this process after the run was computed is a miss, so new
+    data is reflected at once rather than at the next run. Forecasts are stored for
+    ``forecast_hours`` ahead and served from the first hour still in the
+    future, so a run keeps answering shorter horizons as it ages.
+    """
+
+    def __init__(self, max_age: timedelta = timedelta(minutes=15)):
+        self.max_age = max_age
+        self._run: Optional[PrecomputedRun] = None
+        self._written_at: Dict[str, datetime] = {}
+
+    @property
+    def latest(self) -> Optional[PrecomputedRun]:
+        return self._run
+
+    @property
+    def computed_at(self) -> Optional[datetime]:
+        run = self._run
+        return run.computed_at if run else None
+
+    def is_fresh(self, now: Optional[datetime] = None) -> bool:
+        return self._fresh_run(now or datetime.now()) is not None
+
+    def _fresh_run(self, now: datetime) -> Optional[PrecomputedRun]:
+        run = self._run
+        if run is None or now - run.computed_at > self.max_age:
+            return None
+        return run
+
+    def publish(self, run: PrecomputedRun):
+        self._run = run
+        data_version.bump()
+
+    def clear(self):
+        self._run = None
+        data_version.bump()
+
+    def mark_written(self, segments):
+        """Record that segments received readings; runs computed before now stop serving them"""
+        now = datetime.now()
+        for segment in segments:
+            self._written_at[segment] = now
+
+    def _covers(self, run: PrecomputedRun, segment: str) -> bool:
+        written_at = self._written_at.get(segment)
+        return written_at is None or written_at < run.computed_at
+
+    def lookup_forecasts(
+        self,
+        segments: List[str],
+        hours: int,
+        now: Optional[datetime] = None
+    ) -> Tuple[Dict[str, List[Dict]], List[str], Optional[datetime]]:
+        """Split segments into precomputed forecasts for the next ``hours`` and misses"""
+        now = now or datetime.now()
+        run = self._fresh_run(now)
+        if run is None:
+            return {}, list(segments), None
+        hits, missing = {}, []
+        for segment in segments:
+            forecast = run.forecasts.get(segment)
+            start = 0
+            while forecast is not None and start < len(forecast) and forecast[start]["timestamp"] <= now:
+                start += 1
+            if forecast is None or len(forecast) - start < hours or not self._covers(run, segment):
+                missing.append(segment)
+            else:
+                hits[segment] = forecast[start:start + hours]
+        return hits, missing, run.computed_at
+
+    def lookup_risks(
+        self,
+        segments: List[str],
+        now: Optional[datetime] = None
+    ) -> Tuple[Dict[str, Dict], List[str], Optional[datetime]]:
+        """Split segments into precomputed risk scores and misses"""
+        run = self._fresh_run(now or datetime.now())
+        if run is None:
+            return {}, list(segments), None
+        hits = {
+            segment: run.risks[segment] for segment in segments
+            if segment in run.risks and self._covers(run, segment)
+        }
+        return hits, [segment for segment in segments if segment not in hits], run.computed_at
+
+    @staticmethod
+    def freshness(computed_at: Optional[datetime], missing: int, total: int) -> Dict:
+        """Describe where a response's forecasts or risks came from"""
+        if computed_at is None or missing == total:
+            return {"source": "on_demand", "computed_at": datetime.now().isoformat()}
+        return {
+            "source": "precomputed" if missing == 0 else "mixed",
+            "computed_at": computed_at.isoformat(),
+            "age_seconds": round((datetime.now() - computed_at).total_seconds(), 1)
+        }
+
+    async def forecasts_async(self, session, segments: List[str], hours: int) -> Tuple[Dict[str, List[Dict]], Dict]:
+        """Forecasts for segments from the latest run, computing only the segments it cannot serve"""
+        hits, missing, computed_at = self.lookup_forecasts(segments, hours)
+        if missing:
+            hits.update(await ForecastingService.forecast_demand_batch_async(session, missing, hours))
+        return {segment: hits[segment] for segment in segments}, self.freshness(computed_at, len(missing), len(segments))
+
+    def persist(self, db: Session, run: PrecomputedRun) -> int:
+        """Write a run and drop older runs in one transaction; returns the number of forecast rows"""
+        forecast_rows = [
+            {
+                "timestamp": point["timestamp"],
+                "forecast_hours": step,
+                "predicted_load_mw": point["predicted_load_mw"],
+                "confidence_interval_lower": point["confidence_lower"],
+                "confidence_interval_upper": point["confidence_upper"],
+                "grid_segment": segment,
+                "created_at": run.computed_at
+            }
+            for segment, forecast in run.forecasts.items()
+            for step, point in enumerate(forecast, 1)
+        ]
+        risk_rows = [
+            {
+                "computed_at": run.computed_at,
+                "grid_segment": segment,
+                "risk_score": risk["risk_score"],
+                **{factor: risk["factors"].get(factor) for factor in RISK_FACTORS}
+            }
+            for segment, risk in run.risks.items()
+        ]
+        if forecast_rows:
+            db.execute(insert(Forecast), forecast_rows)
+        if risk_rows:
+            db.execute(insert(RiskSnapshot), risk_rows)
+        db.execute(delete(Forecast).where(Forecast.created_at < run.computed_at))
+        db.execute(delete(RiskSnapshot).where(RiskSnapshot.computed_at < run.computed_at))
+        db.commit()
+        return len(forecast_rows)
+
+    @staticmethod
+    def latest_computed_at(db: Session) -> Optional[datetime]:
+        return db.query(func.max(RiskSnapshot.computed_at)).scalar()
+
+    def load_latest(self, db: Session) -> Optional[PrecomputedRun]:
+        """Adopt the newest persisted run if it is newer than the one in memory"""
+        computed_at = self.latest_computed_at(db)
+        if computed_at is None or (self.computed_at is not None and computed_at <= self.computed_at):
+            return None
+
+        forecasts: Dict[str, List[Dict]] = {}
+        rows = db.query(Forecast).filter(Forecast.created_at == computed_at).order_by(
+            Forecast.grid_segment, Forecast.forecast_hours
+        ).all()
+        for row in rows:
+            forecasts.setdefault(row.grid_segment, []).append({
+                "timestamp": row.timestamp,
+                "predicted_load_mw": row.predicted_load_mw,
+                "confidence_lower": row.confidence_interval_lower,
+                "confidence_upper": row.confidence_interval_upper
+            })
+
+        risks = {}
+        for row in db.query(RiskSnapshot).filter(RiskSnapshot.computed_at == computed_at).all():
+            factors = {factor: getattr(row, factor) for factor in RISK_FACTORS}
+            if factors["current_load_mw"] is None:
+                # Segments without readings carry only the three scored factors
+                del factors["current_load_mw"], factors["avg_load_mw"]
+            risks[row.grid_segment] = {"risk_score": row.risk_score, "factors": factors}
+
+        run = PrecomputedRun(computed_at, forecasts, risks)
+        self.publish(run)
+        return run
+
+
+class PrecomputeScheduler:
+    """In-process asyncio loop that precomputes forecasts and risk scores for every segment.
+
+    Each tick runs in a worker thread with its own session. When another
+    worker already persisted a run within the current interval, that run is
+    loaded instead of computing a new one, so several workers sharing a
+    database do roughly one computation per interval between them.
+    """
+
+    def __init__(
+        self,
+        results: PrecomputedResults,
+        interval_seconds: float = 300.0,
+        forecast_hours: int = 48,
+        enabled: bool = True
+    ):
+        self.results = results
+        self.interval_seconds = interval_seconds
+        self.forecast_hours = forecast_hours
+        self.enabled = enabled
+        self.runs = 0
+        self.failures = 0
+        self.last_run: Optional[Dict] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._forced = False
+
+    def start(self):
+        if not self.enabled or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def trigger(self):
+        """Discard the current run and recompute as soon as possible (safe to call from any thread)
+
+        Used after bulk changes such as a data backfill, so stale results are
+        not served until the next scheduled tick.
+        """
+        self.results.clear()
+        self._forced = True
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run_forever(self):
+        while True:
+            forced, self._forced = self._forced, False
+            try:
+                await asyncio.to_thread(self.run_once, forced)
+            except Exception:
+                self.failures += 1
+                logger.exception("Precompute run failed")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def run_once(self, force: bool = True) -> Dict:
+        """Compute, persist and publish one run, or adopt a recent run persisted by another worker"""
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            if not force:
+                latest = self.results.latest_computed_at(db)
+                if latest is not None and datetime.now() - latest < timedelta(seconds=self.interval_seconds):
+                    run = self.results.load_latest(db) or self.results.latest
+                    if run is not None:
+                        return self._record(run, "adopted", started, 0)
+
+            computed_at = datetime.now()
+            segments = list(segment_registry.names)
+            run = PrecomputedRun(
+                computed_at,
+                ForecastingService.forecast_demand_batch(db, segments, self.forecast_hours),
+                ForecastingService.segment_risks(db, segments)
+            )
+            forecast_rows = self.results.persist(db, run)
+            self.results.publish(run)
+            return self._record(run, "computed", started, forecast_rows)
+        finally:
+            db.close()
+
+    def _record(self, run: PrecomputedRun, source: str, started: float, forecast_rows: int) -> Dict:
+        self.runs += 1
+        self.last_run = {
+            "source": source,
+            "computed_at": run.computed_at.isoformat(),
+            "duration_seconds": round(time.perf_counter() - started, 3),
+            "segments": len(run.risks),
+            "forecast_rows": forecast_rows
+        }
+        return self.last_run
+
+    def status(self) -> Dict:
+        computed_at = self.results.computed_at
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            "interval_seconds": self.interval_seconds,
+            "forecast_hours": self.forecast_hours,
+            "max_age_seconds": self.results.max_age.total_seconds(),
+            "fresh": self.results.is_fresh(),
+            "computed_at": computed_at.isoformat() if computed_at else None,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run": self.last_run
+        }
+
+
+precomputed_results = PrecomputedResults(
+    max_age=timedelta(seconds=float(os.getenv("PRECOMPUTE_MAX_AGE_SECONDS", "900")))
+)
+
+precompute_scheduler = PrecomputeScheduler(
+    precomputed_results,
+    interval_seconds=float(os.getenv("PRECOMPUTE_INTERVAL_SECONDS", "300")),
+    forecast_hours=int(os.getenv("PRECOMPUTE_FORECAST_HOURS", "48")),
+    enabled=os.getenv("PRECOMPUTE_ENABLED", "true").lower() == "true"
+)
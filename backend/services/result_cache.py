@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Tuple
+
+
+class ResultCache:
+    """LRU/TTL cache for per-segment analytics results keyed by data watermark.
+
+    Keys are (kind, segment, horizon, watermark). A segment's watermark is
+    bumped whenever readings for it are written, which makes every older
+    entry for that segment unreachable; those entries are also dropped
+    eagerly. The TTL bounds staleness for writes made by other processes.
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 300.0, enabled: bool = True):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._keys_by_segment: Dict[str, set] = {}
+        self._watermarks: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def watermark(self, segment: str) -> int:
+        return self._watermarks.get(segment, 0)
+
+    def lookup(
+        self,
+        kind: Hashable,
+        segments: Iterable[str],
+        horizon: int
+    ) -> Tuple[Dict[str, Any], List[str], Dict[str, int]]:
+        """Split segments into cached results and misses.
+
+        Also returns the watermark of every segment as seen before computing,
+        to be passed back to ``store`` so results computed while new data
+        arrived are never stored under the newer watermark.
+        """
+        hits, missing, watermarks = {}, [], {}
+        now = time.monotonic()
+        with self._lock:
+            for segment in segments:
+                watermark = self._watermarks.get(segment, 0)
+                watermarks[segment] = watermark
+                key = (kind, segment, horizon, watermark)
+                entry = self._entries.get(key) if self.enabled else None
+                if entry is not None and now - entry[0] <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    hits[segment] = entry[1]
+                    self.hits += 1
+                else:
+                    if entry is not None:
+                        self._drop(key)
+                    missing.append(segment)
+                    self.misses += 1
+        return hits, missing, watermarks
+
+    def store(self, kind: Hashable, horizon: int, results: Dict[str, Any], watermarks: Dict[str, int]):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for segment, value in results.items():
+                if watermarks.get(segment) != self._watermarks.get(segment, 0):
+                    # Data changed while computing; the result is already stale
+                    continue
+                key = (kind, segment, horizon, watermarks[segment])
+                self._entries[key] = (now, value)
+                self._entries.move_to_end(key)
+                self._keys_by_segment.setdefault(segment, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate_segments(self, segments: Iterable[str]):
+        """Advance the watermark of segments that received new readings and drop their entries"""
+        with self._lock:
+            for segment in set(segments):
+                self._watermarks[segment] = self._watermarks.get(segment, 0) + 1
+                for key in self._keys_by_segment.pop(segment, ()):
+                    if self._entries.pop(key, None) is not None:
+                        self.invalidations += 1
+
+    def _drop(self, key: Tuple):
+        self._entries.pop(key, None)
+        keys = self._keys_by_segment.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_segment.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+result_cache = ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "4096")),
+    ttl_seconds=float(os.getenv("RESULT_CACHE_TTL_SECONDS", "300")),
+    enabled=os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+)
@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, NamedTuple, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from models.database import GridLoad, GridLoadRollup, SessionLocal
+from services.data_version import data_version
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionPolicy(NamedTuple):
+    """How long each granularity of load data is kept; ``None`` keeps it forever.
+
+    Raw readings are folded into the hourly, daily and weekly rollups as they
+    are written, so deleting an old raw row only loses its exact timestamp
+    and value, not its contribution to the downsampled history.
+    """
+    raw_days: Optional[int] = 90
+    hourly_days: Optional[int] = 365
+    batch_rows: int = 5000
+    batch_pause_seconds: float = 0.05
+    vacuum_pages: int = 2000
+
+    def cutoff(self, days: Optional[int], now: datetime) -> Optional[datetime]:
+        return None if days is None else now - timedelta(days=days)
+
+    def finest_resolution(self, start_time: datetime, now: Optional[datetime] = None) -> str:
+        """Finest resolution still complete for a range starting at ``start_time``"""
+        now = now or datetime.now()
+        if self.raw_days is None or start_time >= now - timedelta(days=self.raw_days):
+            return "raw"
+        if self.hourly_days is None or start_time >= now - timedelta(days=self.hourly_days):
+            return "hour"
+        return "day"
+
+
+class RetentionJob:
+    """Background job that applies the retention policy and reclaims the freed space.
+
+    Expired rows are deleted in batches of ``batch_rows``, each in its own
+    short transaction with a pause in between, so ingest never waits behind
+    one long delete. On SQLite the freed pages are then released with
+    ``PRAGMA incremental_vacuum``, also in bounded steps; this needs
+    ``auto_vacuum=INCREMENTAL``, which new databases get and existing ones
+    only get after a one-off ``VACUUM``. Other databases leave space
+    reclamation to their own autovacuum.
+    """
+
+    def __init__(self, policy: RetentionPolicy, interval_seconds: float = 21600.0, enabled: bool = True):
+        self.policy = policy
+        self.interval_seconds = interval_seconds
+        self.enabled = enabled
+        self.runs = 0
+        self.failures = 0
+        self.last_run: Optional[Dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if not self.enabled or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception:
+                self.failures += 1
+                logger.exception("Retention run failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    def run_once(self, now: Optional[datetime] = None) -> Dict:
+        """Delete expired raw readings and hourly rollups, then vacuum; returns a report"""
+        started = time.perf_counter()
+        now = now or datetime.now()
+        db = SessionLocal()
+        try:
+            size_before = self._database_bytes(db)
+            raw_cutoff = self.policy.cutoff(self.policy.raw_days, now)
+            hourly_cutoff = self.policy.cutoff(self.policy.hourly_days, now)
+            deleted_raw = self._delete_batches(db, GridLoad, GridLoad.timestamp < raw_cutoff) if raw_cutoff else 0
+            deleted_hourly = self._delete_batches(
+                db,
+                GridLoadRollup,
+                (GridLoadRollup.resolution == "hour") & (GridLoadRollup.bucket_start < hourly_cutoff)
+            ) if hourly_cutoff else 0
+            if deleted_raw or deleted_hourly:
+                data_version.bump()
+            vacuum = self._vacuum(db)
+            size_after = self._database_bytes(db)
+        finally:
+            db.close()
+
+        self.runs += 1
+        self.last_run = {
+            "started_at": now.isoformat(),
+            "duration_seconds": round(time.perf_counter() - started, 3),
+            "raw_cutoff": raw_cutoff.isoformat() if raw_cutoff else None,
+            "hourly_rollup_cutoff": hourly_cutoff.isoformat() if hourly_cutoff else None,
+            "deleted_raw_rows": deleted_raw,
+            "deleted_hourly_rollups": deleted_hourly,
+            "vacuum": vacuum,
+            "database_bytes_before": size_before,
+            "database_bytes_after": size_after,
+            "reclaimed_bytes": size_before - size_after if size_before is not None and size_after is not None else None
+        }
+        if deleted_raw or deleted_hourly:
+            logger.info(
+                f"Retention removed {deleted_raw} raw readings and {deleted_hourly} hourly rollups "
+                f"in {self.last_run['duration_seconds']}s"
+            )
+        return self.last_run
+
+    def _delete_batches(self, db: Session, model, condition) -> int:
+        """Delete matching rows ``batch_rows`` at a time, committing after each batch"""
+        total = 0
+        while True:
+            ids = db.execute(select(model.id).where(condition).limit(self.policy.batch_rows)).scalars().all()
+            if not ids:
+                return total
+            db.execute(delete(model).where(model.id.in_(ids)))
+            db.commit()
+            total += len(ids)
+            if len(ids) < self.policy.batch_rows:
+                return total
+            # Lets queued writers take the database lock between batches
+            time.sleep(self.policy.batch_pause_seconds)
+
+    def _vacuum(self, db: Session) -> Dict:
+        if db.get_bind().dialect.name != "sqlite":
+            return {"mode": "server"}
+        if self._pragma(db, "auto_vacuum") != 2:
+            report = {"mode": "unavailable", "free_pages": self._pragma(db, "freelist_count")}
+        else:
+            released = 0
+            while True:
+                free_pages = self._pragma(db, "freelist_count")
+                if not free_pages:
+                    break
+                step = min(free_pages, self.policy.vacuum_pages)
+                # The pragma frees one page per statement step and sqlite3's
+                # execute() only steps once; executescript() runs it to completion
+                db.connection().connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({step});")
+                db.commit()
+                freed = free_pages - self._pragma(db, "freelist_count")
+                if freed <= 0:
+                    break
+                released += freed
+                time.sleep(self.policy.batch_pause_seconds)
+            report = {"mode": "incremental", "released_pages": released}
+        # The deletes went through the WAL; truncate it so the file shrinks back
+        self._pragma(db, "wal_checkpoint(TRUNCATE)")
+        return report
+
+    @staticmethod
+    def _pragma(db: Session, name: str) -> Optional[int]:
+        value = db.connection().exec_driver_sql(f"PRAGMA {name}").scalar()
+        db.commit()
+        return value
+
+    @staticmethod
+    def _database_bytes(db: Session) -> Optional[int]:
+        """Size of the database file plus its WAL, for SQLite file databases"""
+        bind = db.get_bind()
+        path = bind.url.database
+        if bind.dialect.name != "sqlite" or not path or path == ":memory:":
+            return None
+        return sum(os.path.getsize(p) for p in (path, f"{path}-wal") if os.path.exists(p))
+
+    def status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            "interval_seconds": self.interval_seconds,
+            "policy": self.policy._asdict(),
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run": self.last_run
+        }
+
+
+def _days(name: str, default: str) -> Optional[int]:
+    value = int(os.getenv(name, default))
+    return value if value > 0 else None
+
+
+retention_policy = RetentionPolicy(
+    raw_days=_days("RETENTION_RAW_DAYS", "90"),
+    hourly_days=_days("RETENTION_HOURLY_DAYS", "365"),
+    batch_rows=int(os.getenv("RETENTION_BATCH_ROWS", "5000")),
+    batch_pause_seconds=float(os.getenv("RETENTION_BATCH_PAUSE_SECONDS", "0.05")),
+    vacuum_pages=int(os.getenv("RETENTION_VACUUM_PAGES", "2000"))
+)
+
+retention_job = RetentionJob(
+    retention_policy,
+    interval_seconds=float(os.getenv("RETENTION_INTERVAL_SECONDS", "21600")),
+    enabled=os.getenv("RETENTION_ENABLED", "true").lower() == "true"
+)
@@ -0,0 +1,248 @@
+import math
+import os
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from models.database import GridLoad
+
+
+class SlidingWindowStats:
+    """Mean, variance and max of the readings inside a trailing time window.
+
+    Readings enter and leave the window through Welford updates, and the max
+    is kept with a monotonic deque, so every operation is amortized O(1).
+    The running sums are recomputed exactly every ``RESYNC_INTERVAL`` updates
+    so floating-point drift from removals cannot accumulate.
+    """
+
+    RESYNC_INTERVAL = 10000
+
+    def __init__(self, window: timedelta):
+        self.window = window
+        self._readings: deque = deque()
+        # (sequence number, value) pairs with decreasing values
+        self._max: deque = deque()
+        self._first_seq = 0
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._updates = 0
+
+    def push(self, timestamp: datetime, value: float):
+        self.extend([(timestamp, value)])
+
+    def extend(self, readings: List):
+        """Add (timestamp, value) readings in any order
+
+        Readings at or after the newest one held are appended one by one. If
+        any reading is late, the batch is merged in timestamp order and the
+        window recomputed once, so a backfill costs one rebuild per call
+        rather than one per late reading.
+        """
+        if not readings:
+            return
+        readings = sorted(readings, key=lambda reading: reading[0])
+        if self._readings and readings[0][0] < self._readings[-1][0]:
+            self._rebuild(sorted([*self._readings, *readings], key=lambda reading: reading[0]))
+            return
+        for timestamp, value in readings:
+            self._append(timestamp, value)
+
+    def _append(self, timestamp: datetime, value: float):
+        seq = self._first_seq + len(self._readings)
+        self._readings.append((timestamp, value))
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((seq, value))
+        self._tick()
+
+    def expire(self, now: datetime):
+        """Drop readings older than ``now - window``"""
+        start = now - self.window
+        while self._readings and self._readings[0][0] < start:
+            _, value = self._readings.popleft()
+            if self._max and self._max[0][0] == self._first_seq:
+                self._max.popleft()
+            self._first_seq += 1
+            self.count -= 1
+            if self.count == 0:
+                self.mean, self._m2 = 0.0, 0.0
+                continue
+            delta = value - self.mean
+            self.mean -= delta / self.count
+            self._m2 -= delta * (value - self.mean)
+            self._tick()
+
+    def _tick(self):
+        self._updates += 1
+        if self._updates >= self.RESYNC_INTERVAL:
+            self._rebuild(list(self._readings))
+
+    def _rebuild(self, readings: List):
+        self._readings = deque()
+        self._max = deque()
+        self._first_seq = 0
+        self.count, self.mean, self._m2 = 0, 0.0, 0.0
+        self._updates = 0
+        if not readings:
+            return
+        values = np.fromiter((value for _, value in readings), dtype=np.float64, count=len(readings))
+        self._readings = deque(readings)
+        self.count = len(values)
+        self.mean = float(np.mean(values))
+        self._m2 = float(np.sum((values - self.mean) ** 2))
+        for seq, (_, value) in enumerate(readings):
+            while self._max and self._max[-1][1] <= value:
+                self._max.pop()
+            self._max.append((seq, value))
+
+    @property
+    def latest(self) -> Optional[float]:
+        return self._readings[-1][1] if self._readings else None
+
+    @property
+    def max(self) -> Optional[float]:
+        return self._max[0][1] if self._max else None
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation, matching np.std"""
+        if self.count == 0:
+            return 0.0
+        variance = self._m2 / self.count
+        # Removals can leave a tiny residue where the exact variance is zero
+        if variance <= 1e-12 * max(self.mean * self.mean, 1.0):
+            return 0.0
+        return math.sqrt(variance)
+
+    def values(self) -> np.ndarray:
+        return np.fromiter((value for _, value in self._readings), dtype=np.float64, count=len(self._readings))
+
+
+class RiskStats:
+    """Per-segment streaming statistics over the outage risk window.
+
+    Warmed from ``grid_loads`` at startup and fed every committed reading, so
+    risk scores can be read without querying the database. Like the
+    time-series store this is process-local; readers get None until it is
+    warm and fall back to the batch computation.
+
+    With ``verify`` enabled, callers compare each streaming result against
+    the batch formulas and log any difference.
+    """
+
+    ANOMALY_MIN_READINGS = 10
+    ANOMALY_Z_THRESHOLD = 2.5
+
+    def __init__(self, window: timedelta = timedelta(hours=24), enabled: bool = True, verify: bool = False):
+        self.window = window
+        self.enabled = enabled
+        self.verify = verify
+        self.ready = False
+        self._stats: Dict[str, SlidingWindowStats] = {}
+        self._lock = threading.Lock()
+
+    def _segment(self, segment: str) -> SlidingWindowStats:
+        stats = self._stats.get(segment)
+        if stats is None:
+            stats = SlidingWindowStats(self.window)
+            self._stats[segment] = stats
+        return stats
+
+    def warm(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Load the current window of every segment with one query"""
+        if not self.enabled:
+            return 0
+
+        start = (now or datetime.now()) - self.window
+        rows = db.query(GridLoad.grid_segment, GridLoad.timestamp, GridLoad.load_mw).filter(
+            GridLoad.timestamp >= start
+        ).order_by(GridLoad.grid_segment, GridLoad.timestamp.asc(), GridLoad.id.asc()).all()
+
+        with self._lock:
+            self._stats = {}
+            for segment, timestamp, load_mw in rows:
+                self._segment(segment).push(timestamp, load_mw)
+            self.ready = True
+        return len(rows)
+
+    def record_rows(self, rows: List[Dict]):
+        """Add newly written readings given as grid_loads row dicts"""
+        if not self.ready:
+            return
+        now = datetime.now()
+        start = now - self.window
+        # Backfilled readings that are already outside the window are never scored
+        grouped: Dict[str, List] = {}
+        for row in rows:
+            if row["timestamp"] >= start:
+                grouped.setdefault(row["grid_segment"], []).append((row["timestamp"], row["load_mw"]))
+        with self._lock:
+            for segment, readings in grouped.items():
+                stats = self._segment(segment)
+                stats.extend(readings)
+                stats.expire(now)
+
+    def summary(self, segment: str, now: Optional[datetime] = None) -> Optional[Dict]:
+        """Window statistics of a segment, or None to fall back to the batch path"""
+        if not (self.enabled and self.ready):
+            return None
+        with self._lock:
+            stats = self._segment(segment)
+            stats.expire(now or datetime.now())
+            if stats.count == 0:
+                return {"count": 0}
+            std = stats.std
+            current = stats.latest
+            anomaly = (
+                stats.count >= self.ANOMALY_MIN_READINGS
+                and std != 0
+                and abs((current - stats.mean) / std) > self.ANOMALY_Z_THRESHOLD
+            )
+            return {
+                "count": stats.count,
+                "current": current,
+                "mean": stats.mean,
+                "std": std,
+                "max": stats.max,
+                "anomaly": anomaly
+            }
+
+    def values(self, segment: str, now: Optional[datetime] = None) -> Optional[np.ndarray]:
+        """Raw readings currently in a segment's window, for verification"""
+        if not (self.enabled and self.ready):
+            return None
+        with self._lock:
+            stats = self._segment(segment)
+            stats.expire(now or datetime.now())
+            return stats.values()
+
+
+def compare_risks(streaming: Dict, batch: Dict) -> List[str]:
+    """Differences between a streaming and a batch risk result"""
+    differences = []
+    if streaming["risk_score"] != batch["risk_score"]:
+        differences.append(f"risk_score {streaming['risk_score']} != {batch['risk_score']}")
+    for name, value in batch["factors"].items():
+        other = streaming["factors"].get(name)
+        if isinstance(value, float) and isinstance(other, float):
+            # Factors are rounded, so the last digit may legitimately differ
+            if not math.isclose(value, other, rel_tol=1e-9, abs_tol=0.0011):
+                differences.append(f"{name} {other} != {value}")
+        elif value != other:
+            differences.append(f"{name} {other} != {value}")
+    return differences
+
+
+risk_stats = RiskStats(
+    enabled=os.getenv("RISK_STATS_ENABLED", "true").lower() == "true",
+    verify=os.getenv("RISK_STATS_VERIFY", "false").lower() == "true"
+)
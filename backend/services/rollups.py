@@ -0,0 +1,258 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from models.database import GridLoad, GridLoadRollup
+
+
+class RollupService:
+    """Hourly, daily and weekly min/max/mean/count rollups of grid_loads.
+
+    Rollups are updated incrementally in the same transaction as the raw
+    rows they summarise, so reading a year of history never has to scan the
+    raw table.
+    """
+
+    RESOLUTIONS = {
+        "hour": timedelta(hours=1),
+        "day": timedelta(days=1),
+        "week": timedelta(weeks=1)
+    }
+
+    REBUILD_BATCH_ROWS = 50000
+
+    @staticmethod
+    def bucket_starts(timestamps: np.ndarray, resolution: str) -> np.ndarray:
+        """Floor datetime64 timestamps to the start of their bucket (weeks start on Monday)"""
+        if resolution == "hour":
+            return timestamps.astype("datetime64[h]").astype("datetime64[us]")
+        days = timestamps.astype("datetime64[D]")
+        if resolution == "week":
+            # 1970-01-01 was a Thursday, three days after a Monday
+            days = days - (days.astype(np.int64) + 3) % 7
+        return days.astype("datetime64[us]")
+
+    @staticmethod
+    def aggregate(rows: List[Dict], resolution: str) -> List[Dict]:
+        """Aggregate row dicts into one partial rollup per (segment, bucket)"""
+        segments = sorted({row["grid_segment"] for row in rows})
+        index = {segment: i for i, segment in enumerate(segments)}
+        segment_idx = np.fromiter((index[row["grid_segment"]] for row in rows), dtype=np.int64, count=len(rows))
+        timestamps = np.array([row["timestamp"] for row in rows], dtype="datetime64[us]")
+        loads = np.fromiter((row["load_mw"] for row in rows), dtype=np.float64, count=len(rows))
+        temperatures = np.array(
+            [np.nan if row.get("temperature") is None else row["temperature"] for row in rows],
+            dtype=np.float64
+        )
+
+        buckets = RollupService.bucket_starts(timestamps, resolution)
+        keys = np.stack((segment_idx, buckets.astype(np.int64)), axis=1)
+        unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        groups = len(unique_keys)
+
+        load_min = np.full(groups, np.inf)
+        load_max = np.full(groups, -np.inf)
+        np.minimum.at(load_min, inverse, loads)
+        np.maximum.at(load_max, inverse, loads)
+        has_temperature = ~np.isnan(temperatures)
+
+        return [
+            {
+                "resolution": resolution,
+                "grid_segment": segments[seg],
+                "bucket_start": bucket.astype(datetime),
+                "load_min": lo,
+                "load_max": hi,
+                "load_sum": total,
+                "load_count": count,
+                "temperature_sum": temp_total,
+                "temperature_count": temp_count
+            }
+            for seg, bucket, lo, hi, total, count, temp_total, temp_count in zip(
+                unique_keys[:, 0].tolist(),
+                unique_keys[:, 1].astype("datetime64[us]"),
+                load_min.tolist(),
+                load_max.tolist(),
+                np.bincount(inverse, weights=loads, minlength=groups).tolist(),
+                np.bincount(inverse, minlength=groups).tolist(),
+                np.bincount(inverse, weights=np.where(has_temperature, temperatures, 0), minlength=groups).tolist(),
+                np.bincount(inverse, weights=has_temperature, minlength=groups).astype(np.int64).tolist()
+            )
+        ]
+
+    @staticmethod
+    def apply(db: Session, rows: List[Dict]):
+        """Merge newly inserted raw rows into every rollup (caller commits)"""
+        if not rows:
+            return
+        dialect = db.get_bind().dialect.name
+        for resolution in RollupService.RESOLUTIONS:
+            partials = RollupService.aggregate(rows, resolution)
+            if dialect in ("sqlite", "postgresql"):
+                RollupService._upsert(db, partials, dialect)
+            else:
+                RollupService._merge(db, partials)
+
+    @staticmethod
+    def _upsert(db: Session, partials: List[Dict], dialect: str):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+            least, greatest = func.min, func.max
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+            least, greatest = func.least, func.greatest
+
+        table = GridLoadRollup.__table__
+        statement = insert(table)
+        excluded = statement.excluded
+        statement = statement.on_conflict_do_update(
+            index_elements=["resolution", "grid_segment", "bucket_start"],
+            set_={
+                "load_min": least(table.c.load_min, excluded.load_min),
+                "load_max": greatest(table.c.load_max, excluded.load_max),
+                "load_sum": table.c.load_sum + excluded.load_sum,
+                "load_count": table.c.load_count + excluded.load_count,
+                "temperature_sum": table.c.temperature_sum + excluded.temperature_sum,
+                "temperature_count": table.c.temperature_count + excluded.temperature_count
+            }
+        )
+        db.execute(statement, partials)
+
+    @staticmethod
+    def _merge(db: Session, partials: List[Dict]):
+        """Portable read-modify-write fallback for dialects without ON CONFLICT"""
+        for partial in partials:
+            existing = db.query(GridLoadRollup).filter(
+                GridLoadRollup.resolution == partial["resolution"],
+                GridLoadRollup.grid_segment == partial["grid_segment"],
+                GridLoadRollup.bucket_start == partial["bucket_start"]
+            ).first()
+            if existing is None:
+                db.add(GridLoadRollup(**partial))
+                continue
+            existing.load_min = min(existing.load_min, partial["load_min"])
+            existing.load_max = max(existing.load_max, partial["load_max"])
+            existing.load_sum += partial["load_sum"]
+            existing.load_count += partial["load_count"]
+            existing.temperature_sum += partial["temperature_sum"]
+            existing.temperature_count += partial["temperature_count"]
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """Recompute all rollups from grid_loads in keyset-paged batches"""
+        db.query(GridLoadRollup).delete()
+        db.commit()
+
+        last_id = 0
+        total = 0
+        while True:
+            batch = db.query(
+                GridLoad.id, GridLoad.timestamp, GridLoad.load_mw, GridLoad.temperature, GridLoad.grid_segment
+            ).filter(
+                GridLoad.id > last_id,
+                GridLoad.timestamp.isnot(None),
+                GridLoad.load_mw.isnot(None),
+                GridLoad.grid_segment.isnot(None)
+            ).order_by(GridLoad.id).limit(RollupService.REBUILD_BATCH_ROWS).all()
+            if not batch:
+                break
+            RollupService.apply(db, [row._asdict() for row in batch])
+            db.commit()
+            last_id = batch[-1].id
+            total += len(batch)
+        return total
+
+    @staticmethod
+    def rebuild_if_missing(db: Session) -> int:
+        """Build rollups for databases that predate them"""
+        has_rollups = db.execute(select(GridLoadRollup.id).limit(1)).first() is not None
+        has_loads = db.execute(select(GridLoad.id).limit(1)).first() is not None
+        if has_rollups or not has_loads:
+            return 0
+        return RollupService.rebuild(db)
+
+    @staticmethod
+    def choose_resolution(
+        span: timedelta, n_segments: int, max_points: int, raw_count: int, finest: str = "raw"
+    ) -> str:
+        """Finest resolution (raw first, or ``finest`` first) whose point count fits in max_points"""
+        if finest == "raw" and raw_count <= max_points:
+            return "raw"
+        resolutions = list(RollupService.RESOLUTIONS)
+        start = resolutions.index(finest) if finest in resolutions else 0
+        for resolution in resolutions[start:]:
+            if RollupService.point_count(span, n_segments, resolution) <= max_points:
+                return resolution
+        return "week"
+
+    @staticmethod
+    def point_count(span: timedelta, n_segments: int, resolution: str) -> int:
+        """Upper bound on the rollup points a range of ``span`` holds at ``resolution``"""
+        return n_segments * (span // RollupService.RESOLUTIONS[resolution] + 1)
+
+    @staticmethod
+    def query(
+        db: Session,
+        resolution: str,
+        start_time: datetime,
+        segment: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Rollup points since start_time, ordered by bucket then segment (the first ``limit`` of them)"""
+        query = db.query(GridLoadRollup).filter(
+            GridLoadRollup.resolution == resolution,
+            GridLoadRollup.bucket_start >= RollupService.bucket_starts(
+                np.array([start_time], dtype="datetime64[us]"), resolution
+            )[0].astype(datetime)
+        )
+        if segment:
+            query = query.filter(GridLoadRollup.grid_segment == segment)
+        query = query.order_by(GridLoadRollup.bucket_start.asc(), GridLoadRollup.grid_segment)
+        if limit is not None:
+            query = query.limit(limit)
+
+        return [
+            {
+                "timestamp": rollup.bucket_start.isoformat(),
+                "load_mw": round(rollup.load_sum / rollup.load_count, 2) if rollup.load_count else 0.0,
+                "temperature": (
+                    round(rollup.temperature_sum / rollup.temperature_count, 1)
+                    if rollup.temperature_count else None
+                ),
+                "grid_segment": rollup.grid_segment,
+                "load_min": rollup.load_min,
+                "load_max": rollup.load_max,
+                "count": rollup.load_count
+            }
+            for rollup in query.all()
+        ]
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of ``threshold`` points that keep the visual shape"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n) if threshold >= n else np.linspace(0, n - 1, max(threshold, 1)).astype(np.int64)
+
+    # Interior points split into threshold - 2 buckets; first and last are always kept
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+
+    for i in range(threshold - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[next_start:max(next_end, next_start + 1)].mean()
+        next_y = y[next_start:max(next_end, next_start + 1)].mean()
+
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+
+    return selected
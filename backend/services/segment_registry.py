@@ -0,0 +1,148 @@
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from sqlalchemy import true
+from sqlalchemy.orm import Session
+from models.database import GridSegment
+from services.data_version import data_version
+
+# Segment name lists longer than this are not sent as an IN (...) clause;
+# the query scans the time window and unknown segments are dropped in Python
+MAX_IN_CLAUSE = 500
+
+
+class SegmentInfo(NamedTuple):
+    name: str
+    region: Optional[str]
+    capacity_mw: Optional[float]
+    base_load_min: float
+    base_load_max: float
+
+    def to_dict(self) -> Dict:
+        return self._asdict()
+
+
+DEFAULT_SEGMENTS = [
+    SegmentInfo("North Zone", None, 450.0, 150.0, 300.0),
+    SegmentInfo("South Zone", None, 600.0, 200.0, 400.0),
+    SegmentInfo("East Zone", None, 525.0, 180.0, 350.0),
+    SegmentInfo("West Zone", None, 480.0, 170.0, 320.0),
+    SegmentInfo("Central Zone", None, 750.0, 250.0, 500.0),
+    SegmentInfo("Industrial District", None, 1200.0, 400.0, 800.0),
+    SegmentInfo("Residential Sector", None, 375.0, 100.0, 250.0),
+]
+
+
+class _RegistryState(NamedTuple):
+    segments: Dict[str, SegmentInfo]
+    names: List[str]
+    by_region: Dict[str, List[str]]
+
+
+class SegmentRegistry:
+    """In-memory index of the grid_segments table.
+
+    Membership checks and metadata lookups are dict lookups, and the ordered
+    name list is shared by every all-segment computation. The index is
+    swapped as a whole on reload, so readers never see a partial update.
+    Until ``load`` is called the built-in default segments are served.
+    """
+
+    def __init__(self, defaults: List[SegmentInfo]):
+        self.defaults = list(defaults)
+        self._state = self._build(self.defaults)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _build(segments: List[SegmentInfo]) -> _RegistryState:
+        by_name = {segment.name: segment for segment in segments}
+        by_region: Dict[str, List[str]] = {}
+        for segment in by_name.values():
+            if segment.region:
+                by_region.setdefault(segment.region, []).append(segment.name)
+        return _RegistryState(by_name, list(by_name), by_region)
+
+    @property
+    def names(self) -> List[str]:
+        return self._state.names
+
+    @property
+    def regions(self) -> List[str]:
+        return sorted(self._state.by_region)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._state.segments
+
+    def __len__(self) -> int:
+        return len(self._state.names)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._state.names)
+
+    def get(self, name: str) -> Optional[SegmentInfo]:
+        return self._state.segments.get(name)
+
+    def base_load_range(self, name: str) -> Tuple[float, float]:
+        segment = self._state.segments[name]
+        return segment.base_load_min, segment.base_load_max
+
+    def select(self, region: Optional[str] = None, q: Optional[str] = None) -> List[str]:
+        """Segment names in registry order, optionally restricted to a region and a name substring"""
+        state = self._state
+        names = state.by_region.get(region, []) if region else state.names
+        if q:
+            needle = q.lower()
+            names = [name for name in names if needle in name.lower()]
+        return names
+
+    def load(self, db: Session) -> int:
+        """Seed the table with the default segments if it is empty, then index every row"""
+        with self._lock:
+            if db.query(GridSegment.id).first() is None:
+                self._insert(db, [segment.to_dict() for segment in self.defaults])
+                db.commit()
+            rows = db.query(GridSegment).order_by(GridSegment.id).all()
+            self._state = self._build([
+                SegmentInfo(row.name, row.region, row.capacity_mw, row.base_load_min, row.base_load_max)
+                for row in rows
+            ])
+            data_version.bump()
+            return len(rows)
+
+    def register(self, db: Session, segments: List[Dict]) -> Dict:
+        """Insert new segments and update the metadata of existing ones, then reload the index"""
+        with self._lock:
+            existing = {
+                row.name: row
+                for row in db.query(GridSegment).filter(
+                    GridSegment.name.in_([segment["name"] for segment in segments])
+                ).all()
+            } if len(segments) <= MAX_IN_CLAUSE else {row.name: row for row in db.query(GridSegment).all()}
+
+            created = []
+            for segment in segments:
+                row = existing.get(segment["name"])
+                if row is None:
+                    created.append(segment)
+                    continue
+                for field in ("region", "capacity_mw", "base_load_min", "base_load_max"):
+                    if segment.get(field) is not None:
+                        setattr(row, field, segment[field])
+            self._insert(db, created)
+            db.commit()
+        self.load(db)
+        return {"created": len(created), "updated": len(segments) - len(created), "total": len(self)}
+
+    @staticmethod
+    def _insert(db: Session, segments: List[Dict]):
+        if segments:
+            created_at = datetime.now()
+            db.bulk_insert_mappings(GridSegment, [{**segment, "created_at": created_at} for segment in segments])
+
+
+def segment_filter(column, segments: List[str]):
+    """``column IN segments``, or no restriction for lists too long to bind as parameters"""
+    return column.in_(segments) if len(segments) <= MAX_IN_CLAUSE else true()
+
+
+segment_registry = SegmentRegistry(DEFAULT_SEGMENTS)
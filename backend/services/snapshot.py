@@ -0,0 +1,291 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models.database import GridLoad
+from services.data_generator import DataGenerator
+from services.forecasting import ForecastingService
+from services.precompute import precomputed_results
+from services.result_cache import result_cache
+from services.segment_registry import segment_filter, segment_registry
+from services.risk_stats import risk_stats
+from services.timeseries_store import SeriesWindow, timeseries_store
+
+
+class AnalyticsSnapshot:
+    """Recent telemetry for every segment, fetched once and shared by the dashboard analytics.
+
+    A snapshot is built per request. It loads the widest window any analytic
+    needs (7 days for forecasting) with a single query on first use; current
+    loads, risk scores, forecasts and alerts are then all computed from the
+    same in-memory arrays instead of issuing their own per-segment queries.
+    When the process-local time-series store can serve the window, no query
+    is issued at all. Risk scores and forecasts are taken from the latest
+    precomputed run while it is fresh; ``freshness`` reports which was used.
+    Async routes call ``load_async`` before using it.
+    """
+
+    FORECAST_WINDOW = timedelta(days=7)
+    RISK_WINDOW = timedelta(hours=24)
+    CURRENT_WINDOW = timedelta(hours=1)
+
+    HIGH_LOAD_THRESHOLD_MW = 2500
+    HIGH_RISK_SCORE = 75
+    SURGE_RATIO = 1.2
+
+    def __init__(
+        self,
+        db: Optional[Session] = None,
+        segments: Optional[List[str]] = None,
+        window: timedelta = FORECAST_WINDOW,
+        now: Optional[datetime] = None
+    ):
+        self.db = db
+        self.segments = list(segment_registry.names if segments is None else segments)
+        self.window = window
+        self.now = now or datetime.now()
+        self._series: Optional[Dict[str, SeriesWindow]] = None
+        self._risks: Optional[List[Dict]] = None
+        self._current_loads: Optional[Dict[str, Dict]] = None
+        self._forecasts: Dict[int, Dict[str, List[Dict]]] = {}
+        self._freshness: Optional[Dict] = None
+
+    @property
+    def series(self) -> Dict[str, SeriesWindow]:
+        """Per-segment timestamp/load/temperature arrays, oldest first"""
+        if self._series is None:
+            self._series = self._from_store()
+            if self._series is None:
+                self._series = self._series_from_rows(self.db.execute(self._query()).all())
+        return self._series
+
+    async def load_async(self, session, risks_only: bool = False) -> "AnalyticsSnapshot":
+        """Fetch the snapshot window over an AsyncSession so the query does not block the event loop
+        
+        With ``risks_only`` the risk scores are computed here, and the window
+        is only fetched for segments that the precomputed run, the result
+        cache and the streaming risk statistics cannot serve.
+        """
+        if risks_only and self._risks is None:
+            resolved = self._resolve_risks()
+            if resolved[2]:
+                await self._load_series_async(session)
+            self._finish_risks(*resolved)
+            return self
+        await self._load_series_async(session)
+        return self
+
+    async def _load_series_async(self, session):
+        if self._series is None:
+            self._series = self._from_store()
+            if self._series is None:
+                result = await session.execute(self._query())
+                self._series = self._series_from_rows(result.all())
+
+    def _from_store(self) -> Optional[Dict[str, SeriesWindow]]:
+        return timeseries_store.windows(self.segments, self.now - self.window)
+
+    def _query(self):
+        return select(
+            GridLoad.grid_segment,
+            GridLoad.timestamp,
+            GridLoad.load_mw,
+            GridLoad.temperature
+        ).where(
+            segment_filter(GridLoad.grid_segment, self.segments),
+            GridLoad.timestamp >= self.now - self.window
+        ).order_by(GridLoad.grid_segment, GridLoad.timestamp.asc())
+
+    def _series_from_rows(self, rows) -> Dict[str, SeriesWindow]:
+        grouped: Dict[str, List] = {segment: [] for segment in self.segments}
+        for row in rows:
+            segment_rows = grouped.get(row.grid_segment)
+            if segment_rows is not None:
+                segment_rows.append(row)
+
+        return {
+            segment: SeriesWindow(
+                np.array([r.timestamp for r in segment_rows], dtype="datetime64[us]"),
+                np.array([r.load_mw for r in segment_rows], dtype=np.float64),
+                np.array(
+                    [np.nan if r.temperature is None else r.temperature for r in segment_rows],
+                    dtype=np.float64
+                )
+            )
+            for segment, segment_rows in grouped.items()
+        }
+
+    def _since(self, segment: str, window: timedelta) -> slice:
+        """Slice of a segment's arrays covering readings newer than now - window"""
+        timestamps = self.series[segment].timestamp
+        cutoff = np.datetime64(self.now - window, "us")
+        return slice(int(np.searchsorted(timestamps, cutoff, side="left")), len(timestamps))
+
+    def current_loads(self) -> Dict[str, Dict]:
+        """Latest reading per segment within the last hour (same shape as DataGenerator.get_current_loads)"""
+        if self._current_loads is None:
+            current_loads = {}
+            for segment in self.segments:
+                window = self._since(segment, self.CURRENT_WINDOW)
+                data = self.series[segment]
+                if window.start < window.stop:
+                    temperature = float(data.temperature[-1])
+                    current_loads[segment] = {
+                        "load_mw": float(data.load_mw[-1]),
+                        "temperature": None if np.isnan(temperature) else temperature,
+                        "timestamp": data.timestamp[-1].astype(datetime)
+                    }
+                else:
+                    current_loads[segment] = DataGenerator.simulated_current_load(segment)
+            self._current_loads = current_loads
+        return self._current_loads
+
+    def segment_risks(self) -> List[Dict]:
+        """Risk scores for all segments, highest first (same shape as get_all_segment_risks)"""
+        if self._risks is None:
+            self._finish_risks(*self._resolve_risks())
+        return self._risks
+
+    def _resolve_risks(self) -> Tuple[Dict[str, Dict], Dict[str, Dict], List[str], Dict]:
+        """Risk scores available without the series window, and the segments that still need it"""
+        precomputed, pending, computed_at = precomputed_results.lookup_risks(self.segments, self.now)
+        self._note_freshness(computed_at, len(pending))
+        cached, missing, watermarks = result_cache.lookup("risk", pending, 24)
+        cached.update(precomputed)
+        computed, remaining = {}, []
+        for segment in missing:
+            summary = risk_stats.summary(segment, self.now) if self._risks_from_stats() else None
+            if summary is not None:
+                computed[segment] = ForecastingService.risk_from_summary(summary)
+            else:
+                remaining.append(segment)
+        return cached, computed, remaining, watermarks
+
+    def _finish_risks(self, cached: Dict[str, Dict], computed: Dict[str, Dict], remaining: List[str], watermarks: Dict):
+        for segment in remaining:
+            loads = self.series[segment].load_mw[self._since(segment, self.RISK_WINDOW)]
+            computed[segment] = ForecastingService.risk_from_loads(loads)
+            if risk_stats.verify and risk_stats.ready:
+                streaming = ForecastingService.risk_from_summary(risk_stats.summary(segment, self.now))
+                ForecastingService._verify_streaming_risk(segment, streaming, loads)
+        result_cache.store("risk", 24, computed, watermarks)
+        cached.update(computed)
+
+        risks = [{"grid_segment": segment, **cached[segment]} for segment in self.segments]
+        risks.sort(key=lambda x: x["risk_score"], reverse=True)
+        self._risks = risks
+
+    @staticmethod
+    def _risks_from_stats() -> bool:
+        # In verify mode risks are computed from the series and checked against the stats
+        return risk_stats.enabled and risk_stats.ready and not risk_stats.verify
+
+    def forecasts(self, hours: int = 24) -> Dict[str, List[Dict]]:
+        """Demand forecasts for all segments from the shared history"""
+        if hours not in self._forecasts:
+            precomputed, pending, computed_at = precomputed_results.lookup_forecasts(self.segments, hours, self.now)
+            self._note_freshness(computed_at, len(pending))
+            cached, missing, watermarks = result_cache.lookup(("forecast", True), pending, hours)
+            cached.update(precomputed)
+            if missing:
+                matrix = ForecastingService.matrix_from_histories([
+                    self.series[segment].load_mw[self._since(segment, self.FORECAST_WINDOW)]
+                    for segment in missing
+                ])
+                computed = ForecastingService._forecast_segments(missing, matrix, hours, True, now=self.now)
+                result_cache.store(("forecast", True), hours, computed, watermarks)
+                cached.update(computed)
+            self._forecasts[hours] = {segment: cached[segment] for segment in self.segments}
+        return self._forecasts[hours]
+
+    def _note_freshness(self, computed_at: Optional[datetime], missing: int):
+        freshness = precomputed_results.freshness(computed_at, missing, len(self.segments))
+        if self._freshness is None or self._freshness["source"] == freshness["source"]:
+            self._freshness = freshness
+        else:
+            self._freshness = {**freshness, "source": "mixed"}
+
+    def freshness(self) -> Dict:
+        """Source and computation time of the risk scores and forecasts used so far"""
+        return self._freshness or precomputed_results.freshness(None, 0, 0)
+
+    def alerts(self) -> List[Dict]:
+        """Predictive alerts based on current loads, risk scores and next-hour forecasts"""
+        alerts = []
+        timestamp = datetime.now().isoformat()
+        current_loads = self.current_loads()
+
+        # Check for high load alerts
+        total_load = sum(load["load_mw"] for load in current_loads.values())
+        if total_load > self.HIGH_LOAD_THRESHOLD_MW:
+            alerts.append({
+                "type": "HIGH_LOAD",
+                "severity": "WARNING",
+                "message": f"Total grid load ({total_load:.1f} MW) exceeds threshold ({self.HIGH_LOAD_THRESHOLD_MW} MW)",
+                "timestamp": timestamp
+            })
+
+        # Check for high risk segments
+        for risk in self.segment_risks():
+            if risk["risk_score"] >= self.HIGH_RISK_SCORE:
+                alerts.append({
+                    "type": "HIGH_RISK",
+                    "severity": "CRITICAL",
+                    "message": f"High outage risk detected in {risk['grid_segment']} (Risk Score: {risk['risk_score']})",
+                    "grid_segment": risk["grid_segment"],
+                    "risk_score": risk["risk_score"],
+                    "timestamp": timestamp
+                })
+
+            # Check for anomalies
+            if risk["factors"].get("anomaly_detected", False):
+                alerts.append({
+                    "type": "ANOMALY",
+                    "severity": "WARNING",
+                    "message": f"Unusual load pattern detected in {risk['grid_segment']}",
+                    "grid_segment": risk["grid_segment"],
+                    "timestamp": timestamp
+                })
+
+        # Next-hour forecast to check for surge
+        for segment, forecast in self.forecasts(hours=1).items():
+            if forecast:
+                predicted = forecast[0]["predicted_load_mw"]
+                current = current_loads.get(segment, {}).get("load_mw", 0)
+
+                if current > 0 and predicted > current * self.SURGE_RATIO:
+                    alerts.append({
+                        "type": "SURGE_PREDICTED",
+                        "severity": "INFO",
+                        "message": f"Demand surge predicted in {segment} (Current: {current:.1f} MW → Forecast: {predicted:.1f} MW)",
+                        "grid_segment": segment,
+                        "timestamp": timestamp
+                    })
+
+        return alerts
+
+    def maintenance(self) -> List[Dict]:
+        """Segments ranked by outage risk with a recommended maintenance action each"""
+        return [
+            {
+                "priority_rank": i,
+                "grid_segment": risk.get("grid_segment", "Unknown"),
+                "risk_score": risk.get("risk_score", 0),
+                "recommended_action": self.recommended_action(risk.get("risk_score", 0)),
+                "factors": risk.get("factors", {})
+            }
+            for i, risk in enumerate(self.segment_risks() or [], 1)
+        ]
+
+    @staticmethod
+    def recommended_action(risk_score: int) -> str:
+        """Get recommended maintenance action based on risk score"""
+        if risk_score >= 80:
+            return "Immediate inspection and preventive maintenance required"
+        elif risk_score >= 60:
+            return "Schedule maintenance within 48 hours"
+        elif risk_score >= 40:
+            return "Monitor closely, schedule maintenance within 1 week"
+        else:
+            return "Routine maintenance sufficient"
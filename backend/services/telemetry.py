@@ -0,0 +1,33 @@
+from typing import Dict, List
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from models.database import GridLoad
+from services.data_version import data_version
+from services.holt_winters import HoltWintersService
+from services.precompute import precomputed_results
+from services.result_cache import result_cache
+from services.risk_stats import risk_stats
+from services.rollups import RollupService
+from services.timeseries_store import timeseries_store
+
+
+def write_loads(db: Session, rows: List[Dict]) -> int:
+    """Insert grid_loads rows with one Core executemany, update rollups and Holt-Winters states, commit, and notify in-memory consumers"""
+    if not rows:
+        return 0
+    db.execute(insert(GridLoad), rows)
+    RollupService.apply(db, rows)
+    HoltWintersService.apply(db, rows)
+    db.commit()
+    on_loads_written(rows)
+    return len(rows)
+
+
+def on_loads_written(rows: List[Dict]):
+    """Propagate committed readings to process-local state derived from grid_loads"""
+    timeseries_store.record_rows(rows)
+    risk_stats.record_rows(rows)
+    segments = {row["grid_segment"] for row in rows}
+    result_cache.invalidate_segments(segments)
+    precomputed_results.mark_written(segments)
+    data_version.bump()
@@ -0,0 +1,200 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from models.database import GridLoad
+
+
+class SeriesWindow(NamedTuple):
+    """Readings of one segment inside a time window, oldest first"""
+    timestamp: np.ndarray
+    load_mw: np.ndarray
+    temperature: np.ndarray
+
+
+class SegmentRingBuffer:
+    """Fixed-capacity ring buffer of (timestamp, load_mw, temperature) readings.
+
+    Every reading is stored twice, at ``i`` and ``i + capacity``, so the most
+    recent ``size`` readings always form one contiguous slice of the backing
+    arrays and a window is a single slice copy. Windows are copied while the
+    store's lock is held, because writers keep appending to the backing
+    arrays after the lock is released.
+    """
+
+    def __init__(self, capacity: int, covered_from: np.datetime64):
+        self.capacity = capacity
+        self._timestamp = np.empty(capacity * 2, dtype="datetime64[us]")
+        self._load_mw = np.empty(capacity * 2, dtype=np.float64)
+        self._temperature = np.empty(capacity * 2, dtype=np.float64)
+        self._head = 0
+        self.size = 0
+        # Earliest timestamp from which the buffer holds every reading
+        self.covered_from = covered_from
+
+    def _slice(self) -> slice:
+        end = self._head + self.capacity
+        return slice(end - self.size, end)
+
+    @property
+    def latest_timestamp(self) -> Optional[np.datetime64]:
+        return self._timestamp[self._slice()][-1] if self.size else None
+
+    def append(self, timestamps: np.ndarray, load_mw: np.ndarray, temperature: np.ndarray):
+        """Append readings, evicting the oldest ones once the buffer is full"""
+        if len(timestamps) == 0:
+            return
+
+        in_order = np.all(timestamps[1:] >= timestamps[:-1])
+        if not in_order or (self.size and timestamps[0] < self.latest_timestamp):
+            # Late or unsorted readings: merge with the current contents and rewrite
+            current = self._slice()
+            timestamps = np.concatenate((self._timestamp[current], timestamps))
+            load_mw = np.concatenate((self._load_mw[current], load_mw))
+            temperature = np.concatenate((self._temperature[current], temperature))
+            order = np.argsort(timestamps, kind="stable")
+            timestamps, load_mw, temperature = timestamps[order], load_mw[order], temperature[order]
+            self._head = 0
+            self.size = 0
+
+        count = len(timestamps)
+        evicted = self.size + count - self.capacity
+        if evicted > 0:
+            # Newest reading that falls out of the buffer bounds its coverage
+            if evicted > self.size:
+                newest_evicted = timestamps[evicted - self.size - 1]
+            else:
+                newest_evicted = self._timestamp[self._slice()][evicted - 1]
+            self.covered_from = max(self.covered_from, newest_evicted + np.timedelta64(1, "us"))
+
+        if count > self.capacity:
+            timestamps = timestamps[-self.capacity:]
+            load_mw = load_mw[-self.capacity:]
+            temperature = temperature[-self.capacity:]
+            count = self.capacity
+
+        positions = (self._head + np.arange(count)) % self.capacity
+        for target, values in (
+            (self._timestamp, timestamps),
+            (self._load_mw, load_mw),
+            (self._temperature, temperature)
+        ):
+            target[positions] = values
+            target[positions + self.capacity] = values
+
+        self._head = (self._head + count) % self.capacity
+        self.size = min(self.capacity, self.size + count)
+
+    def window(self, start: np.datetime64) -> Optional[SeriesWindow]:
+        """Copies of readings at or after ``start``, or None if evicted data is needed"""
+        if start < self.covered_from:
+            return None
+        current = self._slice()
+        timestamps = self._timestamp[current]
+        first = int(np.searchsorted(timestamps, start, side="left"))
+        return SeriesWindow(
+            timestamps[first:].copy(),
+            self._load_mw[current][first:].copy(),
+            self._temperature[current][first:].copy()
+        )
+
+
+class TimeSeriesStore:
+    """Process-local ring buffers of recent readings for every grid segment.
+
+    The store is warmed from ``grid_loads`` at startup and appended to by the
+    code paths that write readings. Until it is warm, or when a requested
+    window reaches past what a buffer still holds, readers get None and fall
+    back to querying the database. Each process keeps its own store, so
+    readings written by another worker are only seen after a re-warm.
+    """
+
+    def __init__(self, capacity: int = 1024, retention: timedelta = timedelta(days=7), enabled: bool = True):
+        self.capacity = capacity
+        self.retention = retention
+        self.enabled = enabled
+        self.ready = False
+        self._covered_from = np.datetime64("NaT")
+        self._buffers: Dict[str, SegmentRingBuffer] = {}
+        self._lock = threading.Lock()
+
+    def _buffer(self, segment: str) -> SegmentRingBuffer:
+        buffer = self._buffers.get(segment)
+        if buffer is None:
+            buffer = SegmentRingBuffer(self.capacity, self._covered_from)
+            self._buffers[segment] = buffer
+        return buffer
+
+    def warm(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Load the retention window of every segment from the database with one query"""
+        if not self.enabled:
+            return 0
+
+        start = (now or datetime.now()) - self.retention
+        rows = db.query(
+            GridLoad.grid_segment,
+            GridLoad.timestamp,
+            GridLoad.load_mw,
+            GridLoad.temperature
+        ).filter(
+            GridLoad.timestamp >= start
+        ).order_by(GridLoad.grid_segment, GridLoad.timestamp.asc()).all()
+
+        with self._lock:
+            self._covered_from = np.datetime64(start, "us")
+            self._buffers = {}
+            self._append_rows(rows)
+            self.ready = True
+        return len(rows)
+
+    def record_rows(self, rows: List[Dict]):
+        """Append newly written readings given as grid_loads row dicts"""
+        if not self.ready:
+            return
+        with self._lock:
+            self._append_rows(
+                (row["grid_segment"], row["timestamp"], row["load_mw"], row.get("temperature"))
+                for row in rows
+            )
+
+    def _append_rows(self, rows):
+        grouped: Dict[str, List] = {}
+        for segment, timestamp, load_mw, temperature in rows:
+            grouped.setdefault(segment, []).append((timestamp, load_mw, temperature))
+
+        for segment, readings in grouped.items():
+            timestamps, loads, temperatures = zip(*readings)
+            self._buffer(segment).append(
+                np.array(timestamps, dtype="datetime64[us]"),
+                np.array(loads, dtype=np.float64),
+                np.array([np.nan if t is None else t for t in temperatures], dtype=np.float64)
+            )
+
+    def window(self, segment: str, start: datetime) -> Optional[SeriesWindow]:
+        """Readings of a segment since ``start``, or None to fall back to the database"""
+        if not (self.enabled and self.ready):
+            return None
+        with self._lock:
+            return self._buffer(segment).window(np.datetime64(start, "us"))
+
+    def windows(self, segments: List[str], start: datetime) -> Optional[Dict[str, SeriesWindow]]:
+        """Windows for several segments taken together, or None unless every one of them can be served"""
+        if not (self.enabled and self.ready):
+            return None
+        start = np.datetime64(start, "us")
+        result = {}
+        with self._lock:
+            for segment in segments:
+                window = self._buffer(segment).window(start)
+                if window is None:
+                    return None
+                result[segment] = window
+        return result
+
+
+timeseries_store = TimeSeriesStore(
+    capacity=int(os.getenv("TIMESERIES_STORE_CAPACITY", "1024")),
+    enabled=os.getenv("TIMESERIES_STORE_ENABLED", "true").lower() == "true"
+)
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from sqlalchemy.orm import Session
+from models.database import SessionLocal, get_async_sessionmaker
+from services.forecasting import ForecastingService
+from services.precompute import precomputed_results
+from services.risk_stats import risk_stats
+from services.rollups import RollupService
+from services.segment_registry import segment_registry
+from services.snapshot import AnalyticsSnapshot
+from services.timeseries_store import timeseries_store
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupStage:
+    """Startup work that makes the first requests as fast as later ones; drives ``/ready``.
+
+    Recent per-segment history is loaded into the time-series store and the
+    streaming risk statistics by ``preload_history``, which runs before the
+    server accepts requests: readings ingested while a store is loading
+    would otherwise be missed by it. The rest runs in the background once
+    the server is up, so ``/health`` answers right away: the hot
+    ``grid_loads`` and rollup index ranges are read once to pull their
+    pages into the SQLite page cache (or the server's buffer cache), then
+    the dashboard snapshot, forecasts, risk scores and alerts are computed
+    once over the async engine, which opens its first connection and fills
+    the result cache. ``ready`` becomes true when that finishes. A failed
+    or timed-out step is logged and reported but does not hold readiness,
+    since warm-up only affects latency, not correctness.
+    """
+
+    FORECAST_HOURS = 24
+    ROLLUP_WINDOW = timedelta(days=30)
+
+    def __init__(self, enabled: bool = True, timeout_seconds: float = 120.0):
+        self.enabled = enabled
+        self.timeout_seconds = timeout_seconds
+        self.state = "pending"
+        self.steps: Dict[str, Dict] = {}
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._started = time.perf_counter()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def preload_history(self, db: Session):
+        """Load the in-memory stores before serving (see the class docstring)"""
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        self._step("history", lambda: {
+            "timeseries_readings": timeseries_store.warm(db),
+            "risk_readings": risk_stats.warm(db)
+        })
+
+    def start(self):
+        if self._task is not None:
+            return
+        if not self.enabled:
+            self._finish()
+            return
+        self.state = "warming"
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        try:
+            await asyncio.wait_for(self._warm(), timeout=self.timeout_seconds)
+        except asyncio.TimeoutError:
+            logger.warning(f"Warm-up did not finish within {self.timeout_seconds}s; marking the instance ready")
+        self._finish()
+
+    async def _warm(self):
+        await self._step_async("indexes", asyncio.to_thread(self.touch_indexes))
+        await self._step_async("computations", self.prime_computations())
+
+    def touch_indexes(self) -> Dict[str, int]:
+        """Run the hot range scans once and discard the rows; returns rows read per query"""
+        segments = list(segment_registry.names)
+        now = datetime.now()
+        db = SessionLocal()
+        try:
+            return {
+                "forecast_history": len(db.execute(
+                    ForecastingService._history_query(segments, now - AnalyticsSnapshot.FORECAST_WINDOW)
+                ).all()),
+                "risk_window": len(db.execute(
+                    ForecastingService._risk_query(segments, now - AnalyticsSnapshot.RISK_WINDOW)
+                ).all()),
+                "hourly_rollups": len(RollupService.query(db, "hour", now - self.ROLLUP_WINDOW))
+            }
+        finally:
+            db.close()
+
+    async def prime_computations(self) -> Dict[str, int]:
+        """Compute the dashboard analytics once, the way the dashboard routes do"""
+        segments = list(segment_registry.names)
+        async with get_async_sessionmaker()() as session:
+            snapshot = await AnalyticsSnapshot(segments=segments).load_async(session)
+            forecasts, _ = await precomputed_results.forecasts_async(session, segments, self.FORECAST_HOURS)
+        return {
+            "segments": len(segments),
+            "forecasts": len(forecasts),
+            "risks": len(snapshot.segment_risks()),
+            "alerts": len(snapshot.alerts())
+        }
+
+    def _step(self, name: str, run: Callable[[], Dict]):
+        started = time.perf_counter()
+        try:
+            self._record(name, started, run())
+        except Exception as e:
+            logger.exception(f"Warm-up step {name} failed")
+            self._record(name, started, None, e)
+
+    async def _step_async(self, name: str, awaitable):
+        started = time.perf_counter()
+        try:
+            self._record(name, started, await awaitable)
+        except Exception as e:
+            logger.exception(f"Warm-up step {name} failed")
+            self._record(name, started, None, e)
+
+    def _record(self, name: str, started: float, result: Optional[Dict], error: Optional[Exception] = None):
+        self.steps[name] = {
+            "duration_seconds": round(time.perf_counter() - started, 4),
+            **({"error": str(error)} if error is not None else result)
+        }
+
+    def _finish(self):
+        self.state = "ready"
+        self.finished_at = datetime.now()
+        logger.info(f"Warm-up finished in {time.perf_counter() - self._started:.3f}s")
+
+    def status(self) -> Dict:
+        return {
+            "status": self.state,
+            "enabled": self.enabled,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "steps": self.steps
+        }
+
+
+warmup = WarmupStage(
+    enabled=os.getenv("WARMUP_ENABLED", "true").lower() == "true",
+    timeout_seconds=float(os.getenv("WARMUP_TIMEOUT_SECONDS", "120"))
+)
@@ -0,0 +1,23 @@
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to JSON bytes; datetimes become ISO 8601 strings and NumPy scalars/arrays plain JSON"""
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by orjson
+
+    Returning one from a route bypasses FastAPI's ``jsonable_encoder`` walk of
+    the payload, so large nested dicts holding datetimes are serialized to
+    bytes in a single pass. The output matches the default encoder for the
+    types the API returns.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,7 +1,10 @@
 from fastapi import HTTPException
-from typing import Optional
+from typing import List, Optional
 import re
 
+# Longest history window any endpoint serves
+MAX_DAYS = 365
+
 def validate_segment_name(segment: Optional[str]) -> Optional[str]:
     """Validate and sanitize grid segment name"""
     if segment is None:
@@ -60,12 +63,178 @@ def validate_days(days: int) -> int:
     
     if days < 1:
         raise HTTPException(status_code=400, detail="Days must be at least 1")
-    if days > 365:
-        raise HTTPException(status_code=400, detail="Days cannot exceed 365")
+    if days > MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Days cannot exceed {MAX_DAYS}")
     
     return days
 
 
+def validate_chunk_size(chunk_size: int) -> int:
+    """Validate ingest chunk size parameter"""
+    if not isinstance(chunk_size, int):
+        try:
+            chunk_size = int(chunk_size)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Chunk size must be an integer")
+    
+    if chunk_size < 100:
+        raise HTTPException(status_code=400, detail="Chunk size must be at least 100")
+    if chunk_size > 50000:
+        raise HTTPException(status_code=400, detail="Chunk size cannot exceed 50000")
+    
+    return chunk_size
+
+
+def validate_resolution(resolution: str) -> str:
+    """Validate historical data resolution parameter"""
+    allowed = ("auto", "raw", "hour", "day", "week")
+    resolution = (resolution or "").strip().lower()
+    if resolution not in allowed:
+        raise HTTPException(status_code=400, detail=f"Resolution must be one of: {', '.join(allowed)}")
+    return resolution
+
+
+def validate_engine(engine: str) -> str:
+    """Validate forecasting engine parameter"""
+    allowed = ("moving_average", "holt_winters")
+    engine = (engine or "").strip().lower()
+    if engine not in allowed:
+        raise HTTPException(status_code=400, detail=f"Engine must be one of: {', '.join(allowed)}")
+    return engine
+
+
+def validate_anomaly_method(method: str) -> str:
+    """Validate historical anomaly overlay method parameter"""
+    allowed = ("zscore", "mad")
+    method = (method or "").strip().lower()
+    if method not in allowed:
+        raise HTTPException(status_code=400, detail=f"Anomaly method must be one of: {', '.join(allowed)}")
+    return method
+
+
+def validate_anomaly_window(window: int) -> int:
+    """Validate anomaly detection window parameter (points)"""
+    if not isinstance(window, int):
+        try:
+            window = int(window)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Anomaly window must be an integer")
+    
+    if window < 3:
+        raise HTTPException(status_code=400, detail="Anomaly window must be at least 3")
+    if window > 1000:
+        raise HTTPException(status_code=400, detail="Anomaly window cannot exceed 1000")
+    
+    return window
+
+
+def validate_anomaly_threshold(threshold: float) -> float:
+    """Validate anomaly score threshold parameter"""
+    if not isinstance(threshold, (int, float)):
+        try:
+            threshold = float(threshold)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Anomaly threshold must be a number")
+    
+    if not 0 < threshold <= 100:
+        raise HTTPException(status_code=400, detail="Anomaly threshold must be greater than 0 and at most 100")
+    
+    return float(threshold)
+
+
+def validate_max_points(max_points: int) -> int:
+    """Validate max_points parameter"""
+    if not isinstance(max_points, int):
+        try:
+            max_points = int(max_points)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Max points must be an integer")
+    
+    if max_points < 10:
+        raise HTTPException(status_code=400, detail="Max points must be at least 10")
+    if max_points > 100000:
+        raise HTTPException(status_code=400, detail="Max points cannot exceed 100000")
+    
+    return max_points
+
+
+def validate_page_size(page_size: int) -> int:
+    """Validate page size parameter"""
+    if not isinstance(page_size, int):
+        try:
+            page_size = int(page_size)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Page size must be an integer")
+    
+    if page_size < 1:
+        raise HTTPException(status_code=400, detail="Page size must be at least 1")
+    if page_size > 10000:
+        raise HTTPException(status_code=400, detail="Page size cannot exceed 10000")
+    
+    return page_size
+
+
+def validate_offset(offset: int) -> int:
+    """Validate pagination offset parameter"""
+    if not isinstance(offset, int):
+        try:
+            offset = int(offset)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Offset must be an integer")
+    
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Offset cannot be negative")
+    
+    return offset
+
+
+def validate_limit(limit: int) -> int:
+    """Validate pagination limit parameter"""
+    if not isinstance(limit, int):
+        try:
+            limit = int(limit)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Limit must be an integer")
+    
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="Limit must be at least 1")
+    if limit > 10000:
+        raise HTTPException(status_code=400, detail="Limit cannot exceed 10000")
+    
+    return limit
+
+
+def validate_step(step: int) -> int:
+    """Validate backtest origin step parameter (hours)"""
+    if not isinstance(step, int):
+        try:
+            step = int(step)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Step must be an integer")
+    
+    if step < 1:
+        raise HTTPException(status_code=400, detail="Step must be at least 1")
+    if step > 168:
+        raise HTTPException(status_code=400, detail="Step cannot exceed 168 (7 days)")
+    
+    return step
+
+
+def validate_horizons(horizons: Optional[str], hours: int) -> Optional[List[int]]:
+    """Validate a comma-separated list of forecast horizons within ``hours``"""
+    if horizons is None:
+        return None
+    try:
+        values = [int(part) for part in horizons.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Horizons must be comma-separated integers")
+    if not values:
+        raise HTTPException(status_code=400, detail="Horizons cannot be empty")
+    if any(h < 1 or h > hours for h in values):
+        raise HTTPException(status_code=400, detail=f"Horizons must be between 1 and {hours}")
+    return values
+
+
 def sanitize_string(value: str, max_length: int = 1000) -> str:
     """Sanitize string input"""
     if not isinstance(value, str):
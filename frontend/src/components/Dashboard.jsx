@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react';
-import { getCurrentLoad, getForecast, getOutageRisks, getAlerts, getMaintenancePrioritization, getHistoricalLoads } from '../utils/api';
+import { getCurrentLoad, getForecast, getAlerts, getHistoricalLoads, subscribeDashboard } from '../utils/api';
 import LoadChart from './LoadChart';
 import RiskHeatMap from './RiskHeatMap';
 import AlertsPanel from './AlertsPanel';
@@ -32,20 +32,19 @@ function Dashboard() {
       }
       setError(null);
       
-      const [loadData, forecastData, risksData, alertsData, maintenanceData] = await Promise.all([
+      // Alerts, risks and maintenance come from one server-side snapshot
+      const [loadData, forecastData, alertsData] = await Promise.all([
         getCurrentLoad(),
         getForecast(),
-        getOutageRisks(),
-        getAlerts(),
-        getMaintenancePrioritization(),
+        getAlerts('risks,maintenance'),
       ]);
 
       // Validate and set data with fallbacks
       setCurrentLoad(loadData || { total_load_mw: 0, segments: {} });
       setForecast(forecastData || { forecasts_by_segment: {} });
-      setRisks(Array.isArray(risksData?.risks) ? risksData.risks : []);
+      setRisks(Array.isArray(alertsData?.risks) ? alertsData.risks : []);
       setAlerts(Array.isArray(alertsData?.alerts) ? alertsData.alerts : []);
-      setMaintenance(Array.isArray(maintenanceData?.prioritized_segments) ? maintenanceData.prioritized_segments : []);
+      setMaintenance(Array.isArray(alertsData?.prioritized_segments) ? alertsData.prioritized_segments : []);
     } catch (error) {
       console.error('Error fetching dashboard data:', error);
       const errorMessage = error?.message || 'Failed to load dashboard data. Please try again.';
@@ -62,11 +61,48 @@ function Dashboard() {
     }
   };
 
+  const applyLiveUpdate = (sections) => {
+    if (sections.current_load) {
+      setCurrentLoad(sections.current_load);
+    }
+    if (sections.forecast) {
+      setForecast(sections.forecast);
+    }
+    if (Array.isArray(sections.risks)) {
+      setRisks(sections.risks);
+    }
+    if (Array.isArray(sections.maintenance)) {
+      setMaintenance(sections.maintenance);
+    }
+    if (Array.isArray(sections.alerts?.alerts)) {
+      setAlerts(sections.alerts.alerts);
+    }
+  };
+
   useEffect(() => {
     fetchDashboardData();
-    // Refresh every 30 seconds (without showing loading spinner)
-    const interval = setInterval(() => fetchDashboardData(false), 30000);
-    return () => clearInterval(interval);
+    // Prefer pushed updates; poll every 30 seconds (without showing loading spinner) while the stream is down
+    let streaming = false;
+    const close = subscribeDashboard(
+      (sections) => {
+        streaming = true;
+        applyLiveUpdate(sections);
+      },
+      () => {
+        streaming = false;
+      }
+    );
+    const interval = setInterval(() => {
+      if (!streaming) {
+        fetchDashboardData(false);
+      }
+    }, 30000);
+    return () => {
+      clearInterval(interval);
+      if (close) {
+        close();
+      }
+    };
   }, []);
 
   if (loading && !currentLoad) {
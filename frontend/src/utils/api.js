@@ -78,9 +78,11 @@ export const getOutageRisks = async () => {
   }
 };
 
-export const getAlerts = async () => {
+export const getAlerts = async (include = null) => {
   try {
-    const response = await api.get('/api/dashboard/alerts');
+    // include: e.g. 'risks,maintenance' to receive those payloads from the same server-side snapshot
+    const params = include ? { include } : {};
+    const response = await api.get('/api/dashboard/alerts', { params });
     return response.data;
   } catch (error) {
     console.error('Error fetching alerts:', error);
@@ -98,6 +100,31 @@ export const getMaintenancePrioritization = async () => {
   }
 };
 
+// Live dashboard updates over server-sent events. onSections receives the
+// changed sections of each update; returns a function that closes the stream,
+// or null when EventSource is unavailable (callers keep polling instead).
+export const subscribeDashboard = (onSections, onError) => {
+  if (typeof EventSource === 'undefined') {
+    return null;
+  }
+  const source = new EventSource(`${API_BASE_URL}/api/stream/dashboard`);
+  const handle = (event) => {
+    try {
+      onSections(JSON.parse(event.data).sections || {});
+    } catch (error) {
+      console.error('Error parsing dashboard update:', error);
+    }
+  };
+  source.addEventListener('snapshot', handle);
+  source.addEventListener('delta', handle);
+  source.onerror = (error) => {
+    if (onError) {
+      onError(error, source.readyState === EventSource.CLOSED);
+    }
+  };
+  return () => source.close();
+};
+
 export const getHistoricalLoads = async (segment = null, days = 7) => {
   try {
     // Validate days parameter